@@ -0,0 +1,261 @@
+"""Module to find a route quickly and keep improving it until a deadline with Anytime Repairing A*.
+
+ARA* runs Weighted A* with a decreasing weight and reuses the search effort of the previous
+iterations: only the cities whose distance improved since they were expanded are expanded again.
+Every improved route is reported with a proven bound on how far from optimal it can be.
+
+Classes:
+    - AnytimeSolution
+
+Functions:
+    - anytime_search
+"""
+
+import argparse
+import heapq
+import math
+import sys
+import time
+
+from collections.abc import Iterator
+from dataclasses import dataclass
+from pathlib import Path
+from typing import Final
+
+from find_route import parse_heuristic, parse_road_system, write_result
+
+
+__all__ = ["AnytimeSolution", "anytime_search"]
+__author__ = "Gavin Meyer"
+
+INFINITY: Final[float] = float("inf")
+
+
+@dataclass(frozen=True)
+class AnytimeSolution:
+    """An improved route found by anytime_search
+
+    Attributes:
+        result (tuple): The number of nodes popped, expanded, generated, distance, and path, where
+            the node counts are totals since the start of the search
+        weight (float): The heuristic weight of the iteration that found the route
+        bound (float): The route is at most this many times longer than the optimal route
+        elapsed (float): The seconds since the start of the search
+    """
+
+    result: tuple[int, int, int, float, list[tuple[str, str, float]] | None]
+    weight: float
+    bound: float
+    elapsed: float
+
+
+class _RepairingSearch:
+    """The state ARA* keeps between its iterations"""
+
+    def __init__(
+        self, graph: dict[str, dict[str, float]], origin: str, heuristic: dict[str, float]
+    ) -> None:
+        self.graph = graph
+        self.heuristic = heuristic
+        self.weight = 1.0
+        self.g: dict[str, float] = {origin: 0}
+        self.parents: dict[str, tuple[str, float]] = {}
+        self.closed: set[str] = set()
+        self.inconsistent: set[str] = set()
+        # Priority Queue of (weighted estimate, city) with lazy deletion: an entry is only current
+        # while it matches the estimate recorded in queued
+        self.queued: dict[str, float] = {}
+        self.frontier: list[tuple[float, str]] = []
+        self.nodes_popped: int = 0
+        self.nodes_expanded: int = 0
+        self.nodes_generated: int = 0
+        self.push(origin)
+
+    def push(self, city: str) -> None:
+        """Queue a city under its current weighted estimate."""
+        self.queued[city] = self.g[city] + self.weight * self.heuristic.get(city, INFINITY)
+        heapq.heappush(self.frontier, (self.queued[city], city))
+
+    def improve_path(self, destination: str, stop_at: float) -> bool:
+        """Expand until no queued city can lead to a shorter weighted route.
+
+        Returns:
+            bool: False if the deadline passed before the iteration finished
+        """
+        g = self.g
+        while self.frontier and self.frontier[0][0] < g.get(destination, INFINITY):
+            estimated_total, current_city = heapq.heappop(self.frontier)
+            if self.queued.get(current_city) != estimated_total:
+                continue
+            if time.perf_counter() >= stop_at:
+                return False
+            del self.queued[current_city]
+            self.nodes_popped += 1
+            self.nodes_expanded += 1
+            self.closed.add(current_city)
+
+            for neighbor, distance in self.graph[current_city].items():
+                self.nodes_generated += 1
+                new_cost = g[current_city] + distance
+                if new_cost < g.get(neighbor, INFINITY):
+                    g[neighbor] = new_cost
+                    self.parents[neighbor] = (current_city, distance)
+                    if neighbor in self.closed:
+                        self.inconsistent.add(neighbor)
+                    else:
+                        self.push(neighbor)
+        return True
+
+    def bound(self, distance: float) -> float:
+        """The suboptimality bound: min(weight, distance / the smallest g + h left to expand)."""
+        lower_bound = min(
+            (
+                self.g[city] + self.heuristic.get(city, INFINITY)
+                for city in (*self.queued, *self.inconsistent)
+            ),
+            default=distance,
+        )
+        if lower_bound >= distance:
+            return 1.0
+        return min(self.weight, distance / lower_bound) if lower_bound > 0 else self.weight
+
+    def reweight(self, weight: float) -> None:
+        """Requeue the frontier and the inconsistent cities under a new weight."""
+        self.weight = weight
+        cities = [*self.queued, *self.inconsistent]
+        self.queued.clear()
+        self.frontier.clear()
+        self.inconsistent.clear()
+        self.closed.clear()
+        for city in cities:
+            self.push(city)
+
+    def path(self, destination: str) -> list[tuple[str, str, float]]:
+        """Follows the parent pointers back from the destination."""
+        path: list[tuple[str, str, float]] = []
+        city = destination
+        while city in self.parents:
+            previous, distance = self.parents[city]
+            path.append((previous, city, distance))
+            city = previous
+        path.reverse()
+        return path
+
+
+def anytime_search(  # noqa: PLR0913, PLR0917
+    graph: dict[str, dict[str, float]],
+    origin: str,
+    destination: str,
+    heuristic: dict[str, float],
+    weight: float = 2.0,
+    step: float = 0.25,
+    deadline: float | None = None,
+) -> Iterator[AnytimeSolution]:
+    """Performs Anytime Repairing A* (ARA*) in the graph from origin to destination
+
+    The first iteration is Weighted A* with the given weight. Each following iteration lowers the
+    weight by step and resumes from the previous frontier plus the expanded cities whose distance
+    improved since (the INCONS list), so it only repairs what the lower weight changes. The search
+    stops once a weight of 1 has been searched, which proves the route optimal, or at the deadline.
+
+    The bound of a route is min(weight, distance / lower bound), where the lower bound is the
+    smallest g + h left on the frontier, so it can be tighter than the weight. It holds as long as
+    the heuristic is admissible.
+
+    Arguments:
+        graph: A dictionary representing the road connections
+        origin: The starting city
+        destination: The destination city
+        heuristic: A dictionary of heuristic values for each city
+        weight: The heuristic weight of the first iteration
+        step: How much the weight is lowered after each iteration, 0 to stop after the first route
+        deadline: The number of seconds after which the search stops, None for no limit. The first
+            route is always completed
+
+    Yields:
+        AnytimeSolution: Every route that is shorter than the previous one, as soon as it is found
+    """
+    started = time.perf_counter()
+    stop_at = INFINITY if deadline is None else started + deadline
+    search = _RepairingSearch(graph, origin, heuristic)
+    search.reweight(max(weight, 1.0))
+    best = INFINITY
+
+    # The first route is always completed, whatever the deadline
+    finished = search.improve_path(destination, INFINITY)
+    while finished:
+        counts = search.nodes_popped, search.nodes_expanded, search.nodes_generated
+        if math.isinf(search.g.get(destination, INFINITY)):
+            yield AnytimeSolution(
+                (*counts, INFINITY, None), search.weight, INFINITY, time.perf_counter() - started
+            )
+            return
+
+        # g(destination) can lag behind the parent pointers: the repairs may have shortened the
+        # route to its parent without the destination being expanded again. The route is what is
+        # returned, so its distance is the sum of its roads
+        route = search.path(destination)
+        distance = sum(road_distance for _, _, road_distance in route)
+        bound = search.bound(distance)
+        if distance < best:
+            best = distance
+            yield AnytimeSolution(
+                (*counts, distance, route), search.weight, bound, time.perf_counter() - started
+            )
+
+        if bound <= 1 or search.weight <= 1 or step <= 0:
+            return
+
+        # Lower the weight, then resume from the frontier and the inconsistent cities
+        search.reweight(max(search.weight - step, 1.0))
+        finished = search.improve_path(destination, stop_at)
+
+
+def _parse_options() -> argparse.Namespace:
+    """Parse the command line options"""
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("input_file", type=Path, help="The file containing the road system")
+    parser.add_argument("origin", help="The starting city")
+    parser.add_argument("destination", help="The destination city")
+    parser.add_argument("heuristic_file", type=Path, help="The file containing the heuristic")
+    parser.add_argument(
+        "--weight", type=float, default=2.0, help="The heuristic weight of the first route"
+    )
+    parser.add_argument(
+        "--step",
+        type=float,
+        default=0.25,
+        help="How much the weight is lowered after each route, 0 for Weighted A* only",
+    )
+    parser.add_argument(
+        "--deadline", type=float, help="Stop improving the route after this many seconds"
+    )
+    return parser.parse_args()
+
+
+def main() -> None:
+    """Main function to print every improved route as soon as it is found."""
+    args = _parse_options()
+    graph = parse_road_system(args.input_file)
+    heuristic = parse_heuristic(args.heuristic_file)
+
+    sys.stdout.write("Anytime Search\n")
+    for solution in anytime_search(
+        graph,
+        args.origin,
+        args.destination,
+        heuristic,
+        weight=args.weight,
+        step=args.step,
+        deadline=args.deadline,
+    ):
+        sys.stdout.write(
+            f"\nWeight: {solution.weight:g}, within {solution.bound:.3f} of optimal,"
+            f" after {solution.elapsed * 1000:.3f} ms\n"
+        )
+        write_result(solution.result)
+        sys.stdout.flush()
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,335 @@
+"""Module to compute the distances between many origins and many destinations at once.
+
+Every source runs a single uniform-cost search that stops as soon as all targets are settled, so
+an S x T matrix costs S searches instead of S x T calls to uninformed_search. The sources are
+spread over a process pool and the rows can be written straight into a memory-mapped .npy file.
+
+Functions:
+    - distance_matrix
+    - route_from_predecessors
+"""
+
+import argparse
+import heapq
+import sys
+
+from concurrent.futures import ProcessPoolExecutor
+from dataclasses import dataclass
+from pathlib import Path
+from typing import Final
+
+import numpy as np
+import numpy.typing as npt
+
+from find_route import parse_road_system
+
+
+__all__ = ["distance_matrix", "route_from_predecessors"]
+__author__ = "Gavin Meyer"
+
+INFINITY: Final[float] = float("inf")
+DEFAULT_CHUNK_SIZE: Final[int] = 16
+
+# The graph as adjacency lists of city indices
+_Adjacency = list[list[tuple[int, float]]]
+_Rows = npt.NDArray[np.float64]
+_ParentRows = npt.NDArray[np.int32]
+
+
+@dataclass(frozen=True)
+class _Job:
+    """The graph, the sources, the targets, and the output files shared by every task"""
+
+    adjacency: _Adjacency
+    sources: list[int]
+    targets: list[int]
+    outputs: tuple[Path | None, Path | None]
+    predecessors: bool
+
+
+# The job of a worker process, set once by the pool initializer instead of pickled with every task
+_worker_job: _Job | None = None
+
+
+def _index_graph(graph: dict[str, dict[str, float]]) -> tuple[list[str], _Adjacency]:
+    """Number the cities and turn the graph into adjacency lists of city indices"""
+    cities = sorted(graph)
+    index = {city: position for position, city in enumerate(cities)}
+    adjacency = [
+        [(index[neighbor], distance) for neighbor, distance in graph[city].items()]
+        for city in cities
+    ]
+    return cities, adjacency
+
+
+def _search(
+    adjacency: _Adjacency, source: int, targets: list[int], predecessors: bool
+) -> tuple[list[float], list[int] | None]:
+    """Uniform-cost search from one source until every target is settled
+
+    Returns:
+        tuple: The distance to every city, which is only final for settled cities (including every
+        target), and, if requested, the index of the predecessor of every city on a route to a
+        target (-1 for every other city)
+    """
+    distances = [INFINITY] * len(adjacency)
+    parents = [-1] * len(adjacency) if predecessors else None
+    remaining = set(targets)
+    remaining.discard(-1)
+    if source < 0:
+        return distances, parents
+
+    distances[source] = 0
+    frontier = [(0.0, source)]
+    settled = bytearray(len(adjacency))
+    while frontier and remaining:
+        cost, city = heapq.heappop(frontier)
+        if settled[city]:
+            continue
+        settled[city] = 1
+        remaining.discard(city)
+        for neighbor, distance in adjacency[city]:
+            new_cost = cost + distance
+            if new_cost < distances[neighbor]:
+                distances[neighbor] = new_cost
+                if parents is not None:
+                    parents[neighbor] = city
+                heapq.heappush(frontier, (new_cost, neighbor))
+    if parents is not None:
+        parents = _route_tree(parents, targets)
+    return distances, parents
+
+
+def _route_tree(parents: list[int], targets: list[int]) -> list[int]:
+    """Keep only the predecessors on the routes to the targets, which are all settled and final"""
+    tree = [-1] * len(parents)
+    for target in targets:
+        city = target
+        while city >= 0 and tree[city] < 0 and (previous := parents[city]) >= 0:
+            tree[city] = previous
+            city = previous
+    return tree
+
+
+def _init_worker(job: _Job) -> None:
+    """Share the job with a worker process"""
+    global _worker_job  # noqa: PLW0603
+    _worker_job = job
+
+
+def _worker_rows(start: int, stop: int) -> tuple[_Rows, _ParentRows | None]:
+    """Compute the rows of the sources in [start, stop) in a worker process"""
+    if _worker_job is None:
+        msg = "The worker process was started without a job"
+        raise RuntimeError(msg)
+    return _rows(_worker_job, start, stop)
+
+
+def _write_rows(output: Path, start: int, rows: _Rows | _ParentRows) -> None:
+    """Write a block of rows into a memory-mapped .npy file"""
+    matrix = np.load(output, mmap_mode="r+")
+    matrix[start : start + len(rows)] = rows  # noqa: E203, RUF100
+    matrix.flush()
+
+
+def _rows(job: _Job, start: int, stop: int) -> tuple[_Rows, _ParentRows | None]:
+    """Compute the rows of the sources in [start, stop)
+
+    Rows that have an output file are written to it, and an empty array is returned instead
+    """
+    target_columns = np.array([max(target, 0) for target in job.targets], dtype=np.intp)
+    missing = np.array([target < 0 for target in job.targets], dtype=bool)
+    rows = np.empty((stop - start, len(job.targets)))
+    parent_rows = (
+        np.empty((stop - start, len(job.adjacency)), dtype=np.int32) if job.predecessors else None
+    )
+    for row, source in enumerate(job.sources[start:stop]):
+        distances, parents = _search(job.adjacency, source, job.targets, job.predecessors)
+        rows[row] = np.asarray(distances)[target_columns]
+        rows[row, missing] = INFINITY
+        if parent_rows is not None and parents is not None:
+            parent_rows[row] = parents
+
+    output, predecessor_output = job.outputs
+    if output is not None:
+        _write_rows(output, start, rows)
+        rows = rows[:0]
+    if predecessor_output is not None and parent_rows is not None:
+        _write_rows(predecessor_output, start, parent_rows)
+        parent_rows = parent_rows[:0]
+    return rows, parent_rows
+
+
+def distance_matrix(  # noqa: PLR0913, PLR0917
+    graph: dict[str, dict[str, float]],
+    sources: list[str],
+    targets: list[str],
+    workers: int = 1,
+    output: Path | None = None,
+    predecessor_output: Path | None = None,
+    predecessors: bool = False,
+    chunk_size: int = DEFAULT_CHUNK_SIZE,
+) -> tuple[_Rows, _ParentRows | None, list[str]]:
+    """Computes the shortest distance from every source to every target.
+
+    Args:
+        graph: A dictionary representing the road connections.
+        sources: The origin cities, one row each.
+        targets: The destination cities, one column each.
+        workers: The number of worker processes.
+        output: A .npy file to write the distances to as they are computed, or None.
+        predecessor_output: A .npy file to write the predecessors to, or None.
+        predecessors: Whether to compute the predecessors, implied by predecessor_output.
+        chunk_size: The number of sources per task given to a worker.
+
+    Returns:
+        tuple: The S x T distance matrix (infinity where there is no route, memory-mapped if output
+        is given), the S x N predecessor matrix of city indices or None, and the N cities the
+        predecessor indices refer to. A row of the predecessor matrix only holds the cities on the
+        routes from its source to the targets, and -1 for every other city.
+    """
+    cities, adjacency = _index_graph(graph)
+    index = {city: position for position, city in enumerate(cities)}
+    source_indices = [index.get(city, -1) for city in sources]
+    target_indices = [index.get(city, -1) for city in targets]
+    predecessors = predecessors or predecessor_output is not None
+
+    # Create the output files up front, so the workers only have to fill in their rows
+    if output is not None:
+        shape = (len(sources), len(targets))
+        np.lib.format.open_memmap(  # type: ignore[no-untyped-call]
+            output, "w+", np.float64, shape
+        ).flush()
+    if predecessor_output is not None:
+        shape = (len(sources), len(cities))
+        np.lib.format.open_memmap(  # type: ignore[no-untyped-call]
+            predecessor_output, "w+", np.int32, shape
+        ).flush()
+
+    job = _Job(
+        adjacency, source_indices, target_indices, (output, predecessor_output), predecessors
+    )
+    starts = range(0, len(sources), max(chunk_size, 1))
+    stops = [min(start + max(chunk_size, 1), len(sources)) for start in starts]
+    if workers > 1 and len(starts) > 1:
+        with ProcessPoolExecutor(workers, initializer=_init_worker, initargs=(job,)) as executor:
+            results = list(executor.map(_worker_rows, starts, stops))
+    else:
+        results = [_rows(job, start, stop) for start, stop in zip(starts, stops, strict=True)]
+
+    if output is not None:
+        distances = np.load(output, mmap_mode="r")
+    else:
+        distances = np.vstack([np.empty((0, len(targets))), *(rows for rows, _ in results)])
+
+    parents = None
+    if predecessor_output is not None:
+        parents = np.load(predecessor_output, mmap_mode="r")
+    elif predecessors:
+        parent_rows = [rows for _, rows in results if rows is not None]
+        parents = np.vstack([np.empty((0, len(cities)), np.int32), *parent_rows])
+    return distances, parents, cities
+
+
+def route_from_predecessors(
+    graph: dict[str, dict[str, float]],
+    cities: list[str],
+    parents: _ParentRows,
+    origin: str,
+    destination: str,
+) -> list[tuple[str, str, float]] | None:
+    """Rebuilds the route to a target from one row of the predecessor matrix.
+
+    Args:
+        graph: A dictionary representing the road connections.
+        cities: The cities the predecessor indices refer to.
+        parents: The predecessor row of the origin.
+        origin: The origin city of the row.
+        destination: The destination city, one of the targets of the matrix.
+
+    Returns:
+        list: The roads of the route in order (none if the destination is the origin), or None if
+        there is no route.
+    """
+    index = {city: position for position, city in enumerate(cities)}
+    if origin not in index or destination not in index:
+        return None
+    if origin == destination:
+        return []
+
+    path: list[tuple[str, str, float]] = []
+    city = index[destination]
+    while (previous := int(parents[city])) >= 0:
+        path.append((cities[previous], cities[city], graph[cities[previous]][cities[city]]))
+        city = previous
+    # Cities that are unreachable or off the routes to the targets have no predecessor
+    if city != index[origin]:
+        return None
+    path.reverse()
+    return path
+
+
+def _read_cities(value: str) -> list[str]:
+    """Read a comma-separated list of cities, or one city per line from a file prefixed by @"""
+    if value.startswith("@"):
+        with Path.open(Path(value[1:]), encoding="locale") as file:
+            return [line.strip() for line in file if line.strip()]
+    return [city for city in value.split(",") if city]
+
+
+def _parse_options() -> argparse.Namespace:
+    """Parse the command line options"""
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("input_file", type=Path, help="The file containing the road system")
+    parser.add_argument(
+        "--sources",
+        type=_read_cities,
+        required=True,
+        help="Comma-separated origin cities, or @file with one city per line",
+    )
+    parser.add_argument(
+        "--targets",
+        type=_read_cities,
+        help="Comma-separated destination cities, or @file with one city per line"
+        " (defaults to the sources)",
+    )
+    parser.add_argument("--workers", type=int, default=1, help="The number of worker processes")
+    parser.add_argument("--output", type=Path, help="Write the distances to this .npy file")
+    parser.add_argument(
+        "--predecessors", type=Path, help="Write the S x N predecessor matrix to this .npy file"
+    )
+    return parser.parse_args()
+
+
+def main() -> None:
+    """Main function to compute a distance matrix and print it or write it to a .npy file."""
+    args = _parse_options()
+    graph = parse_road_system(args.input_file)
+    targets = args.targets or args.sources
+
+    distances, _, _ = distance_matrix(
+        graph,
+        args.sources,
+        targets,
+        workers=args.workers,
+        output=args.output,
+        predecessor_output=args.predecessors,
+    )
+    if args.output is not None:
+        sys.stdout.write(
+            f"Wrote {distances.shape[0]} x {distances.shape[1]} distances to {args.output}\n"
+        )
+        return
+
+    width = max(len(city) for city in [*args.sources, *targets, "Infinity"]) + 2
+    sys.stdout.write(" " * width + "".join(f"{city:>{width}}" for city in targets) + "\n")
+    for city, row in zip(args.sources, distances.tolist(), strict=True):
+        cells = "".join(
+            f"{value:>{width}.1f}" if value < INFINITY else f"{'Infinity':>{width}}"
+            for value in row
+        )
+        sys.stdout.write(f"{city:<{width}}{cells}\n")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,262 @@
+"""Module to keep a route up to date while roads are opened, closed, or change length.
+
+The route is maintained with Lifelong Planning A* (LPA*): after a road changes, only the cities
+whose distance from the origin is affected are expanded again instead of searching from scratch.
+
+Classes:
+    - DynamicRouter
+
+Functions:
+    - parse_road_events
+"""
+
+import heapq
+import math
+import sys
+
+from pathlib import Path
+from typing import Final
+
+from find_route import parse_heuristic, parse_road_system, write_result
+
+
+__all__ = ["DynamicRouter", "parse_road_events"]
+__author__ = "Gavin Meyer"
+
+INFINITY: Final[float] = float("inf")
+
+
+class DynamicRouter:
+    """Incrementally repairs the shortest route between two cities as the road system changes.
+
+    Every city keeps g, its distance from the origin as of its last expansion, and rhs, a one-step
+    lookahead computed from its neighbours' g values. A city whose g and rhs disagree is
+    inconsistent and waits in the priority queue; a road change only makes its two endpoints
+    inconsistent, so a repair expands the cities downstream of the change and nothing else.
+
+    The heuristic must be consistent (h(a) <= distance(a, b) + h(b) for every road) for the route
+    to be optimal. Cities missing from the heuristic get infinity, as in informed_search.
+
+    Attributes:
+        graph (dict): The current road connections, updated in place by the road events.
+        origin (str): The starting city.
+        destination (str): The destination city.
+        heuristic (dict | None): The heuristic values towards the destination for each city, or
+            None for uniform cost.
+    """
+
+    def __init__(
+        self,
+        graph: dict[str, dict[str, float]],
+        origin: str,
+        destination: str,
+        heuristic: dict[str, float] | None = None,
+    ) -> None:
+        """Initialize the router with the origin as the only inconsistent city.
+
+        Args:
+            graph: A dictionary representing the road connections.
+            origin: The starting city.
+            destination: The destination city.
+            heuristic: A dictionary of heuristic values for each city, or None for uniform cost.
+        """
+        self.graph = graph
+        self.origin = origin
+        self.destination = destination
+        self.heuristic = heuristic
+        self._g: dict[str, float] = {}
+        self._rhs: dict[str, float] = {origin: 0}
+        # Priority Queue of (key, city) with lazy deletion: an entry is only current while it
+        # matches the key recorded in _queued
+        self._frontier: list[tuple[tuple[float, float], str]] = []
+        self._queued: dict[str, tuple[float, float]] = {}
+        self._stale_pops: int = 0
+        self._push(origin)
+
+    def _key(self, city: str) -> tuple[float, float]:
+        """The priority of a city: its estimated total cost, then its distance from the origin."""
+        cost = min(self._g.get(city, INFINITY), self._rhs.get(city, INFINITY))
+        if self.heuristic is None:
+            return cost, cost
+        return cost + self.heuristic.get(city, INFINITY), cost
+
+    def _push(self, city: str) -> None:
+        """Queue a city under its current key, superseding any older entry."""
+        key = self._key(city)
+        self._queued[city] = key
+        heapq.heappush(self._frontier, (key, city))
+
+    def _top_key(self) -> tuple[float, float]:
+        """The smallest key in the queue, discarding superseded entries on the way."""
+        while self._frontier:
+            key, city = self._frontier[0]
+            if self._queued.get(city) == key:
+                return key
+            heapq.heappop(self._frontier)
+            self._stale_pops += 1
+        return INFINITY, INFINITY
+
+    def _update_city(self, city: str) -> None:
+        """Recompute the rhs of a city and (re)queue it if it became inconsistent.
+
+        Args:
+            city: The city to update.
+        """
+        neighbors = self.graph.get(city, {})
+        if city != self.origin:
+            self._rhs[city] = min(
+                (
+                    self._g.get(neighbor, INFINITY) + distance
+                    for neighbor, distance in neighbors.items()
+                ),
+                default=INFINITY,
+            )
+        self._queued.pop(city, None)
+        if self._g.get(city, INFINITY) != self._rhs.get(city, INFINITY):
+            self._push(city)
+
+    def compute_route(self) -> tuple[int, int, int, float, list[tuple[str, str, float]] | None]:
+        """Expands inconsistent cities until the route to the destination is up to date.
+
+        Returns:
+            tuple: The number of nodes popped, expanded, generated, distance, and path.
+        """
+        nodes_expanded: int = 0
+        nodes_generated: int = 0
+        self._stale_pops = 0
+
+        while self._top_key() < self._key(self.destination) or self._g.get(
+            self.destination, INFINITY
+        ) != self._rhs.get(self.destination, INFINITY):
+            _, current_city = heapq.heappop(self._frontier)
+            del self._queued[current_city]
+            nodes_expanded += 1
+
+            g, rhs = self._g.get(current_city, INFINITY), self._rhs.get(current_city, INFINITY)
+            if g > rhs:
+                # Overconsistent: the city got closer, so settle it and relax its neighbours
+                self._g[current_city] = rhs
+            else:
+                # Underconsistent: the city got further away, so reopen it with its neighbours
+                self._g[current_city] = INFINITY
+                self._update_city(current_city)
+            for neighbor in self.graph.get(current_city, {}):
+                nodes_generated += 1
+                self._update_city(neighbor)
+
+        # Superseded entries are popped without being expanded
+        nodes_popped = nodes_expanded + self._stale_pops
+        distance = self._g.get(self.destination, INFINITY)
+        if math.isinf(distance):
+            return nodes_popped, nodes_expanded, nodes_generated, INFINITY, None
+        return nodes_popped, nodes_expanded, nodes_generated, distance, self._route()
+
+    def _route(self) -> list[tuple[str, str, float]]:
+        """Follows the best predecessors back from the destination to the origin."""
+        path: list[tuple[str, str, float]] = []
+        city = self.destination
+        while city != self.origin:
+            previous, distance = min(
+                self.graph[city].items(),
+                key=lambda road: self._g.get(road[0], INFINITY) + road[1],
+            )
+            path.append((previous, city, distance))
+            city = previous
+        path.reverse()
+        return path
+
+    def update_road(self, city1: str, city2: str, distance: float) -> None:
+        """Opens a new road or changes the distance of an existing one.
+
+        A distance of infinity closes the road. Call compute_route afterwards to repair the route.
+
+        Args:
+            city1: One end of the road.
+            city2: The other end of the road.
+            distance: The new distance of the road.
+        """
+        if math.isinf(distance):
+            self.remove_road(city1, city2)
+            return
+
+        # Assuming bi-directional roads
+        self.graph.setdefault(city1, {})[city2] = distance
+        self.graph.setdefault(city2, {})[city1] = distance
+        self._update_city(city1)
+        self._update_city(city2)
+
+    def remove_road(self, city1: str, city2: str) -> None:
+        """Closes a road. Call compute_route afterwards to repair the route.
+
+        Args:
+            city1: One end of the road.
+            city2: The other end of the road.
+        """
+        self.graph.get(city1, {}).pop(city2, None)
+        self.graph.get(city2, {}).pop(city1, None)
+        self._update_city(city1)
+        self._update_city(city2)
+
+
+def parse_road_events(filename: Path) -> list[tuple[str, str, float]]:
+    """Parses the road changes from the given file.
+
+    Every line has the same format as the road system data, with a distance of 'inf' for a closed
+    road.
+
+    Args:
+        filename: The file containing the road changes.
+
+    Returns:
+        list: A list of (city1, city2, distance) road changes in order.
+    """
+    events = []
+    with Path.open(filename, encoding="locale") as file:
+        for line in file:
+            if line.strip() == "END OF INPUT":
+                break
+            parts = line.split()
+            if parts:
+                events.append((parts[0], parts[1], float(parts[2])))
+
+    return events
+
+
+def main(argv: list[str] | None = None) -> None:
+    """Main function to find a route and repair it after every road change.
+
+    Prints the initial route, then the repaired route after each event of the events file.
+
+    Args:
+        argv: The command line arguments without the program name, or None for sys.argv.
+    """
+    max_args: Final[int] = 5
+    args = sys.argv[1:] if argv is None else argv
+
+    # Check for valid number of arguments
+    if len(args) not in {4, 5}:
+        sys.stdout.write("Invalid number of arguments.\n")
+        return
+
+    # Parse command line arguments
+    input_filename, origin_city, destination_city, events_filename = args[:4]
+    heuristic_filename = args[4] if len(args) == max_args else None
+
+    graph = parse_road_system(Path(input_filename))
+    heuristic = parse_heuristic(Path(heuristic_filename)) if heuristic_filename else None
+    router = DynamicRouter(graph, origin_city, destination_city, heuristic)
+
+    sys.stdout.write("Initial Route\n")
+    write_result(router.compute_route())
+
+    for city1, city2, distance in parse_road_events(Path(events_filename)):
+        if math.isinf(distance):
+            sys.stdout.write(f"\nClosed {city1} to {city2}\n")
+        else:
+            sys.stdout.write(f"\nUpdated {city1} to {city2}, {distance:.1f} km\n")
+        router.update_road(city1, city2, distance)
+        write_result(router.compute_route())
+
+
+if __name__ == "__main__":
+    main()
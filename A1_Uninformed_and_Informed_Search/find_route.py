@@ -5,6 +5,7 @@
     - parse_heuristic
     - uninformed_search
     - informed_search
+    - write_result
 """
 
 import sys
@@ -14,7 +15,13 @@
 from typing import Final
 
 
-__all__ = ["informed_search", "parse_heuristic", "parse_road_system", "uninformed_search"]
+__all__ = [
+    "informed_search",
+    "parse_heuristic",
+    "parse_road_system",
+    "uninformed_search",
+    "write_result",
+]
 __author__ = "Gavin Meyer"
 
 
@@ -120,25 +127,41 @@ def uninformed_search(
 
 
 def informed_search(
-    graph: dict[str, dict[str, float]], origin: str, destination: str, heuristic: dict[str, float]
+    graph: dict[str, dict[str, float]],
+    origin: str,
+    destination: str,
+    heuristic: dict[str, float],
+    weight: float = 1.0,
 ) -> tuple[int, int, int, float, list[tuple[str, str, float]] | None]:
     """Performs A* Search in the graph from origin to destination using the provided heuristic.
 
+    With a weight above 1 this is Weighted A*: the heuristic is inflated by the weight, which
+    expands fewer nodes, and the distance found is at most weight times the optimal distance as
+    long as the heuristic is admissible.
+
     Args:
         graph: A dictionary representing the road connections.
         origin: The starting city.
         destination: The destination city.
         heuristic: A dictionary of heuristic values for each city.
+        weight: The factor applied to the heuristic, 1 for optimal A*.
 
     Returns:
         tuple: Tuple containing the number of nodes popped, expanded, generated, distance, and path.
+
+    Raises:
+        ValueError: If the weight is less than 1.
     """
+    if not weight >= 1:
+        msg = f"The heuristic weight must be at least 1, not {weight}"
+        raise ValueError(msg)
+
     sys.stdout.write("Informed Search\n")
     # Priority Queue to hold (estimated total cost, current cost, current city, path)
     frontier: PriorityQueue[tuple[float, float, str, list[tuple[str, str, float]]]] = (
         PriorityQueue()
     )
-    frontier.put((heuristic.get(origin, float("inf")), 0, origin, []))
+    frontier.put((weight * heuristic.get(origin, float("inf")), 0, origin, []))
 
     # Set to keep track of explored cities
     explored = set()
@@ -166,7 +189,7 @@ def informed_search(
                 nodes_generated += 1
                 if neighbor not in explored:
                     new_cost = current_cost + distance
-                    estimated_total = new_cost + heuristic.get(neighbor, float("inf"))
+                    estimated_total = new_cost + weight * heuristic.get(neighbor, float("inf"))
                     new_path = [*path, (current_city, neighbor, distance)]
                     frontier.put((estimated_total, new_cost, neighbor, new_path))
 
@@ -174,50 +197,60 @@ def informed_search(
     return nodes_popped, nodes_expanded, nodes_generated, float("inf"), None
 
 
-def main() -> None:
+def write_result(result: tuple[int, int, int, float, list[tuple[str, str, float]] | None]) -> None:
+    """Prints the search statistics and the route in the output format of the assignment.
+
+    Args:
+        result: The number of nodes popped, expanded, generated, distance, and path.
+    """
+    nodes_popped, nodes_expanded, nodes_generated, distance, path = result
+    sys.stdout.write("Nodes Popped: " + str(nodes_popped) + "\n")
+    sys.stdout.write("Nodes Expanded: " + str(nodes_expanded) + "\n")
+    sys.stdout.write("Nodes Generated: " + str(nodes_generated) + "\n")
+
+    if path is not None:
+        sys.stdout.write(f"Distance: {distance:.1f} km\n")
+        sys.stdout.write("Route: \n")
+        for city1, city2, dist in path:
+            sys.stdout.write(f"{city1} to {city2}, {dist:.1f} km\n")
+    else:
+        sys.stdout.write("Distance: Infinity\n")
+        sys.stdout.write("Route:\nNone\n")
+
+
+def main(argv: list[str] | None = None) -> None:
     """Main function to find the route based on command line arguments.
 
     Performs either uninformed or informed search and prints the output.
+
+    Args:
+        argv: The command line arguments without the program name, or None for sys.argv.
     """
-    max_args: Final[int] = 5
+    max_args: Final[int] = 4
+    args = sys.argv[1:] if argv is None else argv
 
     # Check for valid number of arguments
-    if len(sys.argv) not in {4, 5}:
+    if len(args) not in {3, 4}:
         sys.stdout.write("Invalid number of arguments.\n")
         return
 
     # Parse command line arguments
-    input_filename = sys.argv[1]
-    origin_city = sys.argv[2]
-    destination_city = sys.argv[3]
-    heuristic_filename = sys.argv[4] if len(sys.argv) == max_args else None
+    input_filename = args[0]
+    origin_city = args[1]
+    destination_city = args[2]
+    heuristic_filename = args[3] if len(args) == max_args else None
 
     graph = parse_road_system(Path(input_filename))
 
     # Execute the appropriate search and capture output
     if heuristic_filename:
         heuristic = parse_heuristic(Path(heuristic_filename))
-        nodes_popped, nodes_expanded, nodes_generated, distance, path = informed_search(
-            graph, origin_city, destination_city, heuristic
-        )
+        result = informed_search(graph, origin_city, destination_city, heuristic)
     else:
-        nodes_popped, nodes_expanded, nodes_generated, distance, path = uninformed_search(
-            graph, origin_city, destination_city
-        )
+        result = uninformed_search(graph, origin_city, destination_city)
 
     # Print the output
-    sys.stdout.write("Nodes Popped: " + str(nodes_popped) + "\n")
-    sys.stdout.write("Nodes Expanded: " + str(nodes_expanded) + "\n")
-    sys.stdout.write("Nodes Generated: " + str(nodes_generated) + "\n")
-
-    if path is not None:
-        sys.stdout.write(f"Distance: {distance:.1f} km\n")
-        sys.stdout.write("Route: \n")
-        for city1, city2, dist in path:
-            sys.stdout.write(f"{city1} to {city2}, {dist:.1f} km\n")
-    else:
-        sys.stdout.write("Distance: Infinity\n")
-        sys.stdout.write("Route:\nNone\n")
+    write_result(result)
 
 
 if __name__ == "__main__":
@@ -0,0 +1,217 @@
+"""Module to find the k shortest loopless routes between two cities with Yen's algorithm.
+
+A single uniform-cost search from the destination gives the exact distance from every city to the
+destination. Every spur search of Yen's algorithm is then an A* search guided by those distances,
+which are still admissible and consistent once roads and cities are removed, so a spur search
+mostly walks straight along the shortest-path tree instead of searching from scratch.
+
+Functions:
+    - k_shortest_routes
+"""
+
+import argparse
+import heapq
+import itertools
+import math
+import sys
+
+from pathlib import Path
+from typing import Final
+
+from find_route import parse_road_system, write_result
+
+
+__all__ = ["k_shortest_routes"]
+__author__ = "Gavin Meyer"
+
+INFINITY: Final[float] = float("inf")
+
+_Result = tuple[int, int, int, float, list[tuple[str, str, float]] | None]
+
+
+def _distances_to(
+    graph: dict[str, dict[str, float]], destination: str, counts: list[int]
+) -> tuple[dict[str, float], dict[str, str]]:
+    """Uniform-cost search from the destination, giving the distance from every city to it
+
+    Returns:
+        tuple: The distance from every city that can reach the destination, and the next city on
+        the shortest route from every such city other than the destination
+    """
+    distances: dict[str, float] = {}
+    next_cities: dict[str, str] = {}
+    frontier = [(0.0, destination, destination)]
+    while frontier:
+        counts[0] += 1
+        cost, city, next_city = heapq.heappop(frontier)
+        if city in distances:
+            continue
+        distances[city] = cost
+        if city != destination:
+            next_cities[city] = next_city
+        counts[1] += 1
+        for neighbor, distance in graph.get(city, {}).items():
+            counts[2] += 1
+            if neighbor not in distances:
+                heapq.heappush(frontier, (cost + distance, neighbor, city))
+    return distances, next_cities
+
+
+def _tree_route(next_cities: dict[str, str], origin: str, destination: str) -> tuple[str, ...]:
+    """The cities of the shortest route from the origin along the shortest-path tree"""
+    route = [origin]
+    while route[-1] != destination:
+        route.append(next_cities[route[-1]])
+    return tuple(route)
+
+
+def _spur_search(  # noqa: PLR0913, PLR0917
+    graph: dict[str, dict[str, float]],
+    spur: str,
+    destination: str,
+    to_destination: dict[str, float],
+    removed_cities: set[str],
+    removed_roads: set[tuple[str, str]],
+    counts: list[int],
+) -> tuple[float, list[str]] | None:
+    """A* search from the spur city that avoids the removed cities and roads
+
+    Returns:
+        tuple: The distance and the cities of the spur route, or None if there is none
+    """
+    best = {spur: 0.0}
+    parents: dict[str, str] = {}
+    frontier = [(to_destination[spur], 0.0, spur)]
+    while frontier:
+        counts[0] += 1
+        _, cost, city = heapq.heappop(frontier)
+        if cost > best[city]:
+            continue
+        if city == destination:
+            cities = [city]
+            while city in parents:
+                city = parents[city]
+                cities.append(city)
+            cities.reverse()
+            return cost, cities
+
+        counts[1] += 1
+        for neighbor, distance in graph[city].items():
+            counts[2] += 1
+            if neighbor in removed_cities or (city, neighbor) in removed_roads:
+                continue
+            new_cost = cost + distance
+            # Cities that cannot reach the destination have no distance to it
+            if new_cost < best.get(neighbor, INFINITY) and neighbor in to_destination:
+                best[neighbor] = new_cost
+                parents[neighbor] = city
+                heapq.heappush(frontier, (new_cost + to_destination[neighbor], new_cost, neighbor))
+    return None
+
+
+def _result(
+    counts: list[int], graph: dict[str, dict[str, float]], route: tuple[float, tuple[str, ...]]
+) -> _Result:
+    """The result tuple of a route given as its distance and its sequence of cities"""
+    distance, cities = route
+    path = [(city1, city2, graph[city1][city2]) for city1, city2 in itertools.pairwise(cities)]
+    return counts[0], counts[1], counts[2], distance, path
+
+
+def k_shortest_routes(
+    graph: dict[str, dict[str, float]], origin: str, destination: str, k: int
+) -> list[_Result]:
+    """Finds the k shortest loopless routes from origin to destination with Yen's algorithm.
+
+    Every route after the first deviates from one of the routes before it at a spur city: the route
+    up to the spur city is kept, the roads the earlier routes take out of it are removed, and a spur
+    search finds the rest of the route. The candidates are kept in a heap and the shortest one
+    becomes the next route.
+
+    Args:
+        graph: A dictionary representing the road connections.
+        origin: The starting city.
+        destination: The destination city.
+        k: The maximum number of routes to find.
+
+    Returns:
+        list: Up to k tuples, shortest route first, each containing the number of nodes popped,
+        expanded, and generated to find that route, its distance, and its path. If there is no
+        route at all, a single tuple with an infinite distance and no path.
+
+    Raises:
+        ValueError: If k is less than 1.
+    """
+    if k < 1:
+        msg = f"The number of routes must be at least 1, not {k}"
+        raise ValueError(msg)
+
+    counts = [0, 0, 0]
+    to_destination, next_cities = _distances_to(graph, destination, counts)
+    if origin not in to_destination:
+        return [(counts[0], counts[1], counts[2], INFINITY, None)]
+
+    # The first route follows the shortest-path tree of the destination
+    routes = [(to_destination[origin], _tree_route(next_cities, origin, destination))]
+    results = [_result(counts, graph, routes[0])]
+
+    candidates: list[tuple[float, tuple[str, ...]]] = []
+    seen = {routes[0][1]}
+    while len(routes) < k:
+        counts = [0, 0, 0]
+        _, last = routes[-1]
+        root_cost = 0.0
+        for position, spur in enumerate(last[:-1]):
+            root = last[: position + 1]
+            removed_roads = {
+                (cities[position], cities[position + 1])
+                for _, cities in routes
+                if cities[: position + 1] == root
+            }
+            removed_roads |= {(city2, city1) for city1, city2 in removed_roads}
+            spur_route = _spur_search(
+                graph, spur, destination, to_destination, set(root[:-1]), removed_roads, counts
+            )
+            if spur_route is not None:
+                candidate = root[:-1] + tuple(spur_route[1])
+                if candidate not in seen:
+                    seen.add(candidate)
+                    heapq.heappush(candidates, (root_cost + spur_route[0], candidate))
+            root_cost += graph[spur][last[position + 1]]
+
+        if not candidates:
+            break
+        routes.append(heapq.heappop(candidates))
+        results.append(_result(counts, graph, routes[-1]))
+
+    return results
+
+
+def _parse_options() -> argparse.Namespace:
+    """Parse the command line options"""
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("input_file", type=Path, help="The file containing the road system")
+    parser.add_argument("origin", help="The starting city")
+    parser.add_argument("destination", help="The destination city")
+    parser.add_argument("-k", type=int, default=3, help="The number of routes to find")
+    args = parser.parse_args()
+    if args.k < 1:
+        parser.error("-k must be at least 1")
+    return args
+
+
+def main() -> None:
+    """Main function to print the k shortest routes in the output format of find_route."""
+    args = _parse_options()
+    graph = parse_road_system(args.input_file)
+
+    sys.stdout.write("K Shortest Routes\n")
+    results = k_shortest_routes(graph, args.origin, args.destination, args.k)
+    for number, result in enumerate(results, 1):
+        if not math.isinf(result[3]):
+            sys.stdout.write(f"\nRoute {number} of {len(results)}\n")
+        write_result(result)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,483 @@
+"""Module to find the route between two cities with memory-bounded variants of A* Search.
+
+Both searches take the same graph and heuristic as informed_search and return the same result
+tuple, but keep a fixed amount of search state instead of an unbounded frontier and explored set.
+
+Functions:
+    - ida_star_search
+    - sma_star_search
+"""
+
+import argparse
+import heapq
+import itertools
+import math
+import sys
+
+from collections.abc import Iterator
+from pathlib import Path
+from typing import Final
+
+from find_route import parse_heuristic, parse_road_system, write_result
+
+
+__all__ = ["ida_star_search", "sma_star_search"]
+__author__ = "Gavin Meyer"
+
+INFINITY: Final[float] = float("inf")
+DEFAULT_CACHE_SIZE: Final[int] = 1 << 20
+DEFAULT_MAX_NODES: Final[int] = 1 << 16
+
+
+class _IterativeDeepening:
+    """The depth-first iterations of an IDA* search and their node counts"""
+
+    def __init__(
+        self,
+        graph: dict[str, dict[str, float]],
+        destination: str,
+        heuristic: dict[str, float],
+        cache_size: int,
+    ) -> None:
+        self.graph = graph
+        self.destination = destination
+        self.heuristic = heuristic
+        self.cache_size = cache_size
+        self.nodes_popped: int = 1
+        self.nodes_expanded: int = 0
+        self.nodes_generated: int = 0
+
+    def successors(self, city: str) -> Iterator[tuple[str, float]]:
+        """The roads out of a city, most promising first.
+
+        Trying the most promising neighbors first finds cheap paths to a city before expensive
+        ones, so the cache prunes more.
+        """
+        heuristic = self.heuristic
+        roads = self.graph[city].items()
+        return iter(sorted(roads, key=lambda road: road[1] + heuristic.get(road[0], INFINITY)))
+
+    def iteration(
+        self, origin: str, threshold: float
+    ) -> tuple[float, list[tuple[str, str, float]] | None, float]:
+        """Search depth-first for the best route whose f(n) stays within the threshold.
+
+        Returns:
+            tuple: The distance and path of the best route found, or infinity and None, and the
+            smallest f(n) above the threshold
+        """
+        cache: dict[str, float] = {origin: 0}
+        next_threshold = INFINITY
+        best_cost, best_path = INFINITY, None
+
+        # The current path, as a stack of cities, their g(n), and their remaining neighbors
+        cities, costs = [origin], [0.0]
+        neighbors = [self.successors(origin)]
+        path: list[tuple[str, str, float]] = []
+        on_path = {origin}
+        self.nodes_expanded += 1
+
+        while neighbors:
+            next_neighbor = next(neighbors[-1], None)
+            if next_neighbor is None:
+                # Backtrack once every neighbor has been tried
+                neighbors.pop()
+                costs.pop()
+                on_path.discard(cities.pop())
+                if path:
+                    path.pop()
+                continue
+
+            self.nodes_generated += 1
+            neighbor, distance = next_neighbor
+            if neighbor in on_path:
+                continue
+            new_cost = costs[-1] + distance
+            estimated_total = new_cost + self.heuristic.get(neighbor, INFINITY)
+            if estimated_total >= best_cost:
+                continue
+            if estimated_total > threshold:
+                next_threshold = min(next_threshold, estimated_total)
+                continue
+            if cache.get(neighbor, INFINITY) <= new_cost:
+                continue
+            if neighbor in cache or len(cache) < self.cache_size:
+                cache[neighbor] = new_cost
+
+            self.nodes_popped += 1
+            if neighbor == self.destination:
+                best_cost, best_path = new_cost, [*path, (cities[-1], neighbor, distance)]
+                continue
+
+            self.nodes_expanded += 1
+            path.append((cities[-1], neighbor, distance))
+            cities.append(neighbor)
+            costs.append(new_cost)
+            on_path.add(neighbor)
+            neighbors.append(self.successors(neighbor))
+
+        return best_cost, best_path, next_threshold
+
+
+def ida_star_search(  # noqa: PLR0913, PLR0917
+    graph: dict[str, dict[str, float]],
+    origin: str,
+    destination: str,
+    heuristic: dict[str, float],
+    cache_size: int = DEFAULT_CACHE_SIZE,
+    growth: float = 0.05,
+) -> tuple[int, int, int, float, list[tuple[str, str, float]] | None]:
+    """Performs Iterative Deepening A* (IDA*) in the graph from origin to destination.
+
+    Every iteration is a depth-first search that cuts off paths whose f(n) exceeds a threshold,
+    which starts at h(origin) and grows to the smallest f(n) that was cut off. Only the current path
+    is stored, plus a transposition cache of the cheapest g(n) each city was reached with during
+    the iteration: a city reached again at no lower cost is skipped. The cache holds at most
+    cache_size cities, so the memory used is bounded by the cache and the depth of the route.
+
+    With many distinct distances each iteration only admits a few new cities, so growth lets the
+    threshold grow by at least that fraction. Once a route is found the iteration carries on as a
+    branch and bound with the route distance as the cut off, so the route is still optimal.
+    When no route exists, every path under ever larger thresholds has to be tried before giving
+    up, which can take exponential time on a large component; sma_star_search gives up sooner.
+
+    Args:
+        graph: A dictionary representing the road connections.
+        origin: The starting city.
+        destination: The destination city.
+        heuristic: A dictionary of heuristic values for each city.
+        cache_size: The maximum number of cities in the transposition cache.
+        growth: The minimum relative growth of the threshold between iterations.
+
+    Returns:
+        tuple: Tuple containing the number of nodes popped, expanded, generated, distance, and path.
+    """
+    sys.stdout.write("IDA* Search\n")
+    search = _IterativeDeepening(graph, destination, heuristic, cache_size)
+    if origin == destination:
+        return search.nodes_popped, search.nodes_expanded, search.nodes_generated, 0, []
+
+    threshold = heuristic.get(origin, INFINITY)
+    while threshold < INFINITY:
+        distance, path, next_threshold = search.iteration(origin, threshold)
+        if path is not None:
+            return (
+                search.nodes_popped,
+                search.nodes_expanded,
+                search.nodes_generated,
+                distance,
+                path,
+            )
+        threshold = max(next_threshold, threshold * (1 + growth))
+
+    # No path found
+    return search.nodes_popped, search.nodes_expanded, search.nodes_generated, INFINITY, None
+
+
+class _MemoryNode:
+    """A node of the SMA* search tree"""
+
+    __slots__ = (
+        "children",
+        "city",
+        "depth",
+        "distance",
+        "estimated_total",
+        "forgotten",
+        "g",
+        "parent",
+        "unexplored",
+    )
+
+    def __init__(self, city: str, g: float, distance: float, parent: "_MemoryNode | None") -> None:
+        self.city = city
+        self.g = g
+        self.distance = distance
+        self.parent = parent
+        self.depth: int = 0 if parent is None else parent.depth + 1
+        self.estimated_total = INFINITY
+        self.children: set[_MemoryNode] = set()
+        # The neighbors never generated, and the best f(n) of the children that were dropped
+        self.unexplored: list[tuple[str, float]] | None = None
+        self.forgotten: dict[str, tuple[float, float]] = {}
+
+    def on_path(self, city: str) -> bool:
+        """Whether the city is this node or one of its ancestors."""
+        node: _MemoryNode | None = self
+        while node is not None:
+            if node.city == city:
+                return True
+            node = node.parent
+        return False
+
+    def can_generate(self) -> bool:
+        """Whether the node has a successor that is not in memory."""
+        return self.unexplored is None or bool(self.unexplored) or bool(self.forgotten)
+
+    def path(self) -> list[tuple[str, str, float]]:
+        """The roads from the root to this node."""
+        path: list[tuple[str, str, float]] = []
+        node = self
+        while node.parent is not None:
+            path.append((node.parent.city, node.city, node.distance))
+            node = node.parent
+        path.reverse()
+        return path
+
+
+class _MemoryBoundedSearch:
+    """The search tree, frontier, eviction queue, and transposition cache of an SMA* search"""
+
+    def __init__(self, max_nodes: int) -> None:
+        self.max_nodes = max_nodes
+        self.size = 0
+        self._order = itertools.count()
+        # Priority Queues with lazy deletion, of the deepest lowest-f(n) node that can still
+        # generate a successor, and of the shallowest highest-f(n) leaf
+        self._frontier: list[tuple[float, int, int, _MemoryNode]] = []
+        self._leaves: list[tuple[float, int, int, _MemoryNode]] = []
+        self._alive: set[_MemoryNode] = set()
+        # Transposition cache of the cheapest g(n) each city was generated with
+        self._costs: dict[str, float] = {}
+
+    def improves(self, city: str, g: float) -> bool:
+        """Record a path to a city, returning False if a cheaper one was generated before."""
+        if self._costs.get(city, INFINITY) < g:
+            return False
+        if city in self._costs or len(self._costs) < self.max_nodes:
+            self._costs[city] = g
+        return True
+
+    def add(self, node: _MemoryNode) -> None:
+        """Store a node in memory."""
+        self.size += 1
+        self._alive.add(node)
+        self.queue(node)
+
+    def _in_frontier(self, node: _MemoryNode, estimated_total: float) -> bool:
+        """Whether a frontier entry is still current."""
+        return (
+            node in self._alive and node.can_generate() and node.estimated_total == estimated_total
+        )
+
+    def _is_leaf(self, node: _MemoryNode, estimated_total: float) -> bool:
+        """Whether a leaf entry is still current."""
+        return node in self._alive and not node.children and node.estimated_total == estimated_total
+
+    def queue(self, node: _MemoryNode) -> None:
+        """(Re)queue a node under its current f(n)."""
+        if node.can_generate():
+            entry = (node.estimated_total, -node.depth, next(self._order), node)
+            heapq.heappush(self._frontier, entry)
+        if not node.children and node.parent is not None:
+            entry = (-node.estimated_total, node.depth, next(self._order), node)
+            heapq.heappush(self._leaves, entry)
+
+        # Superseded entries would otherwise keep dropped nodes alive, so compact the queues
+        # before they outgrow the node budget
+        if len(self._frontier) + len(self._leaves) > 4 * self.max_nodes:
+            self._frontier = [
+                entry for entry in self._frontier if self._in_frontier(entry[3], entry[0])
+            ]
+            self._leaves = [entry for entry in self._leaves if self._is_leaf(entry[3], -entry[0])]
+            heapq.heapify(self._frontier)
+            heapq.heapify(self._leaves)
+
+    def best(self) -> _MemoryNode | None:
+        """The deepest node with the lowest f(n) that can still generate a successor."""
+        while self._frontier:
+            estimated_total, _, _, node = self._frontier[0]
+            if self._in_frontier(node, estimated_total):
+                return node
+            heapq.heappop(self._frontier)
+        return None
+
+    def evict(self, keep: _MemoryNode) -> None:
+        """Drop the shallowest leaf with the highest f(n), remembering its f(n) in its parent."""
+        while self._leaves:
+            negative_total, _, _, node = heapq.heappop(self._leaves)
+            if node is keep or not self._is_leaf(node, -negative_total):
+                continue
+            parent = node.parent
+            if parent is None:
+                continue
+            self._alive.discard(node)
+            self.size -= 1
+            parent.children.discard(node)
+            previous = parent.forgotten.get(node.city, (INFINITY, 0))[0]
+            parent.forgotten[node.city] = (
+                min(previous, node.estimated_total),
+                node.distance,
+            )
+            self.queue(parent)
+            return
+
+    def backup(self, node: _MemoryNode) -> None:
+        """Raise f(n) of fully generated ancestors to the best f(n) among their successors."""
+        current: _MemoryNode | None = node
+        while current is not None and current.unexplored == []:
+            totals = [child.estimated_total for child in current.children]
+            totals.extend(total for total, _ in current.forgotten.values())
+            backed_up = min(totals, default=INFINITY)
+            if backed_up == current.estimated_total:
+                return
+            current.estimated_total = backed_up
+            self.queue(current)
+            current = current.parent
+
+
+def sma_star_search(
+    graph: dict[str, dict[str, float]],
+    origin: str,
+    destination: str,
+    heuristic: dict[str, float],
+    max_nodes: int = DEFAULT_MAX_NODES,
+) -> tuple[int, int, int, float, list[tuple[str, str, float]] | None]:
+    """Performs Simplified Memory-Bounded A* (SMA*) in the graph from origin to destination.
+
+    SMA* behaves like A* until max_nodes search nodes are in memory. From then on, generating a
+    successor first drops the shallowest leaf with the highest f(n), and its parent remembers the
+    best f(n) it dropped, so the subtree is only generated again once everything else looks worse.
+    A node whose successors are all generated backs its f(n) up to the best of its successors.
+    A transposition cache of up to max_nodes cities skips paths to a city that is more expensive
+    than one generated before, so the memory stays proportional to max_nodes.
+
+    The route is optimal if it fits in max_nodes nodes, and otherwise the best route that fits.
+    The closer max_nodes is to the number of nodes A* would keep, the fewer subtrees are dropped
+    and generated again; far below it, the search spends most of its time regenerating them.
+    Cycles are only checked along the path of each node, so when no route exists the search has
+    to try every loopless path within the memory bound before giving up.
+
+    Args:
+        graph: A dictionary representing the road connections.
+        origin: The starting city.
+        destination: The destination city.
+        heuristic: A dictionary of heuristic values for each city.
+        max_nodes: The maximum number of search nodes kept in memory, at least 2.
+
+    Returns:
+        tuple: Tuple containing the number of nodes popped, expanded, generated, distance, and path.
+    """
+    sys.stdout.write("SMA* Search\n")
+    nodes_popped: int = 0
+    nodes_expanded: int = 0
+    nodes_generated: int = 0
+
+    search = _MemoryBoundedSearch(max(max_nodes, 2))
+    root = _MemoryNode(origin, 0, 0, None)
+    root.estimated_total = heuristic.get(origin, INFINITY)
+    search.add(root)
+
+    while (current_node := search.best()) is not None:
+        nodes_popped += 1
+        if math.isinf(current_node.estimated_total):
+            break
+        if current_node.city == destination:
+            return (
+                nodes_popped,
+                nodes_expanded,
+                nodes_generated,
+                current_node.g,
+                current_node.path(),
+            )
+
+        # Generate the next neighbor never generated, or else regenerate the best dropped one
+        if current_node.unexplored is None:
+            nodes_expanded += 1
+            current_node.unexplored = [
+                road
+                for road in reversed(graph[current_node.city].items())
+                if not current_node.on_path(road[0])
+            ]
+        if current_node.unexplored:
+            neighbor, distance = current_node.unexplored.pop()
+            remembered = 0.0
+        elif current_node.forgotten:
+            neighbor = min(current_node.forgotten, key=current_node.forgotten.__getitem__)
+            remembered, distance = current_node.forgotten.pop(neighbor)
+        else:
+            # A dead end: every neighbor is already on the path
+            search.backup(current_node)
+            continue
+        nodes_generated += 1
+
+        child = _MemoryNode(neighbor, current_node.g + distance, distance, current_node)
+        if not search.improves(neighbor, child.g):
+            # A cheaper path to the neighbor is already in the tree
+            search.backup(current_node)
+            search.queue(current_node)
+            continue
+        if neighbor != destination and child.depth >= search.max_nodes - 1:
+            # The route through this node cannot fit in memory
+            child.estimated_total = INFINITY
+        else:
+            child.estimated_total = max(
+                current_node.estimated_total,
+                child.g + heuristic.get(neighbor, INFINITY),
+                remembered,
+            )
+
+        if search.size >= search.max_nodes:
+            search.evict(keep=current_node)
+        current_node.children.add(child)
+        search.add(child)
+        search.backup(current_node)
+        search.queue(current_node)
+
+    # No path found
+    return nodes_popped, nodes_expanded, nodes_generated, INFINITY, None
+
+
+def _parse_options() -> argparse.Namespace:
+    """Parse the command line options"""
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("input_file", type=Path, help="The file containing the road system")
+    parser.add_argument("origin", help="The starting city")
+    parser.add_argument("destination", help="The destination city")
+    parser.add_argument("heuristic_file", type=Path, help="The file containing the heuristic")
+    parser.add_argument("--algorithm", choices=("ida", "sma"), default="ida")
+    parser.add_argument(
+        "--cache-size",
+        type=int,
+        default=DEFAULT_CACHE_SIZE,
+        help="The maximum number of cities in the IDA* transposition cache",
+    )
+    parser.add_argument(
+        "--growth",
+        type=float,
+        default=0.05,
+        help="The minimum relative growth of the IDA* threshold between iterations",
+    )
+    parser.add_argument(
+        "--max-nodes",
+        type=int,
+        default=DEFAULT_MAX_NODES,
+        help="The maximum number of search nodes SMA* keeps in memory",
+    )
+    return parser.parse_args()
+
+
+def main() -> None:
+    """Main function to find the route with IDA* or SMA* and print the output."""
+    args = _parse_options()
+    graph = parse_road_system(args.input_file)
+    heuristic = parse_heuristic(args.heuristic_file)
+
+    if args.algorithm == "ida":
+        result = ida_star_search(
+            graph,
+            args.origin,
+            args.destination,
+            heuristic,
+            cache_size=args.cache_size,
+            growth=args.growth,
+        )
+    else:
+        result = sma_star_search(
+            graph, args.origin, args.destination, heuristic, max_nodes=args.max_nodes
+        )
+    write_result(result)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,376 @@
+"""Monte Carlo Tree Search player for Red-Blue Nim positions too large for minmax to search.
+
+The player runs UCT (Upper Confidence bounds applied to Trees). Every new leaf is scored by a batch
+of random games played out at once with NumPy instead of by evaluate_state, in which the players
+take immediate wins and avoid immediate losses. Positions reached by different move orders share
+a node, positions whose outcome is certain are proven won or lost (MCTS-Solver), and the nodes are
+kept between turns unless they fill the node limit. Every move is searched until a time or
+iteration budget runs out, or the node limit is reached. With several
+workers, each process grows its own search from the same position (root parallelisation) and the
+visit counts of the root moves are added up.
+
+Classes:
+    - MctsPlayer
+"""
+
+import math
+import multiprocessing
+import time
+
+from multiprocessing.connection import Connection
+from types import TracebackType
+from typing import Final, Self
+
+import numpy as np
+import numpy.typing as npt
+
+from red_blue_nim import GameState, valid_moves
+
+
+__all__ = ["MctsPlayer"]
+
+DEFAULT_TIME_BUDGET: Final[float] = 1.0
+DEFAULT_ROLLOUTS: Final[int] = 64
+EXPLORATION: Final[float] = math.sqrt(2)
+
+_Move = tuple[str, int]
+_Stats = dict[_Move, tuple[int, int, bool | None]]
+
+
+class _Node:
+    """A position in the search graph, shared by every move order that reaches it."""
+
+    __slots__ = ("blue", "children", "proven", "red", "untried", "visits", "wins")
+
+    def __init__(self, red: int, blue: int, version: str) -> None:
+        self.red = red
+        self.blue = blue
+        self.children: list[tuple[_Move, _Node]] = []
+        state = GameState(red, blue, version)
+        self.untried = [] if state.is_game_over() else valid_moves(state, version)
+        self.visits = 0
+        # Rollouts won by the player who moved into this position, and whether that player wins
+        # with best play once it is proven
+        self.wins = 0
+        self.proven = _outcome(red, blue, version)
+
+    def prove(self) -> None:
+        """Proves the position lost if a move from it is won, or won if every move is lost."""
+        if any(child.proven for _, child in self.children):
+            self.proven = False
+        elif not self.untried and all(child.proven is False for _, child in self.children):
+            self.proven = True
+
+
+def _outcome(red: int, blue: int, version: str) -> bool | None:
+    """Whether the player who moved into the position wins, if it is decided within one move.
+
+    Args:
+        red (int): The number of red marbles.
+        blue (int): The number of blue marbles.
+        version (str): The version of the game (e.g., 'standard', 'misere').
+
+    Returns:
+        bool | None: True if the player who moved wins, False if they lose, or None if undecided.
+    """
+    if red == 0 or blue == 0:
+        return version == "standard"
+    # The player to move empties a pile of one or two marbles and wins
+    if version == "standard" and min(red, blue) <= 2:
+        return False
+    # The player to move has to empty a pile and loses
+    if version != "standard" and red == blue == 1:
+        return True
+    return None
+
+
+def _moves_to_use_up(spare: int, count: int, rng: np.random.Generator) -> npt.NDArray[np.int64]:
+    """Samples how many moves count random games take to use up the spare marbles of one pile.
+
+    Every move takes one or two spare marbles at random, and one when only one is left. The first
+    (remaining - 1) // 2 moves can never use them all up, so they are drawn at once as a binomial
+    number of twos, which takes a logarithmic number of rounds instead of one step per move.
+
+    Args:
+        spare (int): The number of spare marbles in the pile.
+        count (int): The number of games to sample.
+        rng (np.random.Generator): The random number generator.
+
+    Returns:
+        npt.NDArray[np.int64]: The number of moves each game takes from the pile.
+    """
+    remaining = np.full(count, spare, dtype=np.int64)
+    moves = np.zeros(count, dtype=np.int64)
+    while (remaining > 2).any():
+        draws = np.maximum((remaining - 1) // 2, 0)
+        moves += draws
+        remaining -= draws + rng.binomial(draws, 0.5)
+    # Two spare marbles are used up in one move half of the time, and in two moves otherwise
+    moves += np.where(remaining == 2, rng.integers(1, 3, count), remaining)
+    return moves
+
+
+def _rollout_wins(red: int, blue: int, version: str, count: int, rng: np.random.Generator) -> int:
+    """Plays count random games out from a position and counts the wins of the player who moved.
+
+    The players make an immediately winning move if there is one, and otherwise a random move that
+    does not lose at once: in the standard version they never leave a pile with one or two marbles,
+    and in the misere version they never empty a pile. A pile then only matters through its spare
+    marbles above 3 (standard) or 1 (misere), and the player left without spare marbles loses, so
+    only the number of moves it takes to use up the spare marbles of both piles has to be sampled.
+
+    Args:
+        red (int): The number of red marbles.
+        blue (int): The number of blue marbles.
+        version (str): The version of the game (e.g., 'standard', 'misere').
+        count (int): The number of games to play.
+        rng (np.random.Generator): The random number generator.
+
+    Returns:
+        int: The number of games won by the player who made the move into the position.
+    """
+    outcome = _outcome(red, blue, version)
+    if outcome is not None:
+        return count if outcome else 0
+
+    reserve = 3 if version == "standard" else 1
+    moves = _moves_to_use_up(red - reserve, count, rng) + _moves_to_use_up(
+        blue - reserve, count, rng
+    )
+    # After an even number of moves, the opponent is the one left without spare marbles
+    return int(np.count_nonzero(moves % 2 == 0))
+
+
+def _select(node: _Node) -> _Node:
+    """Picks the child with the highest upper confidence bound, skipping moves proven lost."""
+    log_visits = math.log(node.visits)
+    best, best_bound = node.children[0][1], -math.inf
+    for _, child in node.children:
+        if child.proven is False:
+            continue
+        bound = child.wins / child.visits + EXPLORATION * math.sqrt(log_visits / child.visits)
+        if bound > best_bound:
+            best, best_bound = child, bound
+    return best
+
+
+def _decided(root: _Node) -> bool:
+    """Whether a move from the root is proven won, or every move is proven lost."""
+    return any(child.proven for _, child in root.children) or (
+        not root.untried and all(child.proven is False for _, child in root.children)
+    )
+
+
+class _Search:
+    """One UCT search, kept between turns."""
+
+    def __init__(self, version: str, rollouts: int, seed: np.random.SeedSequence) -> None:
+        self.version = version
+        self.rollouts = rollouts
+        self.rng = np.random.default_rng(seed)
+        # Red-Blue Nim is impartial, so a position is worth the same whichever move order and
+        # player reached it, and every position gets a single node
+        self.nodes: dict[tuple[int, int], _Node] = {}
+
+    def _node(self, red: int, blue: int) -> _Node:
+        """The node of a position, created the first time the position is reached."""
+        if (red, blue) not in self.nodes:
+            self.nodes[red, blue] = _Node(red, blue, self.version)
+        return self.nodes[red, blue]
+
+    def _reroot(self, red: int, blue: int) -> _Node:
+        """Drops the positions with more marbles than the new root, which cannot occur again."""
+        self.nodes = {
+            position: node
+            for position, node in self.nodes.items()
+            if position[0] <= red and position[1] <= blue
+        }
+        return self._node(red, blue)
+
+    def search(  # noqa: PLR0913
+        self,
+        red: int,
+        blue: int,
+        iterations: int | None,
+        max_nodes: int | None,
+        time_budget: float | None,
+    ) -> _Stats:
+        """Grows the search graph below the position until one of the budgets runs out.
+
+        Args:
+            red (int): The number of red marbles.
+            blue (int): The number of blue marbles.
+            iterations (int | None): The number of iterations to run, or None for no limit.
+            max_nodes (int | None): The most nodes to keep, at least 2, or None for no limit.
+            time_budget (float | None): The number of seconds to search, or None for no limit.
+
+        Returns:
+            dict: The visits and the wins of every move from the position searched so far.
+        """
+        deadline = math.inf if time_budget is None else time.perf_counter() + time_budget
+        root = self._reroot(red, blue)
+        node_limit = math.inf if max_nodes is None else max_nodes
+        # A full graph is dropped rather than grown, so the search starts over from the root
+        if len(self.nodes) >= node_limit:
+            self.nodes = {}
+            root = self._node(red, blue)
+        # Every iteration adds at most one node, and none once the graph holds the whole game
+        remaining = math.inf if iterations is None else iterations
+        while not _decided(root) and remaining > 0 and len(self.nodes) < node_limit:
+            self._iterate(root)
+            remaining -= 1
+            if time.perf_counter() >= deadline:
+                break
+        return {move: (child.visits, child.wins, child.proven) for move, child in root.children}
+
+    def _iterate(self, root: _Node) -> None:
+        """Runs one selection, expansion, simulation, and backpropagation."""
+        # The root is searched even if it is proven, until its best move is
+        path = [root]
+        node = root
+        while (node is root or node.proven is None) and not node.untried and node.children:
+            node = _select(node)
+            path.append(node)
+
+        if (node is root or node.proven is None) and node.untried:
+            move = node.untried.pop()
+            state = GameState(node.red, node.blue, self.version)
+            state.execute_move(move)
+            child = self._node(state.red_marbles, state.blue_marbles)
+            node.children.append((move, child))
+            path.append(child)
+            node = child
+
+        wins = _rollout_wins(node.red, node.blue, self.version, self.rollouts, self.rng)
+        for current in reversed(path):
+            if current is not node:
+                current.prove()
+            current.visits += self.rollouts
+            current.wins += wins
+            wins = self.rollouts - wins
+
+
+def _worker(
+    connection: Connection, version: str, rollouts: int, seed: np.random.SeedSequence
+) -> None:
+    """Keeps one search in a worker process and searches every position it is sent."""
+    search = _Search(version, rollouts, seed)
+    while (request := connection.recv()) is not None:
+        connection.send(search.search(*request))
+    connection.close()
+
+
+class MctsPlayer:
+    """Chooses the computer's moves with Monte Carlo Tree Search.
+
+    Use it as a context manager, or call close, so the worker processes are stopped.
+
+    Attributes:
+        version (str): The version of the game (e.g., 'standard', 'misere').
+        time_budget (float | None): The number of seconds to search each move, or None.
+        iterations (int | None): The number of iterations to run each move, or None.
+        max_nodes (int | None): The most positions kept in the search graph, or None.
+    """
+
+    def __init__(  # noqa: PLR0913, PLR0917
+        self,
+        version: str,
+        time_budget: float | None = DEFAULT_TIME_BUDGET,
+        iterations: int | None = None,
+        max_nodes: int | None = None,
+        rollouts: int = DEFAULT_ROLLOUTS,
+        workers: int = 1,
+        seed: int | None = None,
+    ) -> None:
+        """Initialize the player, starting the worker processes if there is more than one.
+
+        Args:
+            version (str): The version of the game (e.g., 'standard', 'misere').
+            time_budget (float | None): The number of seconds to search each move, or None.
+            iterations (int | None): The number of iterations to run each move, or None.
+            max_nodes (int | None): The most positions kept in the search graph, or None. When the
+                graph is full at the start of a move, it is dropped and the search starts over.
+            rollouts (int): The number of random games played out from every new leaf.
+            workers (int): The number of processes running a search of their own.
+            seed (int | None): Seed for the random number generators.
+        """
+        if time_budget is None and iterations is None and max_nodes is None:
+            raise ValueError("A time budget, an iteration budget, or a node limit is required")
+        if iterations is not None and iterations < 1:
+            raise ValueError("The iteration budget must be at least 1")
+        # The root and one of its moves are needed to choose a move
+        if max_nodes is not None and max_nodes < 2:
+            raise ValueError("The node limit must be at least 2")
+        self.version = version
+        self.time_budget = time_budget
+        self.iterations = iterations
+        self.max_nodes = max_nodes
+        seeds = np.random.SeedSequence(seed).spawn(max(workers, 1))
+        self._search = _Search(version, rollouts, seeds[0]) if workers <= 1 else None
+        self._workers: list[tuple[multiprocessing.Process, Connection]] = []
+        if workers > 1:
+            for worker_seed in seeds:
+                connection, worker_connection = multiprocessing.Pipe()
+                process = multiprocessing.Process(
+                    target=_worker,
+                    args=(worker_connection, version, rollouts, worker_seed),
+                    daemon=True,
+                )
+                process.start()
+                self._workers.append((process, connection))
+
+    def choose_move(self, game_state: GameState) -> _Move:
+        """Search the position and return the move proven to win, or else the most visited one.
+
+        Args:
+            game_state (GameState): The current state of the game.
+
+        Returns:
+            tuple[str, int]: The chosen move as a tuple (color, count).
+        """
+        request = (
+            game_state.red_marbles,
+            game_state.blue_marbles,
+            self.iterations,
+            self.max_nodes,
+            self.time_budget,
+        )
+        if self._search is not None:
+            results = [self._search.search(*request)]
+        else:
+            for _, connection in self._workers:
+                connection.send(request)
+            results = [connection.recv() for _, connection in self._workers]
+
+        # A move proven won by any search wins, and moves proven lost are only played if all are
+        ranks: dict[_Move, tuple[bool, bool, int]] = {}
+        for stats in results:
+            for move, (visits, _, proven) in stats.items():
+                won, not_lost, total = ranks.get(move, (False, True, 0))
+                ranks[move] = (
+                    won or proven is True,
+                    not_lost and proven is not False,
+                    total + visits,
+                )
+        return max(ranks, key=lambda move: ranks[move])
+
+    def close(self) -> None:
+        """Stop the worker processes."""
+        for process, connection in self._workers:
+            connection.send(None)
+            process.join()
+            connection.close()
+        self._workers.clear()
+
+    def __enter__(self) -> Self:
+        """Return the player for use in a with statement."""
+        return self
+
+    def __exit__(
+        self,
+        exc_type: type[BaseException] | None,
+        exc_value: BaseException | None,
+        traceback: TracebackType | None,
+    ) -> None:
+        """Stop the worker processes when leaving the with statement."""
+        self.close()
@@ -1,62 +1,10 @@
 import argparse
-import logging
 import sys
 
-from logging import Logger, LogRecord
-from types import TracebackType
-from typing import ClassVar
+from collections.abc import Callable
+from logging import Logger
 
-
-class ArgparseLogger(argparse.ArgumentParser):
-    """Subclass of argparse.ArgumentParser that logs errors using a custom logger."""
-
-    def __init__(self, logger, *args, **kwargs) -> None:  # noqa: ANN003, ANN002, ANN001
-        """Initialize the ArgparseLogger class.
-
-        Args:
-            logger: The custom logger to be used.
-            *args: Additional positional arguments.
-            **kwargs: Additional keyword arguments.
-        """
-        super().__init__(*args, **kwargs)
-        self.logger = logger
-
-    def error(self, message: str) -> None:
-        """Overrides the default error method to log parsing errors using the custom logger."""
-        full_message = f"{self.prog}: error: {message}"
-        self.logger.error(full_message)  # Log the actual argparse error message
-        self.print_help(sys.stderr)
-        self.exit(2, full_message + "\n")
-
-
-class ColorLogFormatter(logging.Formatter):
-    """A custom log formatter that adds color to log levels.
-
-    Attributes:
-        fmt (str): The format string used to format the log message.
-        COLORS (dict): A dictionary mapping log levels to their respective ANSI color codes.
-    """
-
-    COLORS: ClassVar[dict] = {
-        logging.DEBUG: "\u001b[36;1m",  # Cyan for DEBUG
-        logging.INFO: "\u001b[32;1m",  # Green for INFO
-        logging.WARNING: "\u001b[33;1m",  # Yellow for WARNING
-        logging.ERROR: "\u001b[31;1m",  # Red for ERROR
-        logging.CRITICAL: "\u001b[1m\u001b[31m",  # Bold Red for CRITICAL
-    }
-
-    def format(self, record: LogRecord) -> str:
-        """Format the specified record with color.
-
-        Args:
-            record (logging.LogRecord): The log record to be formatted.
-
-        Returns:
-            str: A formatted string with color based on the log level.
-        """
-        colored_record = logging.Formatter.format(self, record)
-        levelno = record.levelno
-        return f"{self.COLORS.get(levelno, '')}{colored_record}\u001b[0m"  # Reset to default
+from cse4380.log import ArgparseLogger, setup_logging
 
 
 class GameState:
@@ -244,8 +192,13 @@ def computer_turn(game_state: GameState, move: tuple[str, int]) -> None:
     print(f"\u001b[30;1mNumber of Marbles: {move[1]}\u001b[0m \n")
 
 
-def red_blue_nim(
-    red_marbles: int, blue_marbles: int, version: str, first_player: str, depth: int
+def red_blue_nim(  # noqa: PLR0913, PLR0917
+    red_marbles: int,
+    blue_marbles: int,
+    version: str,
+    first_player: str,
+    depth: int,
+    player: Callable[[GameState], tuple[str, int]] | None = None,
 ) -> None:
     """Main function to manage the flow of the Red-Blue Nim game.
 
@@ -255,13 +208,17 @@ def red_blue_nim(
         version (str): The version of the game (e.g., 'standard', 'misere').
         first_player (str): The first player ('human' or 'computer').
         depth (int): The depth for the minimax search algorithm.
+        player (Callable | None): Chooses the computer's moves instead of minimax, if given.
     """
     game_state = GameState(red_marbles, blue_marbles, version)
     current_player = first_player
 
     while not game_state.is_game_over():
         if current_player == "computer":
-            _, move = minmax(game_state, depth, float("-inf"), float("inf"), True)
+            if player is None:
+                _, move = minmax(game_state, depth, float("-inf"), float("inf"), True)
+            else:
+                move = player(game_state)
             computer_turn(game_state, move)
             game_state.execute_move(move)
             current_player = "human"
@@ -289,39 +246,12 @@ def red_blue_nim(
     print(f"\u001b[35;1m{winner}\u001b[36;1m wins with a score of \u001b[35;1m{score}\u001b[0m \n")
 
 
-def _setup_custom_logger(log_file: bool = False) -> Logger:
-    """Sets up a global logger with custom formatting and a global exception handler."""
-    logger = logging.getLogger()
-    logger.setLevel(logging.DEBUG)
-
-    handler = logging.StreamHandler()
-    formatter = ColorLogFormatter("%(asctime)s - %(levelname)s - %(message)s")
-    handler.setFormatter(formatter)
-    logger.addHandler(handler)
-
-    if log_file:
-        file_handler = logging.FileHandler("logfile.log")
-        file_handler.setFormatter(logging.Formatter("%(asctime)s - %(levelname)s - %(message)s"))
-        logger.addHandler(file_handler)
-
-    # Global exception handler
-    def handle_exception(
-        exc_type: type[BaseException], exc_value: BaseException, exc_traceback: TracebackType
-    ) -> None:
-        if issubclass(exc_type, KeyboardInterrupt):
-            sys.__excepthook__(exc_type, exc_value, exc_traceback)
-            return
-        logger.critical(f"{exc_type}", exc_info=(exc_type, exc_value, exc_traceback))
-
-    sys.excepthook = handle_exception
-    return logger
-
-
-def _parse_args(logger: Logger) -> argparse.Namespace:
+def _parse_args(logger: Logger, argv: list[str] | None) -> argparse.Namespace:
     """Parse command-line arguments for the Red-Blue Nim game.
 
     Arguments:
         logger (Logger): The logger object.
+        argv (list[str] | None): The command-line arguments, or None for sys.argv.
 
     Returns:
         argparse.Namespace: The parsed arguments.
@@ -350,21 +280,88 @@ def _parse_args(logger: Logger) -> argparse.Namespace:
         default=15,
         help="Depth for search, must be greater than 0 (default: 15)",
     )
+    parser.add_argument(
+        "--engine",
+        default="minmax",
+        choices=["minmax", "mcts"],
+        help="Search used by the computer (default: minmax)",
+    )
+    parser.add_argument(
+        "--time-budget",
+        type=float,
+        default=1.0,
+        help="Seconds of Monte Carlo Tree Search per move (default: 1.0)",
+    )
+    parser.add_argument(
+        "--iterations", type=int, help="MCTS iterations per move (default: no limit)"
+    )
+    parser.add_argument(
+        "--max-nodes",
+        type=int,
+        help="Positions MCTS keeps between moves, starting over when full (default: no limit)",
+    )
+    parser.add_argument(
+        "--rollouts",
+        type=int,
+        default=64,
+        help="Random games played out from every new MCTS leaf (default: 64)",
+    )
+    parser.add_argument(
+        "--workers", type=int, default=1, help="Processes searching with MCTS (default: 1)"
+    )
+    parser.add_argument("--seed", type=int, help="Seed for the MCTS random number generator")
+
+    return parser.parse_args(argv)
 
-    return parser.parse_args()
 
+def main(argv: list[str] | None = None) -> None:
+    """Main function to parse command-line arguments and start the Red-Blue Nim game.
 
-def main() -> None:
-    """Main function to parse command-line arguments and start the Red-Blue Nim game."""
-    logger = _setup_custom_logger()
+    Arguments:
+        argv (list[str] | None): The command-line arguments, or None for sys.argv.
+    """
+    logger = setup_logging()
 
-    args = _parse_args(logger)
+    args = _parse_args(logger, argv)
 
     if args.depth < 1:
         logger.error("Invalid depth argument. Depth must be greater than 0. Please try again. \n")
         sys.exit(1)
 
-    red_blue_nim(args.num_red, args.num_blue, args.version, args.first_player, args.depth)
+    if args.engine == "minmax":
+        red_blue_nim(args.num_red, args.num_blue, args.version, args.first_player, args.depth)
+        return
+
+    if args.time_budget <= 0 or args.rollouts < 1:
+        logger.error("Invalid MCTS arguments. The time budget and rollouts must be positive. \n")
+        sys.exit(1)
+
+    if (args.iterations is not None and args.iterations < 1) or (
+        args.max_nodes is not None and args.max_nodes < 2
+    ):
+        logger.error("Invalid MCTS arguments. Give at least 1 iteration and 2 nodes. \n")
+        sys.exit(1)
+
+    # NumPy is only needed by the MCTS engine, so minmax games do not pay for importing it
+    from mcts import MctsPlayer  # noqa: PLC0415
+
+    with MctsPlayer(
+        args.version,
+        time_budget=args.time_budget,
+        iterations=args.iterations,
+        max_nodes=args.max_nodes,
+        rollouts=args.rollouts,
+        workers=args.workers,
+        seed=args.seed,
+    ) as player:
+        red_blue_nim(
+            args.num_red,
+            args.num_blue,
+            args.version,
+            args.first_player,
+            args.depth,
+            player.choose_move,
+        )
 
 
 if __name__ == "__main__":
@@ -1,88 +1,34 @@
 """Python script that calculates the posterior probabilities of different hypotheses from a given sequence of observations"""  # noqa: E501
 
 import argparse
+import contextlib
 import logging
+import math
 import sys
 
-from logging import Logger, LogRecord
+from collections.abc import Iterable, Iterator
+from logging import Logger
 from pathlib import Path
-from types import TracebackType
-from typing import ClassVar, Literal
+from typing import TYPE_CHECKING, Final, Literal, TextIO
 
+from posterior_io import DEFAULT_CHUNK_SIZE, SINKS, read_observation_chunks, write_batch_results
 
-class ArgparseLogger(argparse.ArgumentParser):
-    """Subclass of argparse.ArgumentParser that logs errors using a custom logger."""
+from cse4380.log import ArgparseLogger, setup_logging
+from cse4380.logspace import log_probability, logsumexp
 
-    def __init__(self, logger, *args, **kwargs) -> None:  # noqa: ANN003, ANN002, ANN001
-        """Initialize the ArgparseLogger class.
 
-        Args:
-            logger: The custom logger to be used.
-            *args: Additional positional arguments.
-            **kwargs: Additional keyword arguments.
-        """
-        super().__init__(*args, **kwargs)
-        self.logger = logger
+# NumPy is only needed by the vectorized, streaming and batch modes, so the default mode does not
+# pay for importing it: hypothesis_set is imported by the functions that use it
+if TYPE_CHECKING:
+    import numpy as np
+    import numpy.typing as npt
 
-    def error(self, message: str) -> None:
-        """Overrides the default error method to log parsing errors using the custom logger."""
-        full_message = f"{self.prog}: error: {message}"
-        self.logger.error(full_message)  # Log the actual argparse error message
-        self.print_help(sys.stderr)
-        self.exit(2, full_message + "\n")
+    from hypothesis_set import HypothesisSet
+    from posterior_io import PosteriorSink
 
 
-class ColorLogFormatter(logging.Formatter):
-    """A custom log formatter that adds color to log levels.
-
-    Attributes:
-        fmt (str): The format string used to format the log message.
-        COLORS (dict): A dictionary mapping log levels to their respective ANSI color codes.
-    """
-
-    COLORS: ClassVar[dict] = {
-        logging.DEBUG: "\033[0;36m",  # Cyan for DEBUG
-        logging.INFO: "\033[0;32m",  # Green for INFO
-        logging.WARNING: "\033[0;33m",  # Yellow for WARNING
-        logging.ERROR: "\033[0;31m",  # Red for ERROR
-        logging.CRITICAL: "\033[1;31m",  # Bold Red for CRITICAL
-    }
-
-    def format(self, record: LogRecord) -> str:
-        """Format the specified record with color.
-
-        Args:
-            record (logging.LogRecord): The log record to be formatted.
-
-        Returns:
-            str: A formatted string with color based on the log level.
-        """
-        colored_record = logging.Formatter.format(self, record)
-        levelno = record.levelno
-        return f"{self.COLORS.get(levelno, '')}{colored_record}\033[0m"  # Reset to default
-
-
-def _setup_custom_logger(name: str | None = None) -> Logger:
-    """Sets up a global logger with custom formatting and a global exception handler."""
-    logger = logging.getLogger(name)
-    logger.setLevel(logging.DEBUG)
-
-    handler = logging.StreamHandler()
-    formatter = ColorLogFormatter("%(asctime)s - %(levelname)s - %(message)s")
-    handler.setFormatter(formatter)
-    logger.addHandler(handler)
-
-    # Global exception handler
-    def handle_exception(
-        exc_type: type[BaseException], exc_value: BaseException, exc_traceback: TracebackType
-    ) -> None:
-        if issubclass(exc_type, KeyboardInterrupt):
-            sys.__excepthook__(exc_type, exc_value, exc_traceback)
-            return
-        logger.critical(f"{exc_type}", exc_info=(exc_type, exc_value, exc_traceback))
-
-    sys.excepthook = handle_exception
-    return logger
+CANDY_TYPES: Final[dict[str, str]] = {"C": "cherry", "L": "lime"}
+MAX_TRAJECTORY_CELLS: Final[int] = 1 << 24
 
 
 def calculate_likelihood(hypothesis: dict[str, float], observation: Literal["C", "L"]) -> float:
@@ -117,6 +63,58 @@ def update_posterior(
         hypothesis["prior"] = (hypothesis["prior"] * likelihood) / total_prob
 
 
+def calculate_log_likelihood(hypothesis: dict[str, float], observation: Literal["C", "L"]) -> float:
+    """Calculate the log-likelihood log P(observation | hypothesis) based on the candy type
+
+    Arguments:
+        hypothesis: A dictionary containing the probability distributions for both candy types
+        observation: The observed candy type, 'C' for cherry and 'L' for lime
+
+    Returns:
+        float: The log-likelihood of the observation, or -inf if the hypothesis rules it out
+    """
+    return log_probability(calculate_likelihood(hypothesis, observation))
+
+
+def update_log_posterior(
+    hypotheses: dict[str, dict[str, float]],
+    observation: Literal["C", "L"],
+    log_posteriors: dict[str, float] | None = None,
+) -> dict[str, float]:
+    """Update the posterior probabilities of all hypotheses based on the given observation in log space
+
+    The unnormalised log posterior of every hypothesis is returned, to be passed back in with the
+    next observation, so the products of likelihoods over a long sequence never underflow and never
+    need renormalising. The normalised posterior is then written back to 'prior' via log-sum-exp
+
+    Arguments:
+        hypotheses: A dictionary of all hypotheses with their current probabilities
+        observation: The observed candy type, either 'C' or 'L'
+        log_posteriors: The log posteriors returned for the previous observation, or None to start from the log of 'prior'
+
+    Returns:
+        dict[str, float]: The unnormalised log posterior of every hypothesis after the observation
+
+    Raises:
+        ValueError: If the observations so far are impossible under every hypothesis
+    """  # noqa: E501
+    if log_posteriors is None:
+        log_posteriors = {
+            name: log_probability(hypothesis["prior"]) for name, hypothesis in hypotheses.items()
+        }
+    log_posteriors = {
+        name: log_posteriors[name] + calculate_log_likelihood(hypothesis, observation)
+        for name, hypothesis in hypotheses.items()
+    }
+
+    log_evidence = logsumexp(log_posteriors.values())
+    if log_evidence == -math.inf:
+        raise ValueError(f"Observation {observation!r} is impossible under every hypothesis")
+    for name, hypothesis in hypotheses.items():
+        hypothesis["prior"] = math.exp(log_posteriors[name] - log_evidence)
+    return log_posteriors
+
+
 def next_candy_probability(
     hypotheses: dict[str, dict[str, float]], candy_type: Literal["cherry", "lime"]
 ) -> float | Literal[0]:
@@ -132,7 +130,123 @@ def next_candy_probability(
     return sum(hypothesis["prior"] * hypothesis[candy_type] for hypothesis in hypotheses.values())
 
 
-def calculate_posterior(hypotheses: dict[str, dict[str, float]], observations: str) -> None:
+def posterior_trajectory(
+    hypotheses: dict[str, dict[str, float]], observations: str
+) -> tuple["npt.NDArray[np.float64]", "npt.NDArray[np.float64]"]:
+    """Calculate the posterior probabilities after every observation of the sequence in one shot
+
+    The candies are i.i.d. given the hypothesis, so after k observations the log posterior of a
+    hypothesis is its log prior plus the cherry and lime counts so far times their log-likelihoods.
+    The counts come from a cumulative sum and every row is normalised with a softmax over the hypotheses
+
+    Arguments:
+        hypotheses: A dictionary of all hypotheses with their initial probabilities and likelihoods
+        observations: The sequence of observed candy types, either 'C' or 'L'
+
+    Returns:
+        tuple[np.ndarray, np.ndarray]: The posteriors of the hypotheses and the probabilities of the next candy being C or L, after every observation
+
+    Raises:
+        ValueError: If the observations are impossible under every hypothesis
+    """  # noqa: E501
+    from hypothesis_set import HypothesisSet  # noqa: PLC0415
+
+    hypothesis_set = HypothesisSet.from_dict(hypotheses, CANDY_TYPES)
+    posteriors, next_candy, _ = hypothesis_set.trajectory(hypothesis_set.encode(observations))
+    return posteriors.T, next_candy.T
+
+
+def stream_posterior(
+    hypotheses: "dict[str, dict[str, float]] | HypothesisSet",
+    chunks: Iterable[str],
+    sink: "PosteriorSink",
+    every: int = 1,
+) -> int:
+    """Calculate the posterior probabilities online over a stream of observation chunks
+
+    Every chunk is processed in one shot, starting from the log posteriors left by the previous
+    chunk, so the result does not depend on how the stream is split and nothing is renormalised
+    outside of log space. Chunks are split further so that the (hypothesis, step) arrays stay
+    bounded for large hypothesis sets. The final posteriors are written back to a dictionary of hypotheses
+
+    Arguments:
+        hypotheses: A dictionary of all hypotheses with their initial probabilities and likelihoods, or a HypothesisSet
+        chunks: The consecutive chunks of the observation sequence
+        sink: Where the results are written
+        every: Only the results after every Nth observation are written
+
+    Returns:
+        int: The total number of observations
+    """  # noqa: E501
+    import numpy as np  # noqa: PLC0415
+
+    from hypothesis_set import HypothesisSet  # noqa: PLC0415
+
+    if isinstance(hypotheses, HypothesisSet):
+        hypothesis_set = hypotheses
+    else:
+        hypothesis_set = HypothesisSet.from_dict(hypotheses, CANDY_TYPES)
+    steps_per_block = max(1, MAX_TRAJECTORY_CELLS // len(hypothesis_set.names))
+    log_priors = hypothesis_set.log_priors
+    offset = 0
+    for chunk in chunks:
+        for start in range(0, len(chunk), steps_per_block):
+            block = chunk[start : start + steps_per_block]  # noqa: E203, RUF100
+            posteriors, next_candy, log_priors = hypothesis_set.trajectory(
+                hypothesis_set.encode(block), log_priors
+            )
+            # Only the observations whose 1-based position in the sequence is a multiple of every
+            first = (-offset - 1) % every
+            sink.write_steps(
+                np.arange(offset + first + 1, offset + len(block) + 1, every),
+                block[first::every],
+                posteriors[:, first::every],
+                next_candy[:, first::every],
+            )
+            offset += len(block)
+
+    if not isinstance(hypotheses, HypothesisSet):
+        for hypothesis, log_posterior in zip(hypotheses.values(), log_priors.tolist(), strict=True):
+            hypothesis["prior"] = math.exp(log_posterior)
+    return offset
+
+
+def _write_observation(  # noqa: PLR0913, PLR0917
+    file: TextIO,
+    index: int,
+    observation: str,
+    posteriors: Iterable[tuple[str, float]],
+    p_cherry: float,
+    p_lime: float,
+) -> None:
+    """Write the posteriors and the next candy probabilities after a single observation"""
+    file.write(f"After Observation {index + 1} = {observation}:\n\n")
+
+    for h_name, posterior in posteriors:
+        file.write(f"P({h_name} | Q) = {posterior:.5g}\n")
+
+    file.write(f"\nProbability that the next candy we pick will be C, given Q: {p_cherry:.5g}\n")
+    file.write(f"Probability that the next candy we pick will be L, given Q: {p_lime:.5g}\n\n")
+
+
+@contextlib.contextmanager
+def _open_output(output: Path) -> Iterator[TextIO]:
+    """Open the output file for writing, where a path of '-' writes to stdout instead"""
+    if str(output) == "-":
+        yield sys.stdout
+        sys.stdout.flush()
+        return
+    with Path.open(output, "w") as file:
+        yield file
+
+
+def calculate_posterior(
+    hypotheses: dict[str, dict[str, float]],
+    observations: str,
+    log_space: bool = False,
+    vectorized: bool = False,
+    output: Path = Path("result.txt"),
+) -> None:
     """Calculate the posterior probabilities of all hypotheses based on the given observation sequence
 
     After each observation, the posterior probabilities are calculated and written to a file
@@ -140,30 +254,45 @@ def calculate_posterior(hypotheses: dict[str, dict[str, float]], observations: s
     Arguments:
         hypotheses: A dictionary of all hypotheses with their initial probabilities and likelihoods
         observations: The sequence of observed candy types, either 'C' or 'L'
+        log_space: Whether to update the posteriors in log space
+        vectorized: Whether to compute the whole trajectory at once with posterior_trajectory
+        output: The file the results are written to, or '-' for stdout
     """  # noqa: E501
-    with Path.open("result.txt", "w") as file:
+    with _open_output(output) as file:
         file.write(f"Observation sequence Q: {observations}\n")
         file.write(f"Length of Q: {len(observations)}\n\n")
 
-        for index, observation in enumerate(observations):
-            update_posterior(hypotheses, observation)
-            file.write(f"After Observation {index + 1} = {observation}:\n\n")
-
-            for h_name, h_data in hypotheses.items():
-                file.write(f"P({h_name} | Q) = {h_data['prior']:.5g}\n")
+        if vectorized:
+            posteriors, next_candy = posterior_trajectory(hypotheses, observations)
+            for index, observation in enumerate(observations):
+                p_cherry, p_lime = next_candy[index].tolist()
+                row = zip(hypotheses, posteriors[index].tolist(), strict=True)
+                _write_observation(file, index, observation, row, p_cherry, p_lime)
+            if observations:
+                for h_data, posterior in zip(hypotheses.values(), posteriors[-1], strict=True):
+                    h_data["prior"] = float(posterior)
+            return
 
-            file.write(
-                f"\nProbability that the next candy we pick will be C, given Q: "
-                f"{next_candy_probability(hypotheses, 'cherry'):.5g}\n"
-            )
-            file.write(
-                f"Probability that the next candy we pick will be L, given Q: "
-                f"{next_candy_probability(hypotheses, 'lime'):.5g}\n\n"
+        log_posteriors = None
+        for index, observation in enumerate(observations):
+            # Like calculate_likelihood, anything other than a cherry counts as a lime
+            candy: Literal["C", "L"] = "C" if observation == "C" else "L"
+            if log_space:
+                log_posteriors = update_log_posterior(hypotheses, candy, log_posteriors)
+            else:
+                update_posterior(hypotheses, candy)
+            _write_observation(
+                file,
+                index,
+                observation,
+                ((h_name, h_data["prior"]) for h_name, h_data in hypotheses.items()),
+                next_candy_probability(hypotheses, "cherry"),
+                next_candy_probability(hypotheses, "lime"),
             )
 
 
-def _parse_args(custom_logger: logging.Logger) -> argparse.Namespace:
-    """Parse command-line arguments."""
+def _parse_args(custom_logger: logging.Logger, argv: list[str] | None) -> argparse.Namespace:
+    """Parse command-line arguments, or the given argv instead of sys.argv"""
     parser = ArgparseLogger(
         custom_logger,
         description=" Python script that calculates the posterior probabilities of different hypotheses from a given sequence of observations",  # noqa: E501
@@ -175,14 +304,121 @@ def _parse_args(custom_logger: logging.Logger) -> argparse.Namespace:
         default="",
         help="The observation sequence",
     )
-    return parser.parse_args()
+    parser.add_argument(
+        "--log-space",
+        action="store_true",
+        help="Update the posteriors in log space, for very long observation sequences",
+    )
+    parser.add_argument(
+        "--vectorized",
+        action="store_true",
+        help="Compute the posteriors after every observation at once with NumPy",
+    )
+    parser.add_argument(
+        "--input",
+        type=Path,
+        help="Stream the observations from this file, or from stdin if '-', instead of argv",
+    )
+    parser.add_argument(
+        "--mmap", action="store_true", help="Memory-map the --input file instead of reading it"
+    )
+    parser.add_argument(
+        "--chunk-size",
+        type=int,
+        default=DEFAULT_CHUNK_SIZE,
+        help=f"Observations processed per chunk when streaming (default: {DEFAULT_CHUNK_SIZE})",
+    )
+    parser.add_argument(
+        "--output",
+        type=Path,
+        default=Path("result.txt"),
+        help="Output file, or '-' for stdout (default: result.txt)",
+    )
+    parser.add_argument(
+        "--format",
+        default="text",
+        choices=list(SINKS),
+        help="Output format (default: text, the result.txt layout)",
+    )
+    parser.add_argument(
+        "--every",
+        type=int,
+        default=1,
+        help="Only write the results after every Nth observation (default: 1)",
+    )
+    parser.add_argument(
+        "--hypotheses",
+        type=Path,
+        help="Load the hypotheses from this file instead of using the five candy bags",
+    )
+    parser.add_argument(
+        "--batch",
+        type=Path,
+        help="Evaluate every sequence of this file (one per line), writing one result each",
+    )
+    parser.add_argument(
+        "--workers",
+        type=int,
+        default=1,
+        help="Worker processes for --batch (default: 1)",
+    )
+    args = parser.parse_args(argv)
+
+    # Only the in-memory text output of a single sequence has a log-space or vectorized variant
+    streamed = (args.input, args.hypotheses, args.format, args.every) != (None, None, "text", 1)
+    mode = "--batch" if args.batch is not None else "streaming" if streamed else None
+    if mode is not None and (args.log_space or args.vectorized):
+        parser.error(f"--log-space and --vectorized do not apply to {mode}")
+    if args.mmap and (args.batch is not None or args.input is None or str(args.input) == "-"):
+        parser.error("--mmap only applies to streaming from an --input file")
+    return args
+
+
+def _load_hypotheses(
+    args: argparse.Namespace, hypotheses: dict[str, dict[str, float]]
+) -> "HypothesisSet":
+    """Load the --hypotheses file, falling back to the default candy bags"""
+    from hypothesis_set import HypothesisSet  # noqa: PLC0415
 
+    if args.hypotheses is None:
+        return HypothesisSet.from_dict(hypotheses, CANDY_TYPES)
+    return HypothesisSet.from_file(args.hypotheses)
 
-def main() -> None:
-    """Main function to read the observation sequence from the command line argument and calculate the posterior probabilities"""  # noqa: E501
-    custom_logger = _setup_custom_logger()
 
-    args = _parse_args(custom_logger)
+def _run_batch(
+    args: argparse.Namespace, hypotheses: dict[str, dict[str, float]], logger: Logger
+) -> None:
+    """Evaluate every sequence of the --batch file and write one result per sequence"""
+    from hypothesis_set import batch_posterior  # noqa: PLC0415
+
+    hypothesis_set = _load_hypotheses(args, hypotheses)
+    with Path.open(args.batch, encoding="utf-8") as file:
+        # Blank lines are not sequences, so they neither add results nor shift their numbering
+        sequences = [sequence for line in file if (sequence := line.strip())]
+
+    posteriors, next_candy = batch_posterior(hypothesis_set, sequences, args.workers)
+    write_batch_results(
+        args.output,
+        args.format,
+        hypothesis_set,
+        [len(sequence) for sequence in sequences],
+        posteriors,
+        next_candy,
+    )
+    logger.info(
+        f"Evaluated {len(sequences)} sequences against {len(hypothesis_set.names)} hypotheses"
+    )
+
+
+def main(argv: list[str] | None = None) -> None:
+    """Main function to read the observation sequence from the command line argument and calculate the posterior probabilities
+
+    Arguments:
+        argv: The command line arguments, or None for sys.argv
+    """  # noqa: E501
+    custom_logger = setup_logging()
+
+    args = _parse_args(custom_logger, argv)
 
     observations: str = args.observation
 
@@ -194,7 +430,31 @@ def main() -> None:
         "h5": {"prior": 0.10, "cherry": 0.00, "lime": 1.00},
     }
 
-    calculate_posterior(hypotheses, observations)
+    if args.every < 1 or args.chunk_size < 1 or args.workers < 1:
+        custom_logger.error("--every, --chunk-size and --workers must be greater than 0")
+        sys.exit(1)
+
+    if args.batch is not None:
+        _run_batch(args, hypotheses, custom_logger)
+        return
+
+    if (args.input, args.hypotheses, args.format, args.every) == (None, None, "text", 1):
+        calculate_posterior(hypotheses, observations, args.log_space, args.vectorized, args.output)
+        return
+
+    if args.input is None:
+        chunks: Iterable[str] = [observations]
+        source = "argv"
+    else:
+        chunks = read_observation_chunks(args.input, args.chunk_size, args.mmap)
+        source = str(args.input)
+
+    hypothesis_set = _load_hypotheses(args, hypotheses)
+    with SINKS[args.format](args.output, hypothesis_set.names, hypothesis_set.codes) as sink:
+        sink.write_header(observations if args.input is None else None, source)
+        length = stream_posterior(hypothesis_set, chunks, sink, args.every)
+        sink.write_footer(length)
+    custom_logger.info(f"Processed {length} observations from {source}")
 
 
 if __name__ == "__main__":
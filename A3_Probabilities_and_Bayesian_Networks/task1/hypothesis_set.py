@@ -0,0 +1,287 @@
+"""Array representation of a set of candy bag hypotheses over any number of candy types
+
+A HypothesisSet holds the prior vector and the (candy type, hypothesis) likelihood matrix, which is
+what the vectorized posterior computations work on, and can be loaded from a hypothesis file:
+
+    # Lines starting with '#' are comments
+    hypothesis prior C L
+    h1 0.10 1.00 0.00
+    h2 0.20 0.75 0.25
+    END OF INPUT
+
+The header names the observation code of every candy type after the 'hypothesis' and 'prior'
+columns, and every following line gives a hypothesis name, its prior and P(candy | hypothesis)
+for every candy type, in the order of the header.
+
+Classes:
+    - HypothesisSet
+
+Functions:
+    - batch_posterior
+"""
+
+import math
+
+from collections.abc import Sequence
+from concurrent.futures import ProcessPoolExecutor
+from functools import partial
+from pathlib import Path
+from typing import Final, Self
+
+import numpy as np
+import numpy.typing as npt
+
+
+__all__ = ["HypothesisSet", "batch_posterior"]
+
+_TOLERANCE: Final[float] = 1e-6
+
+
+class HypothesisSet:
+    """The priors and likelihoods of a set of hypotheses
+
+    Attributes:
+        names (list[str]): The name of every hypothesis
+        priors (np.ndarray): The prior of every hypothesis
+        likelihoods (np.ndarray): The (candy type, hypothesis) matrix of P(candy | hypothesis)
+        codes (str): The single-character observation code of every candy type
+    """
+
+    def __init__(
+        self,
+        names: list[str],
+        priors: npt.NDArray[np.float64],
+        likelihoods: npt.NDArray[np.float64],
+        codes: str,
+    ) -> None:
+        """Initialize the HypothesisSet, checking that every distribution adds up to 1.
+
+        Args:
+            names: The name of every hypothesis
+            priors: The prior of every hypothesis
+            likelihoods: The (candy type, hypothesis) matrix of P(candy | hypothesis)
+            codes: The single-character observation code of every candy type
+
+        Raises:
+            ValueError: If the shapes disagree or the probabilities are not distributions
+        """
+        if likelihoods.shape != (len(codes), len(names)) or priors.shape != (len(names),):
+            raise ValueError("Expected one prior per hypothesis and one likelihood per candy type")
+        if len(set(codes)) != len(codes):
+            raise ValueError(f"The observation codes {codes!r} are not unique")
+        if (priors < 0).any() or abs(priors.sum() - 1) > _TOLERANCE:
+            raise ValueError("The priors must be non-negative and add up to 1")
+        if (likelihoods < 0).any() or (np.abs(likelihoods.sum(axis=0) - 1) > _TOLERANCE).any():
+            raise ValueError("The likelihoods of every hypothesis must add up to 1")
+
+        self.names = names
+        self.priors = priors
+        self.likelihoods = likelihoods
+        self.codes = codes
+        self._lookup = np.full(256, -1, dtype=np.int16)
+        for index, code in enumerate(codes):
+            self._lookup[ord(code)] = index
+
+    @classmethod
+    def from_dict(
+        cls, hypotheses: dict[str, dict[str, float]], candy_types: dict[str, str]
+    ) -> Self:
+        """Build the set from the dictionary representation used by compute_a_posteriori.
+
+        Args:
+            hypotheses: A dictionary of all hypotheses with their probabilities and likelihoods
+            candy_types: The candy type key in the hypotheses of every observation code
+
+        Returns:
+            HypothesisSet: The hypotheses as arrays
+        """
+        return cls(
+            list(hypotheses),
+            np.array([hypothesis["prior"] for hypothesis in hypotheses.values()]),
+            np.array([[h[candy] for h in hypotheses.values()] for candy in candy_types.values()]),
+            "".join(candy_types),
+        )
+
+    @classmethod
+    def from_file(cls, filename: Path) -> Self:
+        """Parses a hypothesis file into a prior vector and a likelihood matrix.
+
+        Args:
+            filename: The file containing the hypotheses
+
+        Returns:
+            HypothesisSet: The hypotheses of the file
+
+        Raises:
+            ValueError: If the file is malformed
+        """
+        codes: list[str] = []
+        names: list[str] = []
+        rows: list[list[float]] = []
+        with Path.open(filename, encoding="utf-8") as file:
+            for line in file:
+                if line.strip() == "END OF INPUT":
+                    break
+                parts = line.split()
+                if not parts or parts[0].startswith("#"):
+                    continue
+                if not codes:
+                    codes = parts[2:]
+                    if not codes or any(len(code) != 1 for code in codes):
+                        raise ValueError(f"Invalid header in {filename}: {line.strip()!r}")
+                    continue
+                if len(parts) != len(codes) + 2:
+                    raise ValueError(f"Expected {len(codes) + 2} columns in {line.strip()!r}")
+                names.append(parts[0])
+                rows.append([float(value) for value in parts[1:]])
+
+        if not rows:
+            raise ValueError(f"No hypotheses found in {filename}")
+        values = np.array(rows)
+        return cls(names, values[:, 0], np.ascontiguousarray(values[:, 1:].T), "".join(codes))
+
+    @property
+    def log_priors(self) -> npt.NDArray[np.float64]:
+        """The log prior of every hypothesis, -inf for a prior of 0"""
+        log_priors: npt.NDArray[np.float64] = np.log(
+            self.priors, out=np.full_like(self.priors, -np.inf), where=self.priors > 0
+        )
+        return log_priors
+
+    def encode(self, observations: str) -> npt.NDArray[np.int16]:
+        """Encode the observation sequence as candy type indices.
+
+        Args:
+            observations: The sequence of observed candy codes
+
+        Returns:
+            np.ndarray: The index of the candy type of every observation
+
+        Raises:
+            ValueError: If the sequence contains an unknown observation code
+        """
+        raw = np.frombuffer(observations.encode("latin-1", "replace"), dtype=np.uint8)
+        encoded = self._lookup[raw]
+        if (encoded < 0).any():
+            raise ValueError(f"The observation sequence may only contain {list(self.codes)}")
+        return encoded
+
+    def trajectory(
+        self, encoded: npt.NDArray[np.int16], log_priors: npt.NDArray[np.float64] | None = None
+    ) -> tuple[npt.NDArray[np.float64], npt.NDArray[np.float64], npt.NDArray[np.float64]]:
+        """Compute the posteriors after every observation in one shot.
+
+        The candies are i.i.d. given the hypothesis, so after k observations the log posterior of
+        a hypothesis is its log prior plus the candy counts so far times their log-likelihoods. The
+        counts come from a cumulative sum and every step is normalised with a softmax over the
+        hypotheses. Everything is laid out as (hypothesis, step) so the reductions over the
+        hypotheses run across contiguous rows instead of along short inner axes
+
+        Args:
+            encoded: The candy type index of every observation
+            log_priors: The log priors to start from, the priors of the set if None
+
+        Returns:
+            tuple[np.ndarray, np.ndarray, np.ndarray]: The (hypothesis, step) posteriors, the
+            (candy type, step) next candy probabilities and the normalised log posteriors after
+            the last step
+
+        Raises:
+            ValueError: If the observations are impossible under every hypothesis
+        """
+        if log_priors is None:
+            log_priors = self.log_priors
+        if not len(encoded):
+            no_steps = np.empty((len(self.names), 0))
+            return no_steps, self.likelihoods @ no_steps, log_priors
+
+        counts = np.empty((len(self.codes), len(encoded)))
+        for candy in range(len(self.codes)):
+            np.cumsum(encoded == candy, out=counts[candy])
+
+        # Zero likelihoods are left out of the product and applied as -inf from the first time
+        # the candy is seen, since 0 * log(0) would turn every step before that into nan
+        possible = self.likelihoods > 0
+        log_likelihoods = np.log(
+            self.likelihoods, out=np.zeros_like(self.likelihoods), where=possible
+        )
+        log_posteriors = log_likelihoods.T @ counts
+        log_posteriors += log_priors[:, None]
+        seen = counts[:, -1] > 0
+        first_seen = np.argmax(counts > 0, axis=1)
+        for candy, hypothesis in zip(*np.nonzero(~possible & seen[:, None]), strict=True):
+            log_posteriors[hypothesis, first_seen[candy] :] = -np.inf  # noqa: E203, RUF100
+
+        peak = log_posteriors.max(axis=0)
+        if np.isneginf(peak).any():
+            raise ValueError("The observation sequence is impossible under every hypothesis")
+        log_posteriors -= peak
+        last = log_posteriors[:, -1].copy()
+        posteriors = np.exp(log_posteriors, out=log_posteriors)
+        totals = posteriors.sum(axis=0)
+        posteriors /= totals
+        return posteriors, self.likelihoods @ posteriors, last - math.log(totals[-1])
+
+
+def _batch_chunk(
+    hypothesis_set: HypothesisSet, sequences: Sequence[str]
+) -> tuple[npt.NDArray[np.float64], npt.NDArray[np.float64]]:
+    """Compute the final posteriors of a chunk of sequences as one matrix operation"""
+    counts = np.array(
+        [[sequence.count(code) for code in hypothesis_set.codes] for sequence in sequences],
+        dtype=float,
+    ).reshape(len(sequences), len(hypothesis_set.codes))
+    if (counts.sum(axis=1) != [len(sequence) for sequence in sequences]).any():
+        raise ValueError(f"The sequences may only contain {list(hypothesis_set.codes)}")
+
+    possible = hypothesis_set.likelihoods > 0
+    log_likelihoods = np.log(
+        hypothesis_set.likelihoods, out=np.zeros_like(hypothesis_set.likelihoods), where=possible
+    )
+    log_posteriors = counts @ log_likelihoods + hypothesis_set.log_priors
+    # A sequence rules out every hypothesis that gives 0 likelihood to one of its candies
+    log_posteriors[(counts > 0).astype(float) @ (~possible) > 0] = -np.inf
+
+    peak = log_posteriors.max(axis=1, keepdims=True)
+    if np.isneginf(peak).any():
+        raise ValueError("A sequence is impossible under every hypothesis")
+    posteriors = np.exp(log_posteriors - peak)
+    posteriors /= posteriors.sum(axis=1, keepdims=True)
+    return posteriors, posteriors @ hypothesis_set.likelihoods.T
+
+
+def batch_posterior(
+    hypothesis_set: HypothesisSet,
+    sequences: Sequence[str],
+    workers: int = 1,
+    chunk_size: int = 1024,
+) -> tuple[npt.NDArray[np.float64], npt.NDArray[np.float64]]:
+    """Compute the final posteriors of many observation sequences at once
+
+    Only the final posteriors depend on the candy counts of each sequence, so a chunk of sequences
+    becomes a (sequence, candy type) count matrix multiplied by the log-likelihood matrix, followed by
+    a softmax over the hypotheses. Chunks are spread over a process pool when workers > 1
+
+    Arguments:
+        hypothesis_set: The hypotheses to evaluate the sequences against
+        sequences: The observation sequences
+        workers: The number of worker processes
+        chunk_size: The number of sequences per matrix operation
+
+    Returns:
+        tuple[np.ndarray, np.ndarray]: The (sequence, hypothesis) posteriors and the (sequence, candy type) next candy probabilities
+    """  # noqa: E501
+    chunks = [
+        sequences[start : start + chunk_size]  # noqa: E203, RUF100
+        for start in range(0, len(sequences), chunk_size)
+    ]
+    if not chunks:
+        return np.empty((0, len(hypothesis_set.names))), np.empty((0, len(hypothesis_set.codes)))
+
+    compute = partial(_batch_chunk, hypothesis_set)
+    if workers > 1 and len(chunks) > 1:
+        with ProcessPoolExecutor(max_workers=workers) as executor:
+            results = list(executor.map(compute, chunks))
+    else:
+        results = [compute(chunk) for chunk in chunks]
+    return np.vstack([p for p, _ in results]), np.vstack([n for _, n in results])
@@ -0,0 +1,383 @@
+"""Streaming observation readers and buffered result sinks for compute_a_posteriori
+
+Readers yield the observation sequence in chunks, so sequences far larger than the OS argument
+length (or than memory) can be processed online. Sinks receive the posteriors of a whole chunk at a
+time and issue a single buffered write per chunk.
+
+Classes:
+    - PosteriorSink
+    - TextSink
+    - CsvSink
+    - BinarySink
+
+Functions:
+    - read_observation_chunks
+    - write_batch_results
+"""
+
+import io
+import mmap
+import sys
+
+from abc import ABC, abstractmethod
+from collections.abc import Iterator
+from pathlib import Path
+from types import TracebackType
+from typing import IO, TYPE_CHECKING, Any, ClassVar, Final, Self
+
+
+# NumPy is imported by the sinks and write_batch_results when they run, so that importing this
+# module for its constants does not slow down compute_a_posteriori when it does not stream
+if TYPE_CHECKING:
+    import numpy as np
+    import numpy.typing as npt
+
+    from hypothesis_set import HypothesisSet
+
+
+__all__ = [
+    "SINKS",
+    "BinarySink",
+    "CsvSink",
+    "PosteriorSink",
+    "TextSink",
+    "read_observation_chunks",
+    "write_batch_results",
+]
+
+DEFAULT_CHUNK_SIZE: Final[int] = 1 << 20
+DEFAULT_BUFFER_SIZE: Final[int] = 1 << 20
+_WHITESPACE: Final[bytes] = b" \t\r\n"
+
+
+def _clean(chunk: bytes) -> str:
+    """Strip the whitespace (e.g. line breaks) out of a raw chunk of observations"""
+    return chunk.translate(None, _WHITESPACE).decode("latin-1")
+
+
+def read_observation_chunks(
+    source: Path | None, chunk_size: int = DEFAULT_CHUNK_SIZE, memory_map: bool = False
+) -> Iterator[str]:
+    """Read the observation sequence incrementally from a file or from stdin
+
+    Arguments:
+        source: The file containing the observations, or None (or '-') to read from stdin
+        chunk_size: The number of bytes read per chunk
+        memory_map: Whether to memory-map the file instead of reading it, for huge files
+
+    Yields:
+        str: The next non-empty chunk of observations, with any whitespace removed
+    """
+    if source is None or str(source) == "-":
+        # read1 returns whatever the pipe holds instead of waiting for a full chunk
+        stdin: IO[bytes] | io.BufferedIOBase = sys.stdin.buffer
+        read = stdin.read1 if isinstance(stdin, io.BufferedIOBase) else stdin.read
+        while chunk := read(chunk_size):
+            if cleaned := _clean(chunk):
+                yield cleaned
+        return
+
+    with Path.open(source, "rb") as file:
+        if not memory_map:
+            while chunk := file.read(chunk_size):
+                if cleaned := _clean(chunk):
+                    yield cleaned
+            return
+
+        # mmap cannot map an empty file
+        if Path(source).stat().st_size == 0:
+            return
+        with mmap.mmap(file.fileno(), 0, access=mmap.ACCESS_READ) as mapped:
+            for start in range(0, len(mapped), chunk_size):
+                if cleaned := _clean(mapped[start : start + chunk_size]):  # noqa: E203, RUF100
+                    yield cleaned
+
+
+def _open_output(path: Path, binary: bool, buffer_size: int = DEFAULT_BUFFER_SIZE) -> IO[Any]:
+    """Open an output file for writing, or stdout if the path is '-'"""
+    if str(path) == "-" and binary:
+        return sys.stdout.buffer
+    if str(path) == "-":
+        return sys.stdout
+    if binary:
+        return Path.open(path, "wb", buffering=buffer_size)
+    return Path.open(path, "w", buffering=buffer_size, encoding="utf-8")
+
+
+class PosteriorSink(ABC):
+    """Base class for the destinations of the posteriors computed after each observation
+
+    Attributes:
+        names (list[str]): The names of the hypotheses
+        codes (str): The observation code of every candy type
+        file (IO): The buffered output file
+    """
+
+    binary: ClassVar[bool] = False
+
+    def __init__(
+        self,
+        path: Path,
+        names: list[str],
+        codes: str,
+        buffer_size: int = DEFAULT_BUFFER_SIZE,
+    ) -> None:
+        """Open the output, where a path of '-' writes to stdout.
+
+        Args:
+            path: The output file
+            names: The names of the hypotheses
+            codes: The observation code of every candy type
+            buffer_size: The size of the write buffer in bytes
+        """
+        self.names = names
+        self.codes = codes
+        self._owns_file = str(path) != "-"
+        self.file = _open_output(path, self.binary, buffer_size)
+
+    def __enter__(self) -> Self:
+        """Return the sink itself."""
+        return self
+
+    def __exit__(
+        self,
+        exc_type: type[BaseException] | None,
+        exc_value: BaseException | None,
+        exc_traceback: TracebackType | None,
+    ) -> None:
+        """Flush the buffered output and close the file."""
+        self.file.flush()
+        if self._owns_file:
+            self.file.close()
+
+    def write_header(self, observations: str | None, source: str) -> None:  # noqa: B027
+        """Write whatever precedes the first observation, if the format has a header.
+
+        Args:
+            observations: The whole observation sequence, or None when it is streamed
+            source: A description of where the observations come from
+        """
+
+    @abstractmethod
+    def write_steps(
+        self,
+        steps: "npt.NDArray[np.int64]",
+        observations: str,
+        posteriors: "npt.NDArray[np.float64]",
+        next_candy: "npt.NDArray[np.float64]",
+    ) -> None:
+        """Write the results after a batch of observations.
+
+        Args:
+            steps: The 1-based position of every observation in the whole sequence
+            observations: The observations themselves
+            posteriors: The (hypothesis, observation) posteriors
+            next_candy: The (candy type, observation) next candy probabilities
+        """
+
+    def write_footer(self, length: int) -> None:  # noqa: B027
+        """Write whatever follows the last observation, if the format has a footer.
+
+        Args:
+            length: The total number of observations
+        """
+
+
+class TextSink(PosteriorSink):
+    """Writes the human-readable result.txt format"""
+
+    _streamed: bool = False
+
+    def write_header(self, observations: str | None, source: str) -> None:
+        """Write the observation sequence and its length, or the source when streaming."""
+        self._streamed = observations is None
+        if observations is None:
+            self.file.write(f"Observation sequence Q: (streamed from {source})\n\n")
+        else:
+            self.file.write(f"Observation sequence Q: {observations}\n")
+            self.file.write(f"Length of Q: {len(observations)}\n\n")
+
+    def write_steps(
+        self,
+        steps: "npt.NDArray[np.int64]",
+        observations: str,
+        posteriors: "npt.NDArray[np.float64]",
+        next_candy: "npt.NDArray[np.float64]",
+    ) -> None:
+        """Format the batch of observations and write it in one go."""
+        parts: list[str] = []
+        for step, observation, row_posteriors, row_next in zip(
+            steps.tolist(), observations, posteriors.T.tolist(), next_candy.T.tolist(), strict=True
+        ):
+            parts.append(f"After Observation {step} = {observation}:\n\n")
+            parts.extend(
+                f"P({name} | Q) = {posterior:.5g}\n"
+                for name, posterior in zip(self.names, row_posteriors, strict=True)
+            )
+            parts.append("\n")
+            parts.extend(
+                f"Probability that the next candy we pick will be {code}, given Q: {p_next:.5g}\n"
+                for code, p_next in zip(self.codes, row_next, strict=True)
+            )
+            parts.append("\n")
+        self.file.write("".join(parts))
+
+    def write_footer(self, length: int) -> None:
+        """Write the length of a streamed sequence, which is only known at the end."""
+        if self._streamed:
+            self.file.write(f"Length of Q: {length}\n")
+
+
+class CsvSink(PosteriorSink):
+    """Writes one CSV row per observation: step, observation, posteriors, next candy"""
+
+    def write_header(self, observations: str | None, source: str) -> None:  # noqa: ARG002
+        """Write the column names."""
+        columns = [
+            "step",
+            "observation",
+            *(f"P({name} | Q)" for name in self.names),
+            *(f"P(next = {code} | Q)" for code in self.codes),
+        ]
+        self.file.write(",".join(columns) + "\n")
+
+    def write_steps(
+        self,
+        steps: "npt.NDArray[np.int64]",
+        observations: str,
+        posteriors: "npt.NDArray[np.float64]",
+        next_candy: "npt.NDArray[np.float64]",
+    ) -> None:
+        """Format the batch of observations and write it in one go."""
+        import numpy as np  # noqa: PLC0415
+
+        values = np.vstack((posteriors, next_candy)).T.tolist()
+        self.file.write(
+            "".join(
+                f"{step},{observation},{','.join(f'{value:.10g}' for value in row_values)}\n"
+                for step, observation, row_values in zip(
+                    steps.tolist(), observations, values, strict=True
+                )
+            )
+        )
+
+
+class BinarySink(PosteriorSink):
+    """Writes little-endian float64 records: step, posteriors, next candy probabilities
+
+    Every record holds 1 + len(names) + len(codes) values, so the output can be loaded back with
+    np.fromfile(path, '<f8').reshape(-1, 1 + len(names) + len(codes))
+    """
+
+    binary: ClassVar[bool] = True
+
+    def write_steps(
+        self,
+        steps: "npt.NDArray[np.int64]",
+        observations: str,  # noqa: ARG002
+        posteriors: "npt.NDArray[np.float64]",
+        next_candy: "npt.NDArray[np.float64]",
+    ) -> None:
+        """Write the batch of observations as one block of records."""
+        import numpy as np  # noqa: PLC0415
+
+        records = np.vstack((steps, posteriors, next_candy)).T
+        self.file.write(np.ascontiguousarray(records, dtype="<f8").tobytes())
+
+
+SINKS: Final[dict[str, type[PosteriorSink]]] = {
+    "text": TextSink,
+    "csv": CsvSink,
+    "binary": BinarySink,
+}
+
+
+def _format_batch(
+    output_format: str,
+    hypothesis_set: "HypothesisSet",
+    indices: list[int],
+    lengths: list[int],
+    values: list[list[float]],
+) -> str:
+    """Format the results of a block of sequences as text or CSV"""
+    names, codes = hypothesis_set.names, hypothesis_set.codes
+    if output_format == "csv":
+        return "".join(
+            f"{index + 1},{length},{','.join(f'{value:.10g}' for value in row)}\n"
+            for index, length, row in zip(indices, lengths, values, strict=True)
+        )
+
+    parts: list[str] = []
+    for index, length, row in zip(indices, lengths, values, strict=True):
+        parts.append(f"Sequence {index + 1} (length {length}):\n\n")
+        parts.extend(
+            f"P({name} | Q) = {posterior:.5g}\n"
+            for name, posterior in zip(names, row[: len(names)], strict=True)
+        )
+        parts.append("\n")
+        parts.extend(
+            f"Probability that the next candy we pick will be {code}, given Q: {p_next:.5g}\n"
+            for code, p_next in zip(codes, row[len(names) :], strict=True)  # noqa: E203, RUF100
+        )
+        parts.append("\n")
+    return "".join(parts)
+
+
+def write_batch_results(  # noqa: PLR0913, PLR0917
+    path: Path,
+    output_format: str,
+    hypothesis_set: "HypothesisSet",
+    lengths: list[int],
+    posteriors: "npt.NDArray[np.float64]",
+    next_candy: "npt.NDArray[np.float64]",
+    block_size: int = 1024,
+) -> None:
+    """Write the final posteriors of a batch of sequences, one result per sequence
+
+    The binary format holds little-endian float64 records of the sequence number, its length, the
+    posteriors and the next candy probabilities
+
+    Arguments:
+        path: The output file, or '-' for stdout
+        output_format: One of 'text', 'csv' or 'binary'
+        hypothesis_set: The hypotheses the sequences were evaluated against
+        lengths: The length of every sequence
+        posteriors: The (sequence, hypothesis) posteriors
+        next_candy: The (sequence, candy type) next candy probabilities
+        block_size: The number of sequences formatted per buffered write
+    """
+    import numpy as np  # noqa: PLC0415
+
+    binary = output_format == "binary"
+    file = _open_output(path, binary)
+    try:
+        if output_format == "csv":
+            columns = [
+                "sequence",
+                "length",
+                *(f"P({name} | Q)" for name in hypothesis_set.names),
+                *(f"P(next = {code} | Q)" for code in hypothesis_set.codes),
+            ]
+            file.write(",".join(columns) + "\n")
+
+        for start in range(0, len(lengths), block_size):
+            stop = min(start + block_size, len(lengths))
+            values = np.hstack((posteriors[start:stop], next_candy[start:stop]))
+            if binary:
+                indices = np.arange(start + 1, stop + 1)
+                records = np.column_stack((indices, lengths[start:stop], values))
+                file.write(np.ascontiguousarray(records, dtype="<f8").tobytes())
+            else:
+                file.write(
+                    _format_batch(
+                        output_format,
+                        hypothesis_set,
+                        list(range(start, stop)),
+                        lengths[start:stop],
+                        values.tolist(),
+                    )
+                )
+    finally:
+        file.flush()
+        if str(path) != "-":
+            file.close()
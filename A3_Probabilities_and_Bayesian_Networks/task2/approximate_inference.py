@@ -0,0 +1,398 @@
+"""Approximate inference for the Bayesian Network using batched NumPy sampling
+
+Every sampler draws its samples in NumPy batches instead of one at a time, takes a seedable random
+number generator, stops once either the sample budget or the time budget is exhausted, and reports a
+normal-approximation confidence interval alongside its estimate.
+
+Functions:
+    - rejection_sampling
+    - likelihood_weighting
+    - gibbs_sampling
+"""
+
+import time
+
+from collections.abc import Callable, Iterator
+from dataclasses import dataclass
+from statistics import NormalDist
+from typing import TYPE_CHECKING, Final
+
+import numpy as np
+import numpy.typing as npt
+
+
+if TYPE_CHECKING:
+    from bnet import BayesianNetwork
+
+
+__all__ = [
+    "SAMPLERS",
+    "SamplingResult",
+    "gibbs_sampling",
+    "likelihood_weighting",
+    "rejection_sampling",
+]
+
+DEFAULT_SAMPLES: Final[int] = 1_000_000
+DEFAULT_BATCH_SIZE: Final[int] = 1_000_000
+DEFAULT_CHAINS: Final[int] = 10_000
+DEFAULT_BURN_IN: Final[int] = 50
+
+_Probabilities = npt.NDArray[np.float64]
+_Mask = npt.NDArray[np.bool_]
+_Tables = dict[str, tuple[tuple[str, ...], _Probabilities]]
+_Sample = dict[str, _Mask]
+_Seed = int | np.random.Generator | None
+
+
+@dataclass(frozen=True)
+class SamplingResult:
+    """The estimate produced by one of the samplers
+
+    Attributes:
+        probability: The estimated probability
+        lower: The lower end of the confidence interval
+        upper: The upper end of the confidence interval
+        confidence: The confidence level of the interval
+        samples: The number of samples drawn
+        effective_samples: The number of samples the estimate is effectively based on
+        elapsed: The wall-clock time spent sampling, in seconds
+    """
+
+    probability: float
+    lower: float
+    upper: float
+    confidence: float
+    samples: int
+    effective_samples: float
+    elapsed: float
+
+
+def _probability_tables(network: "BayesianNetwork") -> _Tables:
+    """Flattens every CPT into an array indexed by the bit pattern of the parent states
+
+    Arguments:
+        network: Bayesian Network object
+
+    Returns:
+        _Tables: The parents and the P(variable = True | parents) array of every variable
+    """
+    tables: _Tables = {}
+    for variable, parents in network.parents.items():
+        table = np.empty(2 ** len(parents))
+        for states, probability in network.cpt[variable].items():
+            table[sum(state << bit for bit, state in enumerate(states))] = probability
+        tables[variable] = (parents, table)
+    return tables
+
+
+def _p_true(tables: _Tables, variable: str, sample: _Sample, size: int) -> _Probabilities:
+    """Looks up P(variable = True | parents) for every sample in the batch"""
+    parents, table = tables[variable]
+    index = np.zeros(size, dtype=np.intp)
+    for bit, parent in enumerate(parents):
+        index |= sample[parent].astype(np.intp) << bit
+    return table[index]
+
+
+def _matches(sample: _Sample, events: dict[str, bool], size: int) -> _Mask:
+    """Returns a mask of the samples that agree with every one of the given events"""
+    mask = np.ones(size, dtype=bool)
+    for variable, state in events.items():
+        mask &= sample[variable] == state
+    return mask
+
+
+def _clamped_sample(
+    network: "BayesianNetwork",
+    tables: _Tables,
+    evidence: dict[str, bool],
+    rng: np.random.Generator,
+    size: int,
+) -> tuple[_Sample, _Probabilities]:
+    """Draws a batch of forward samples with the evidence clamped
+
+    Returns:
+        tuple: The samples and the likelihood of the evidence for each of them
+    """
+    sample: _Sample = {}
+    weights = np.ones(size)
+    for variable in network.variables:
+        p_true = _p_true(tables, variable, sample, size)
+        if variable in evidence:
+            sample[variable] = np.full(size, evidence[variable])
+            weights *= p_true if evidence[variable] else 1 - p_true
+        else:
+            sample[variable] = rng.random(size) < p_true
+    return sample, weights
+
+
+def _batch_sizes(samples: int | None, batch_size: int, time_budget: float | None) -> Iterator[int]:
+    """Yields batch sizes until the sample budget or the time budget is used up
+
+    At least one batch is always yielded, so a tiny time budget still produces an estimate.
+    """
+    if samples is None and time_budget is None:
+        raise ValueError("Either a sample budget or a time budget is required")
+    if samples is not None and samples < 1:
+        raise ValueError("The sample budget must be at least 1")
+    deadline = None if time_budget is None else time.perf_counter() + time_budget
+    drawn = 0
+    while samples is None or drawn < samples:
+        size = batch_size if samples is None else min(batch_size, samples - drawn)
+        yield size
+        drawn += size
+        if deadline is not None and time.perf_counter() >= deadline:
+            return
+
+
+def _result(  # noqa: PLR0913
+    probability: float,
+    variance: float,
+    *,
+    confidence: float,
+    samples: int,
+    effective_samples: float,
+    started: float,
+) -> SamplingResult:
+    """Builds the SamplingResult with a normal-approximation confidence interval"""
+    margin = NormalDist().inv_cdf(0.5 + confidence / 2) * max(variance, 0.0) ** 0.5
+    return SamplingResult(
+        probability=probability,
+        lower=max(0.0, probability - margin),
+        upper=min(1.0, probability + margin),
+        confidence=confidence,
+        samples=samples,
+        effective_samples=effective_samples,
+        elapsed=time.perf_counter() - started,
+    )
+
+
+def rejection_sampling(  # noqa: PLR0913
+    network: "BayesianNetwork",
+    c1: dict[str, bool],
+    c2: dict[str, bool],
+    *,
+    samples: int | None = DEFAULT_SAMPLES,
+    time_budget: float | None = None,
+    batch_size: int = DEFAULT_BATCH_SIZE,
+    confidence: float = 0.95,
+    seed: _Seed = None,
+) -> SamplingResult:
+    """Estimates P(c1 | c2) by logic sampling from the prior and rejecting samples inconsistent with c2
+
+    Arguments:
+        network: Bayesian Network object
+        c1: Dictionary representing the first set of events
+        c2: Dictionary representing the second set of events
+        samples: The maximum number of samples to draw, or None to rely on the time budget
+        time_budget: The maximum number of seconds to spend sampling, or None for no limit
+        batch_size: The number of samples drawn per NumPy batch
+        confidence: The confidence level of the reported interval
+        seed: Seed or generator for the random number generator
+
+    Returns:
+        SamplingResult: The estimate together with its confidence interval
+    """  # noqa: E501
+    started = time.perf_counter()
+    rng = np.random.default_rng(seed)
+    tables = _probability_tables(network)
+    drawn = accepted = hits = 0
+
+    for size in _batch_sizes(samples, batch_size, time_budget):
+        sample: _Sample = {}
+        for variable in network.variables:
+            sample[variable] = rng.random(size) < _p_true(tables, variable, sample, size)
+        consistent = _matches(sample, c2, size)
+        drawn += size
+        accepted += int(np.count_nonzero(consistent))
+        hits += int(np.count_nonzero(consistent & _matches(sample, c1, size)))
+
+    probability = hits / accepted if accepted else 0.0
+    variance = probability * (1 - probability) / accepted if accepted else 0.0
+    return _result(
+        probability,
+        variance,
+        confidence=confidence,
+        samples=drawn,
+        effective_samples=accepted,
+        started=started,
+    )
+
+
+def likelihood_weighting(  # noqa: PLR0913
+    network: "BayesianNetwork",
+    c1: dict[str, bool],
+    c2: dict[str, bool],
+    *,
+    samples: int | None = DEFAULT_SAMPLES,
+    time_budget: float | None = None,
+    batch_size: int = DEFAULT_BATCH_SIZE,
+    confidence: float = 0.95,
+    seed: _Seed = None,
+) -> SamplingResult:
+    """Estimates P(c1 | c2) by clamping the evidence and weighting each sample by its likelihood
+
+    Without c2 the events in c1 are clamped and P(c1) is the mean weight, which keeps rare joint
+    events estimable. With c2 the ratio estimator is used, with its variance from the delta method.
+
+    Arguments:
+        network: Bayesian Network object
+        c1: Dictionary representing the first set of events
+        c2: Dictionary representing the second set of events
+        samples: The maximum number of samples to draw, or None to rely on the time budget
+        time_budget: The maximum number of seconds to spend sampling, or None for no limit
+        batch_size: The number of samples drawn per NumPy batch
+        confidence: The confidence level of the reported interval
+        seed: Seed or generator for the random number generator
+
+    Returns:
+        SamplingResult: The estimate together with its confidence interval
+    """
+    started = time.perf_counter()
+    rng = np.random.default_rng(seed)
+    tables = _probability_tables(network)
+    drawn = 0
+    # Running sums of w, w * x, w^2 and w^2 * x, where x is 1 when the sample agrees with c1
+    sums = np.zeros(4)
+
+    for size in _batch_sizes(samples, batch_size, time_budget):
+        sample, weights = _clamped_sample(network, tables, c2 or c1, rng, size)
+        hits = _matches(sample, c1, size)
+        drawn += size
+        sums += (weights.sum(), weights[hits].sum(), (weights**2).sum(), (weights[hits] ** 2).sum())
+
+    sum_w, sum_wx, sum_w2, sum_w2x = (float(value) for value in sums)
+    effective_samples = sum_w**2 / sum_w2 if sum_w2 else 0.0
+    if not c2:
+        probability = sum_wx / drawn
+        variance = (sum_w2x / drawn - probability**2) / drawn
+    elif sum_w:
+        probability = sum_wx / sum_w
+        variance = (sum_w2x * (1 - 2 * probability) + probability**2 * sum_w2) / sum_w**2
+    else:
+        probability = variance = 0.0
+    return _result(
+        probability,
+        variance,
+        confidence=confidence,
+        samples=drawn,
+        effective_samples=effective_samples,
+        started=started,
+    )
+
+
+def _chain_count(chains: int, samples: int | None) -> int:
+    """Checks the number of Gibbs chains against the sample budget
+
+    A sample budget smaller than one sweep runs fewer chains, so at least one sweep is kept.
+    """
+    if chains < 1:
+        raise ValueError("At least one chain is required")
+    if samples is None:
+        return chains
+    if samples < 1:
+        raise ValueError("The sample budget must be at least 1")
+    return min(chains, samples)
+
+
+def gibbs_sampling(  # noqa: PLR0913
+    network: "BayesianNetwork",
+    c1: dict[str, bool],
+    c2: dict[str, bool],
+    *,
+    samples: int | None = DEFAULT_SAMPLES,
+    time_budget: float | None = None,
+    chains: int = DEFAULT_CHAINS,
+    burn_in: int = DEFAULT_BURN_IN,
+    confidence: float = 0.95,
+    seed: _Seed = None,
+) -> SamplingResult:
+    """Estimates P(c1 | c2) with independent Gibbs chains advanced in lockstep
+
+    Each sweep resamples every non-evidence variable of every chain from its Markov blanket, so one
+    sweep yields one sample per chain. The confidence interval treats the per-chain means as
+    independent replicates, which accounts for the autocorrelation within each chain.
+
+    Arguments:
+        network: Bayesian Network object
+        c1: Dictionary representing the first set of events
+        c2: Dictionary representing the second set of events
+        samples: The maximum number of samples to keep, or None to rely on the time budget
+        time_budget: The maximum number of seconds to spend sampling, or None for no limit
+        chains: The number of chains run in parallel
+        burn_in: The number of sweeps discarded before samples are kept
+        confidence: The confidence level of the reported interval
+        seed: Seed or generator for the random number generator
+
+    Returns:
+        SamplingResult: The estimate together with its confidence interval
+    """
+    chains = _chain_count(chains, samples)
+    started = time.perf_counter()
+    rng = np.random.default_rng(seed)
+    tables = _probability_tables(network)
+    children = {
+        variable: [child for child, parents in network.parents.items() if variable in parents]
+        for variable in network.variables
+    }
+    hidden = [variable for variable in network.variables if variable not in c2]
+
+    # Start every chain from a forward sample that agrees with the evidence
+    sample, _ = _clamped_sample(network, tables, c2, rng, chains)
+
+    def sweep(size: int) -> None:
+        for variable in hidden:
+            p_true = _p_true(tables, variable, sample, size)
+            weight_true, weight_false = p_true, 1 - p_true
+            for state in (True, False):
+                sample[variable] = np.full(size, state)
+                for child in children[variable]:
+                    p_child = _p_true(tables, child, sample, size)
+                    likelihood = np.where(sample[child], p_child, 1 - p_child)
+                    if state:
+                        weight_true *= likelihood
+                    else:
+                        weight_false *= likelihood
+            total = weight_true + weight_false
+            p_state = np.divide(weight_true, total, out=np.full(size, 0.5), where=total > 0)
+            sample[variable] = rng.random(size) < p_state
+
+    for _ in range(burn_in):
+        sweep(chains)
+
+    chain_hits = np.zeros(chains)
+    chain_sweeps = np.zeros(chains)
+    for size in _batch_sizes(samples, chains, time_budget):
+        # The last sweep only advances as many chains as the sample budget has samples left
+        if size < chains:
+            for variable, states in sample.items():
+                sample[variable] = states[:size]
+        sweep(size)
+        chain_hits[:size] += _matches(sample, c1, size)
+        chain_sweeps[:size] += 1
+
+    chain_means = chain_hits / chain_sweeps
+    probability = float(chain_means.mean())
+    drawn = int(chain_sweeps.sum())
+    if chains > 1:
+        variance = float(chain_means.var(ddof=1)) / chains
+    else:
+        variance = probability * (1 - probability) / drawn
+    # The effective sample size is the number of independent draws giving the same variance
+    effective_samples = probability * (1 - probability) / variance if variance else drawn
+    return _result(
+        probability,
+        variance,
+        confidence=confidence,
+        samples=drawn,
+        effective_samples=effective_samples,
+        started=started,
+    )
+
+
+SAMPLERS: Final[dict[str, Callable[..., SamplingResult]]] = {
+    "rejection": rejection_sampling,
+    "likelihood": likelihood_weighting,
+    "gibbs": gibbs_sampling,
+}
@@ -1,41 +1,15 @@
 """Module to compute the specified probability of the given events in a Bayesian Network"""
 
+import argparse
 import logging
+import math
 import sys
 
 from itertools import product
-from types import TracebackType
-from typing import ClassVar
+from pathlib import Path
 
-
-class ColorLogFormatter(logging.Formatter):
-    """A custom log formatter that adds color to log levels.
-
-    Attributes:
-        fmt (str): The format string used to format the log message.
-        COLORS (dict): A dictionary mapping log levels to their respective ANSI color codes.
-    """
-
-    COLORS: ClassVar[dict] = {
-        logging.DEBUG: "\033[0;36m",  # Cyan for DEBUG
-        logging.INFO: "\033[0;32m",  # Green for INFO
-        logging.WARNING: "\033[0;33m",  # Yellow for WARNING
-        logging.ERROR: "\033[0;31m",  # Red for ERROR
-        logging.CRITICAL: "\033[1;31m",  # Bold Red for CRITICAL
-    }
-
-    def format(self, record: logging.LogRecord) -> str:
-        """Format the specified record with color.
-
-        Args:
-            record (logging.LogRecord): The log record to be formatted.
-
-        Returns:
-            str: A formatted string with color based on the log level.
-        """
-        colored_record = logging.Formatter.format(self, record)
-        levelno = record.levelno
-        return f"{self.COLORS.get(levelno, '')}{colored_record}\033[0m"  # Reset to default
+from cse4380.log import setup_logging
+from cse4380.logspace import log_probability, logsumexp
 
 
 class BayesianNetwork:
@@ -58,6 +32,40 @@ def __init__(self) -> None:
         self.p_j_a = {True: 0.90, False: 0.05}
         self.p_m_a = {True: 0.70, False: 0.01}
 
+        # Structure of the network in topological order, used by the sampling-based inference
+        self.parents: dict[str, tuple[str, ...]] = {
+            "B": (),
+            "E": (),
+            "A": ("B", "E"),
+            "J": ("A",),
+            "M": ("A",),
+        }
+
+        # P(variable = True | parents), keyed by the states of the parents in the order above
+        self.cpt: dict[str, dict[tuple[bool, ...], float]] = {
+            "B": {(): self.p_b},
+            "E": {(): self.p_e},
+            "A": {tuple(states): p for states, p in self.p_a_b_e.items()},
+            "J": {(a,): p for a, p in self.p_j_a.items()},
+            "M": {(a,): p for a, p in self.p_m_a.items()},
+        }
+
+    @property
+    def variables(self) -> tuple[str, ...]:
+        """The variables of the network in topological order"""
+        return tuple(self.parents)
+
+    def _factors(  # noqa: PLR0913
+        self, b: bool, e: bool, a: bool, j: bool, m: bool
+    ) -> tuple[float, float, float, float, float]:
+        """Looks up the CPT entry of every variable for the given events"""
+        p_b = self.p_b if b else 1 - self.p_b
+        p_e = self.p_e if e else 1 - self.p_e
+        p_a_given_b_e = self.p_a_b_e[(b, e)] if a else 1 - self.p_a_b_e[(b, e)]
+        p_j_given_a = self.p_j_a[a] if j else 1 - self.p_j_a[a]
+        p_m_given_a = self.p_m_a[a] if m else 1 - self.p_m_a[a]
+        return p_b, p_e, p_a_given_b_e, p_j_given_a, p_m_given_a
+
     def compute_probability(  # noqa: PLR0913
         self, b: bool, e: bool, a: bool, j: bool, m: bool
     ) -> float:
@@ -73,39 +81,32 @@ def compute_probability(  # noqa: PLR0913
         Returns:
             float: The joint probability of the events
         """
-        p_b = self.p_b if b else 1 - self.p_b
-        p_e = self.p_e if e else 1 - self.p_e
-        p_a_given_b_e = self.p_a_b_e[(b, e)] if a else 1 - self.p_a_b_e[(b, e)]
-        p_j_given_a = self.p_j_a[a] if j else 1 - self.p_j_a[a]
-        p_m_given_a = self.p_m_a[a] if m else 1 - self.p_m_a[a]
+        p_b, p_e, p_a_given_b_e, p_j_given_a, p_m_given_a = self._factors(b, e, a, j, m)
         return p_b * p_e * p_a_given_b_e * p_j_given_a * p_m_given_a
 
+    def compute_log_probability(  # noqa: PLR0913
+        self, b: bool, e: bool, a: bool, j: bool, m: bool
+    ) -> float:
+        """Computes the natural logarithm of the joint probability of the given events
 
-def _setup_custom_logger(name: str | None = None) -> logging.Logger:
-    """Sets up a global logger with custom formatting and a global exception handler."""
-    logger = logging.getLogger(name)
-    logger.setLevel(logging.DEBUG)
-
-    handler = logging.StreamHandler()
-    formatter = ColorLogFormatter("%(asctime)s - %(levelname)s - %(message)s")
-    handler.setFormatter(formatter)
-    logger.addHandler(handler)
+        The logarithms of the factors are summed instead of multiplying the factors, so the joint
+        probability of a long chain of events does not underflow to 0
 
-    # Global exception handler
-    def handle_exception(
-        exc_type: type[BaseException], exc_value: BaseException, exc_traceback: TracebackType
-    ) -> None:
-        if issubclass(exc_type, KeyboardInterrupt):
-            sys.__excepthook__(exc_type, exc_value, exc_traceback)
-            return
-        logger.critical(f"{exc_type}", exc_info=(exc_type, exc_value, exc_traceback))
+        Arguments:
+            b: Burglary event state
+            e: Earthquake event state
+            a: Alarm event state
+            j: John Calls event state
+            m: Mary Calls event state
 
-    sys.excepthook = handle_exception
-    return logger
+        Returns:
+            float: The log joint probability of the events, or -inf if the events are impossible
+        """
+        return math.fsum(log_probability(factor) for factor in self._factors(b, e, a, j, m))
 
 
 def calculate_specified_probability(
-    network: BayesianNetwork, c1: dict[str, bool], c2: dict[str, bool]
+    network: BayesianNetwork, c1: dict[str, bool], c2: dict[str, bool], log_space: bool = False
 ) -> float:
     """Calculates the specified probability of the given events
 
@@ -113,10 +114,14 @@ def calculate_specified_probability(
         network: Bayesian Network object
         c1: Dictionary representing the first set of events
         c2: Dictionary representing the second set of events
+        log_space: Whether to add up the joint probabilities in log space
 
     Returns:
         float: The calculated probability
     """
+    if log_space:
+        return math.exp(calculate_specified_log_probability(network, c1, c2))
+
     if not c2:
         unspecified_vars = {k for k in "BEAJM" if k not in c1}
         all_combinations = product([True, False], repeat=len(unspecified_vars))
@@ -155,6 +160,56 @@ def calculate_specified_probability(
     return joint_prob / c2_prob if c2_prob != 0 else 0
 
 
+def _log_marginal(network: BayesianNetwork, events: dict[str, bool]) -> float:
+    """Calculates the log probability of the given events by summing out the other variables
+
+    Arguments:
+        network: Bayesian Network object
+        events: Dictionary representing the set of events
+
+    Returns:
+        float: The log probability of the events
+    """
+    unspecified_vars = [k for k in "BEAJM" if k not in events]
+    log_terms = []
+    for combination in product([True, False], repeat=len(unspecified_vars)):
+        state = dict(zip(unspecified_vars, combination, strict=True))
+        state.update(events)
+        log_terms.append(
+            network.compute_log_probability(
+                state["B"], state["E"], state["A"], state["J"], state["M"]
+            )
+        )
+    return logsumexp(log_terms)
+
+
+def calculate_specified_log_probability(
+    network: BayesianNetwork, c1: dict[str, bool], c2: dict[str, bool]
+) -> float:
+    """Calculates the natural logarithm of the specified probability of the given events
+
+    The joint probabilities are added up with log-sum-exp, so neither the numerator nor the
+    normalising constant underflows before the division
+
+    Arguments:
+        network: Bayesian Network object
+        c1: Dictionary representing the first set of events
+        c2: Dictionary representing the second set of events
+
+    Returns:
+        float: The log of the calculated probability, or -inf if the probability is 0
+    """
+    if any(c2.get(event, state) != state for event, state in c1.items()):
+        return -math.inf
+
+    log_joint = _log_marginal(network, {**c1, **c2})
+    if not c2:
+        return log_joint
+
+    log_c2 = _log_marginal(network, c2)
+    return log_joint - log_c2 if log_c2 != -math.inf else -math.inf
+
+
 def _parse_arguments(args: list[str]) -> tuple[dict[str, bool], dict[str, bool]]:
     """Parses command line arguments to extract events and their states
 
@@ -177,10 +232,74 @@ def _parse_arguments(args: list[str]) -> tuple[dict[str, bool], dict[str, bool]]
     return c1, c2
 
 
-def main() -> None:
-    """Main function to compute the specified probability of the given events"""
-    _setup_custom_logger()
-    if len(sys.argv) < 2 or len(sys.argv) > 7:
+def _parse_options(args: list[str]) -> argparse.Namespace:
+    """Parses the inference options, leaving the events and the 'given' keyword as positionals
+
+    Arguments:
+        args: List of command line arguments
+
+    Returns:
+        argparse.Namespace: The events together with the selected inference options
+    """
+    parser = argparse.ArgumentParser(
+        description="Compute the specified probability of the given events in a Bayesian Network"
+    )
+    parser.add_argument("events", nargs="*", help="<event><state> arguments and 'given'")
+    parser.add_argument(
+        "--method",
+        default="exact",
+        choices=["exact", "rejection", "likelihood", "gibbs"],
+        help="Inference method (default: exact enumeration)",
+    )
+    parser.add_argument(
+        "--samples", type=int, default=1_000_000, help="Sample budget (default: 1000000)"
+    )
+    exact = parser.add_mutually_exclusive_group()
+    exact.add_argument(
+        "--log-space",
+        action="store_true",
+        help="Add up the joint probabilities in log space for the exact method",
+    )
+    exact.add_argument(
+        "--compiled",
+        action="store_true",
+        help="Evaluate the exact method with a compiled evaluator cached for the query shape",
+    )
+    parser.add_argument(
+        "--cache-dir",
+        type=Path,
+        help="Disk cache of the compiled evaluators (default: ~/.cache/bnet)",
+    )
+    parser.add_argument("--time-budget", type=float, help="Time budget for sampling in seconds")
+    parser.add_argument("--seed", type=int, help="Seed for the random number generator")
+    parser.add_argument(
+        "--confidence", type=float, default=0.95, help="Confidence level (default: 0.95)"
+    )
+    options = parser.parse_intermixed_args(args)
+    if options.log_space and options.method != "exact":
+        parser.error(f"--log-space only applies to --method exact, not {options.method}")
+    if options.compiled and options.method != "exact":
+        parser.error(f"--compiled only applies to --method exact, not {options.method}")
+    if options.cache_dir is not None and not options.compiled:
+        parser.error("--cache-dir only applies to --compiled")
+    if options.samples < 1:
+        parser.error("--samples must be at least 1")
+    if not 0 < options.confidence < 1:
+        parser.error("--confidence must be between 0 and 1")
+    if options.time_budget is not None and options.time_budget <= 0:
+        parser.error("--time-budget must be greater than 0")
+    return options
+
+
+def main(argv: list[str] | None = None) -> None:
+    """Main function to compute the specified probability of the given events
+
+    Arguments:
+        argv: The command line arguments, or None for sys.argv
+    """
+    setup_logging()
+    options = _parse_options(sys.argv[1:] if argv is None else argv)
+    if len(options.events) < 1 or len(options.events) > 6:
         logging.critical(
             "Invalid number of arguments\n"
             "Usage: python bnet.py <event><state> [optional: 'given'] <event><state>\n"
@@ -189,11 +308,42 @@ def main() -> None:
             "Example: python bnet.py Bt At Jt given Mt"
         )
         return
-    args = sys.argv[1:]
-    c1, c2 = _parse_arguments(args)
+    c1, c2 = _parse_arguments(options.events)
     network = BayesianNetwork()
-    probability = calculate_specified_probability(network, c1, c2)
-    print(f"The computed probability is: {probability}")
+    if options.compiled:
+        # Compiling queries needs hashlib, json and tempfile, which plain enumeration does not
+        from compiled_query import (  # noqa: PLC0415
+            DEFAULT_CACHE_DIR,
+            calculate_compiled_probability,
+        )
+
+        cache_dir = options.cache_dir or DEFAULT_CACHE_DIR
+        probability = calculate_compiled_probability(network, c1, c2, cache_dir)
+        print(f"The computed probability is: {probability}")
+        return
+    if options.method == "exact":
+        probability = calculate_specified_probability(network, c1, c2, options.log_space)
+        print(f"The computed probability is: {probability}")
+        return
+
+    # NumPy is only needed by the sampling methods, so exact queries do not pay for importing it
+    from approximate_inference import SAMPLERS  # noqa: PLC0415
+
+    result = SAMPLERS[options.method](
+        network,
+        c1,
+        c2,
+        samples=options.samples,
+        time_budget=options.time_budget,
+        confidence=options.confidence,
+        seed=options.seed,
+    )
+    print(f"The estimated probability is: {result.probability}")
+    print(
+        f"{result.confidence:.0%} confidence interval: [{result.lower}, {result.upper}] "
+        f"({result.samples} samples, {result.effective_samples:.0f} effective, "
+        f"{result.elapsed:.3f} s)"
+    )
 
 
 if __name__ == "__main__":
@@ -0,0 +1,5 @@
+"""Benchmarks of the assignments on seeded synthetic workloads, with regression baselines.
+
+Run ``python -m benchmarks`` from the root of the repository to time every benchmark and compare
+the results with benchmarks/baseline.json, or ``python -m benchmarks --help`` for the options.
+"""
@@ -0,0 +1,7 @@
+"""Runs the benchmarks with ``python -m benchmarks``."""
+
+from benchmarks.runner import main
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,352 @@
+"""Seeded generators of large synthetic workloads for the benchmarks.
+
+Every generator takes a seed and returns the same workload for the same arguments on every
+machine, so timings recorded on one run can be compared with a baseline recorded on another.
+
+Road systems place their cities on a plane and make every road at least one kilometre longer than
+the straight line between its cities. The straight-line distance to the destination, rounded down
+to 0.1 km, is therefore a consistent heuristic, and the road lengths are rounded up so that it
+stays consistent after both are written to files.
+
+Classes:
+    - RoadSystem
+
+Functions:
+    - grid_road_system
+    - geometric_road_system
+    - write_road_system
+    - write_heuristic
+    - route_queries
+    - nim_positions
+    - random_dag
+    - bnet_queries
+    - candy_observations
+"""
+
+import math
+import random
+
+from collections.abc import Iterable, Iterator
+from dataclasses import dataclass
+from itertools import product
+from typing import TYPE_CHECKING, Final
+
+
+if TYPE_CHECKING:
+    from pathlib import Path
+
+
+__all__ = [
+    "RoadSystem",
+    "bnet_queries",
+    "candy_observations",
+    "geometric_road_system",
+    "grid_road_system",
+    "nim_positions",
+    "random_dag",
+    "route_queries",
+    "write_heuristic",
+    "write_road_system",
+]
+
+# The side of the square the cities of a road system are placed in, in kilometres
+AREA_SIDE: Final[float] = 1000.0
+# The average number of roads of a city in a geometric road system
+GEOMETRIC_DEGREE: Final[float] = 6.0
+# The five candy bags of compute_a_posteriori: (prior, share of cherry candies)
+CANDY_BAGS: Final[tuple[tuple[float, float], ...]] = (
+    (0.10, 1.00),
+    (0.20, 0.75),
+    (0.40, 0.50),
+    (0.20, 0.25),
+    (0.10, 0.00),
+)
+
+
+@dataclass(frozen=True)
+class RoadSystem:
+    """A synthetic road system with the position of every city.
+
+    Attributes:
+        roads (list[tuple[str, str, float]]): Every road as (city, city, distance in km).
+        positions (dict[str, tuple[float, float]]): The coordinates of every city in km.
+    """
+
+    roads: list[tuple[str, str, float]]
+    positions: dict[str, tuple[float, float]]
+
+
+def _road(
+    positions: dict[str, tuple[float, float]], city1: str, city2: str, rng: random.Random
+) -> tuple[str, str, float]:
+    """A road between two cities that winds up to 30% longer than the straight line."""
+    straight = math.dist(positions[city1], positions[city2])
+    # One extra kilometre and rounding up keep the rounded-down heuristic consistent
+    length = math.ceil((straight * rng.uniform(1.0, 1.3) + 1.0) * 10) / 10
+    return city1, city2, length
+
+
+def grid_road_system(rows: int, columns: int, seed: int) -> RoadSystem:
+    """Generates cities on a jittered grid, each connected to its neighbours on the grid.
+
+    Every city has a road to the city to its right and the city below it, and one in three
+    cities also has a diagonal road, so the road system is connected and has many ties.
+
+    Args:
+        rows (int): The number of rows of cities.
+        columns (int): The number of columns of cities.
+        seed (int): Seed for the random number generator.
+
+    Returns:
+        RoadSystem: The roads and the positions of the rows * columns cities.
+    """
+    rng = random.Random(seed)
+    spacing = AREA_SIDE / max(rows, columns)
+    positions = {
+        f"G{row}_{column}": (
+            (column + rng.uniform(-0.3, 0.3)) * spacing,
+            (row + rng.uniform(-0.3, 0.3)) * spacing,
+        )
+        for row in range(rows)
+        for column in range(columns)
+    }
+    roads = []
+    for row in range(rows):
+        for column in range(columns):
+            city = f"G{row}_{column}"
+            if column + 1 < columns:
+                roads.append(_road(positions, city, f"G{row}_{column + 1}", rng))
+            if row + 1 < rows:
+                roads.append(_road(positions, city, f"G{row + 1}_{column}", rng))
+            if row + 1 < rows and column + 1 < columns and rng.random() < 1 / 3:
+                roads.append(_road(positions, city, f"G{row + 1}_{column + 1}", rng))
+    return RoadSystem(roads, positions)
+
+
+def _nearby_pairs(
+    positions: dict[str, tuple[float, float]], radius: float
+) -> Iterator[tuple[str, str]]:
+    """Yields every pair of cities closer than the radius, comparing nearby buckets only."""
+    buckets: dict[tuple[int, int], list[str]] = {}
+    for city, (x, y) in positions.items():
+        buckets.setdefault((int(x // radius), int(y // radius)), []).append(city)
+    for (bucket_x, bucket_y), members in buckets.items():
+        nearby = [
+            other
+            for dx, dy in product((-1, 0, 1), repeat=2)
+            for other in buckets.get((bucket_x + dx, bucket_y + dy), [])
+        ]
+        # Every pair is seen from both cities, and only yielded from the first
+        for city, other in product(members, nearby):
+            if city < other and math.dist(positions[city], positions[other]) < radius:
+                yield city, other
+
+
+def _groups(cities: Iterable[str], roads: list[tuple[str, str, float]]) -> list[list[str]]:
+    """Splits the cities into the groups connected by the roads, with union-find."""
+    parent = {city: city for city in cities}
+
+    def find(city: str) -> str:
+        while parent[city] != city:
+            parent[city] = parent[parent[city]]
+            city = parent[city]
+        return city
+
+    for city1, city2, _ in roads:
+        parent[find(city1)] = find(city2)
+    groups: dict[str, list[str]] = {}
+    for city in parent:
+        groups.setdefault(find(city), []).append(city)
+    return list(groups.values())
+
+
+def geometric_road_system(cities: int, seed: int) -> RoadSystem:
+    """Generates cities at random positions, with roads between the cities close to each other.
+
+    Cities closer than a radius chosen for an average of six roads per city are connected, using
+    a grid of buckets so that only nearby cities are compared. Every city left out of the largest
+    connected group is then linked to its nearest city in that group, so every route exists.
+
+    Args:
+        cities (int): The number of cities.
+        seed (int): Seed for the random number generator.
+
+    Returns:
+        RoadSystem: The roads and the positions of the cities.
+    """
+    rng = random.Random(seed)
+    positions = {
+        f"R{index}": (rng.uniform(0, AREA_SIDE), rng.uniform(0, AREA_SIDE))
+        for index in range(cities)
+    }
+    radius = math.sqrt(GEOMETRIC_DEGREE * AREA_SIDE**2 / (math.pi * max(cities, 1)))
+    roads = [_road(positions, city, other, rng) for city, other in _nearby_pairs(positions, radius)]
+
+    groups = _groups(positions, roads)
+    largest = max(groups, key=len, default=[])
+    for group in groups:
+        if group is not largest:
+            city = group[0]
+            nearest = min(largest, key=lambda other: math.dist(positions[city], positions[other]))
+            roads.append(_road(positions, city, nearest, rng))
+    return RoadSystem(roads, positions)
+
+
+def write_road_system(road_system: RoadSystem, path: "Path") -> None:
+    """Writes the roads in the input file format of find_route.
+
+    Args:
+        road_system (RoadSystem): The road system to write.
+        path (Path): The file to write.
+    """
+    with path.open("w", encoding="locale") as file:
+        file.writelines(
+            f"{city1} {city2} {distance:.1f}\n" for city1, city2, distance in road_system.roads
+        )
+        file.write("END OF INPUT\n")
+
+
+def write_heuristic(road_system: RoadSystem, destination: str, path: "Path") -> None:
+    """Writes the straight-line distance of every city to the destination as a heuristic file.
+
+    Args:
+        road_system (RoadSystem): The road system the heuristic is for.
+        destination (str): The destination city.
+        path (Path): The file to write.
+    """
+    target = road_system.positions[destination]
+    with path.open("w", encoding="locale") as file:
+        for city, position in road_system.positions.items():
+            file.write(f"{city} {math.floor(math.dist(position, target) * 10) / 10:.1f}\n")
+        file.write("END OF INPUT\n")
+
+
+def route_queries(road_system: RoadSystem, count: int, seed: int) -> list[tuple[str, str]]:
+    """Picks pairs of distinct cities to find routes between.
+
+    Args:
+        road_system (RoadSystem): The road system to pick the cities from.
+        count (int): The number of pairs.
+        seed (int): Seed for the random number generator.
+
+    Returns:
+        list[tuple[str, str]]: The (origin, destination) pairs.
+    """
+    rng = random.Random(seed)
+    cities = sorted(road_system.positions)
+    queries = []
+    for _ in range(count):
+        origin, destination = rng.sample(cities, 2)
+        queries.append((origin, destination))
+    return queries
+
+
+def nim_positions(
+    count: int, max_marbles: int, seed: int, min_marbles: int = 1
+) -> list[tuple[int, int, str]]:
+    """Picks Red-Blue Nim positions, alternating between the standard and misere versions.
+
+    Args:
+        count (int): The number of positions.
+        max_marbles (int): The largest number of marbles in a pile.
+        seed (int): Seed for the random number generator.
+        min_marbles (int): The smallest number of marbles in a pile.
+
+    Returns:
+        list[tuple[int, int, str]]: The positions as (red marbles, blue marbles, version).
+    """
+    rng = random.Random(seed)
+    return [
+        (
+            rng.randint(min_marbles, max_marbles),
+            rng.randint(min_marbles, max_marbles),
+            "standard" if index % 2 == 0 else "misere",
+        )
+        for index in range(count)
+    ]
+
+
+def random_dag(
+    variables: int, max_parents: int, seed: int
+) -> tuple[dict[str, tuple[str, ...]], dict[str, dict[tuple[bool, ...], float]]]:
+    """Generates the structure and the CPTs of a random Bayesian Network.
+
+    Every variable gets up to max_parents parents among the variables before it, so the order of
+    the variables is topological, as bnet expects.
+
+    Args:
+        variables (int): The number of variables, named V0, V1, ...
+        max_parents (int): The largest number of parents of a variable.
+        seed (int): Seed for the random number generator.
+
+    Returns:
+        tuple[dict, dict]: The parents of every variable, and P(variable = True | parents) keyed
+            by the states of the parents, in the format of BayesianNetwork.parents and .cpt.
+    """
+    rng = random.Random(seed)
+    names = [f"V{index}" for index in range(variables)]
+    parents: dict[str, tuple[str, ...]] = {}
+    cpt: dict[str, dict[tuple[bool, ...], float]] = {}
+    for index, name in enumerate(names):
+        chosen = rng.sample(names[:index], min(index, rng.randint(0, max_parents)))
+        parents[name] = tuple(sorted(chosen, key=names.index))
+        cpt[name] = {
+            states: round(rng.uniform(0.01, 0.99), 4) for states in _states(len(parents[name]))
+        }
+    return parents, cpt
+
+
+def _states(count: int) -> list[tuple[bool, ...]]:
+    """Every combination of states of count variables."""
+    combinations: list[tuple[bool, ...]] = [()]
+    for _ in range(count):
+        combinations = [(*states, state) for states in combinations for state in (True, False)]
+    return combinations
+
+
+def bnet_queries(
+    variables: list[str], count: int, seed: int, max_events: int = 3, shapes: int | None = None
+) -> list[tuple[dict[str, bool], dict[str, bool]]]:
+    """Picks queries P(c1 | c2) over disjoint random sets of variables.
+
+    Args:
+        variables (list[str]): The variables of the network.
+        count (int): The number of queries.
+        seed (int): Seed for the random number generator.
+        max_events (int): The largest number of events in c1 and in c2.
+        shapes (int | None): The number of distinct (c1 variables, c2 variables) pairs the queries
+            are spread over, with random states each time, or None for new variables every query.
+
+    Returns:
+        list[tuple[dict[str, bool], dict[str, bool]]]: The (c1, c2) pairs; c2 may be empty.
+    """
+    rng = random.Random(seed)
+    pool = []
+    for _ in range(count if shapes is None else shapes):
+        chosen = rng.sample(variables, min(len(variables), rng.randint(1, 2 * max_events)))
+        split = rng.randint(1, min(len(chosen), max_events))
+        pool.append((chosen[:split], chosen[split : split + max_events]))  # noqa: E203, RUF100
+
+    queries = []
+    for index in range(count):
+        query, evidence = pool[index] if shapes is None else rng.choice(pool)
+        c1 = {variable: rng.random() < 0.5 for variable in query}
+        c2 = {variable: rng.random() < 0.5 for variable in evidence}
+        queries.append((c1, c2))
+    return queries
+
+
+def candy_observations(length: int, seed: int) -> str:
+    """Draws a bag from the priors of compute_a_posteriori and picks candies out of it.
+
+    Args:
+        length (int): The number of observations.
+        seed (int): Seed for the random number generator.
+
+    Returns:
+        str: The observation sequence of 'C' and 'L' characters.
+    """
+    rng = random.Random(seed)
+    priors = [prior for prior, _ in CANDY_BAGS]
+    _, cherry = rng.choices(CANDY_BAGS, weights=priors)[0]
+    return "".join("C" if rng.random() < cherry else "L" for _ in range(length))
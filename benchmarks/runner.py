@@ -0,0 +1,299 @@
+"""Runs the benchmarks, records the results to JSON, and compares them with a stored baseline.
+
+Every benchmark is run once to warm up, then timed over several repeats, of which the median is
+kept, and run once more under tracemalloc for its peak memory, which is kept out of the timings
+because tracing slows down every allocation.
+
+Right before every timed run, a fixed pure-Python calibration loop is timed as well. The speed of a
+shared or throttled machine drifts by tens of percent within minutes, and from one machine to the
+next, but it slows down the calibration loop as much as the benchmark, so regressions are judged
+on the time of a benchmark relative to the calibration loop. A benchmark regresses when that
+relative time or its peak memory exceeds the baseline by more than the tolerance.
+
+Functions:
+    - measure
+    - compare
+    - main
+"""
+
+import argparse
+import gc
+import json
+import platform
+import statistics
+import sys
+import tempfile
+import time
+import tracemalloc
+
+from pathlib import Path
+from typing import Any, Final
+
+from benchmarks.workloads import BENCHMARKS, Benchmark, Settings
+from cse4380.log import setup_logging
+
+
+__all__ = ["BASELINE", "compare", "main", "measure"]
+
+BASELINE: Final[Path] = Path(__file__).with_name("baseline.json")
+DEFAULT_REPEATS: Final[int] = 5
+DEFAULT_TOLERANCE: Final[float] = 0.30
+DEFAULT_MEMORY_TOLERANCE: Final[float] = 0.10
+# Peak memory below this many bytes over the baseline is never a regression, however small
+MEMORY_SLACK: Final[int] = 64 * 1024
+CALIBRATION_STEPS: Final[int] = 200_000
+
+
+def _calibrate() -> float:
+    """Times a fixed loop of dictionary updates and arithmetic, the staples of the benchmarks."""
+    start = time.perf_counter()
+    counts: dict[int, int] = {}
+    for step in range(CALIBRATION_STEPS):
+        counts[step % 1024] = counts.get(step % 1024, 0) + step
+    return time.perf_counter() - start
+
+
+def measure(benchmark: Benchmark, settings: Settings, repeats: int) -> dict[str, Any]:
+    """Times a benchmark and measures its peak memory.
+
+    Args:
+        benchmark (Benchmark): The benchmark to run.
+        settings (Settings): The scale, seed, and directory of the workload.
+        repeats (int): The number of timed runs.
+
+    Returns:
+        dict: The unit and amount of work, the median and best time in seconds, the throughput in
+            work per second, the median time relative to the calibration loop, and the peak
+            memory in bytes.
+    """
+    run = benchmark.prepare(settings)
+    work = run()
+
+    times = []
+    relative_times = []
+    for _ in range(repeats):
+        gc.collect()
+        calibration = _calibrate()
+        start = time.perf_counter()
+        run()
+        times.append(time.perf_counter() - start)
+        relative_times.append(times[-1] / calibration)
+
+    gc.collect()
+    tracemalloc.start()
+    run()
+    _, peak = tracemalloc.get_traced_memory()
+    tracemalloc.stop()
+
+    seconds = statistics.median(times)
+    return {
+        "unit": benchmark.unit,
+        "work": work,
+        "seconds": seconds,
+        "best": min(times),
+        "throughput": work / seconds if seconds > 0 else float("inf"),
+        "relative": statistics.median(relative_times),
+        "peak_memory": peak,
+    }
+
+
+def compare(
+    results: dict[str, Any],
+    baseline: dict[str, Any],
+    tolerance: float = DEFAULT_TOLERANCE,
+    memory_tolerance: float = DEFAULT_MEMORY_TOLERANCE,
+) -> list[str]:
+    """Finds the benchmarks that got slower or use more memory than in the baseline.
+
+    Args:
+        results (dict): The results of this run, as written to JSON.
+        baseline (dict): The results of the baseline run, as written to JSON.
+        tolerance (float): The fraction the relative time may exceed the baseline by.
+        memory_tolerance (float): The fraction the peak memory may exceed the baseline by.
+
+    Returns:
+        list[str]: A description of every regression, empty if there is none.
+
+    Raises:
+        ValueError: If the workloads of the two runs were generated with other settings.
+    """
+    for setting in ("scale", "seed"):
+        if results[setting] != baseline[setting]:
+            raise ValueError(
+                f"The baseline was recorded with {setting} {baseline[setting]}, "
+                f"not {results[setting]}, so the workloads differ"
+            )
+
+    regressions = []
+    for name, result in results["benchmarks"].items():
+        if name not in baseline["benchmarks"]:
+            continue
+        base = baseline["benchmarks"][name]
+        if result["work"] != base["work"]:
+            regressions.append(f"{name}: did {result['work']} {result['unit']}, not {base['work']}")
+        if result["relative"] > base["relative"] * (1 + tolerance):
+            regressions.append(
+                f"{name}: {result['relative'] / base['relative']:.2f}x as slow as the baseline "
+                f"relative to the calibration loop ({result['seconds']:.4f} s, was "
+                f"{base['seconds']:.4f} s)"
+            )
+        limit = max(
+            base["peak_memory"] * (1 + memory_tolerance), base["peak_memory"] + MEMORY_SLACK
+        )
+        if result["peak_memory"] > limit:
+            regressions.append(
+                f"{name}: peak memory {result['peak_memory']} B is over the baseline "
+                f"{base['peak_memory']} B"
+            )
+    return regressions
+
+
+def _write_table(results: dict[str, Any], baseline: dict[str, Any] | None) -> None:
+    """Prints the results, and the change in relative time from the baseline when there is one."""
+    sys.stdout.write(
+        f"{'benchmark':<24}{'median s':>10}{'throughput':>14}  {'unit':<20}{'peak MiB':>9}"
+        f"{'vs baseline':>13}\n"
+    )
+    for name, result in results["benchmarks"].items():
+        change = ""
+        if baseline is not None and name in baseline["benchmarks"]:
+            change = f"{result['relative'] / baseline['benchmarks'][name]['relative'] - 1:+.1%}"
+        sys.stdout.write(
+            f"{name:<24}{result['seconds']:>10.4f}{result['throughput']:>14.1f}  "
+            f"{result['unit'] + '/s':<20}{result['peak_memory'] / 2**20:>9.2f}{change:>13}\n"
+        )
+
+
+def _parse_args(argv: list[str] | None) -> argparse.Namespace:
+    """Parses the command-line arguments of the harness.
+
+    Args:
+        argv (list[str] | None): The command-line arguments, or None for sys.argv.
+
+    Returns:
+        argparse.Namespace: The parsed arguments.
+    """
+    parser = argparse.ArgumentParser(
+        prog="python -m benchmarks",
+        description="Time the assignments on seeded synthetic workloads and check for regressions.",
+    )
+    parser.add_argument(
+        "--only",
+        nargs="+",
+        choices=list(BENCHMARKS),
+        metavar="NAME",
+        help=f"Benchmarks to run (default: all): {', '.join(BENCHMARKS)}",
+    )
+    parser.add_argument(
+        "--scale", type=float, default=1.0, help="Factor applied to every workload (default: 1)"
+    )
+    parser.add_argument("--seed", type=int, default=0, help="Seed for the workloads (default: 0)")
+    parser.add_argument(
+        "--repeats",
+        type=int,
+        default=DEFAULT_REPEATS,
+        help=f"Timed runs per benchmark (default: {DEFAULT_REPEATS})",
+    )
+    parser.add_argument("--output", type=Path, help="Write the results to this JSON file")
+    parser.add_argument(
+        "--baseline",
+        type=Path,
+        default=BASELINE,
+        help="Baseline JSON file to compare with (default: benchmarks/baseline.json)",
+    )
+    parser.add_argument(
+        "--update-baseline",
+        action="store_true",
+        help="Store the results in the baseline file instead of comparing with it",
+    )
+    parser.add_argument(
+        "--tolerance",
+        type=float,
+        default=DEFAULT_TOLERANCE,
+        help=f"Allowed slowdown over the baseline (default: {DEFAULT_TOLERANCE})",
+    )
+    parser.add_argument(
+        "--memory-tolerance",
+        type=float,
+        default=DEFAULT_MEMORY_TOLERANCE,
+        help=f"Allowed peak memory growth over the baseline (default: {DEFAULT_MEMORY_TOLERANCE})",
+    )
+    parser.add_argument(
+        "--inputs",
+        type=Path,
+        help="Keep the generated input files in this directory (default: a temporary directory)",
+    )
+    return parser.parse_args(argv)
+
+
+def _run(args: argparse.Namespace, directory: Path) -> dict[str, Any]:
+    """Runs the selected benchmarks on workloads written to the directory."""
+    logger = setup_logging()
+    settings = Settings(args.scale, args.seed, directory)
+    results: dict[str, Any] = {
+        "scale": args.scale,
+        "seed": args.seed,
+        "repeats": args.repeats,
+        "python": platform.python_version(),
+        "platform": platform.platform(),
+        "benchmarks": {},
+    }
+    for name in args.only or BENCHMARKS:
+        logger.info(f"Running {name}: {BENCHMARKS[name].description}")
+        results["benchmarks"][name] = measure(BENCHMARKS[name], settings, args.repeats)
+    return results
+
+
+def main(argv: list[str] | None = None) -> None:
+    """Runs the benchmarks and exits with status 1 if any of them regressed.
+
+    Args:
+        argv (list[str] | None): The command-line arguments, or None for sys.argv.
+    """
+    args = _parse_args(argv)
+    logger = setup_logging()
+    if args.repeats < 1 or args.scale <= 0:
+        logger.error("--repeats and --scale must be greater than 0")
+        sys.exit(2)
+
+    if args.inputs is None:
+        with tempfile.TemporaryDirectory() as directory:
+            results = _run(args, Path(directory))
+    else:
+        args.inputs.mkdir(parents=True, exist_ok=True)
+        results = _run(args, args.inputs)
+
+    if args.output is not None:
+        args.output.write_text(json.dumps(results, indent=2) + "\n", encoding="utf-8")
+
+    baseline = None
+    if args.baseline.is_file():
+        baseline = json.loads(args.baseline.read_text(encoding="utf-8"))
+
+    if args.update_baseline:
+        # Benchmarks left out with --only keep their baseline, if it was recorded the same way
+        if baseline is not None and (baseline["scale"], baseline["seed"]) == (
+            results["scale"],
+            results["seed"],
+        ):
+            results["benchmarks"] = {**baseline["benchmarks"], **results["benchmarks"]}
+        args.baseline.write_text(json.dumps(results, indent=2) + "\n", encoding="utf-8")
+        _write_table(results, None)
+        logger.info(f"Stored the baseline in {args.baseline}")
+        return
+
+    _write_table(results, baseline)
+    if baseline is None:
+        logger.warning(f"No baseline at {args.baseline}; run with --update-baseline to store one")
+        return
+
+    try:
+        regressions = compare(results, baseline, args.tolerance, args.memory_tolerance)
+    except ValueError as error:
+        logger.error(f"Cannot compare with the baseline: {error}")  # noqa: TRY400
+        sys.exit(2)
+    for regression in regressions:
+        logger.error(f"Regression in {regression}")
+    if regressions:
+        sys.exit(1)
+    logger.info("No regressions against the baseline")
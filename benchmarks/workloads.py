@@ -0,0 +1,288 @@
+"""The benchmarks run by the harness, each preparing a generated workload and timing one function.
+
+A benchmark is prepared once, untimed: its workload is generated from the seed, written to files
+where the script reads files, and parsed. Preparing returns the timed run, which calls the function
+under test over the whole workload and returns the amount of work done (e.g. nodes expanded), which
+the harness divides by the time taken for the throughput.
+
+Classes:
+    - Settings
+    - Benchmark
+"""
+
+import contextlib
+import functools
+import io
+import sys
+
+from collections.abc import Callable
+from dataclasses import dataclass
+from pathlib import Path
+from typing import Final
+
+from benchmarks.generators import (
+    CANDY_BAGS,
+    bnet_queries,
+    candy_observations,
+    geometric_road_system,
+    grid_road_system,
+    nim_positions,
+    random_dag,
+    route_queries,
+    write_heuristic,
+    write_road_system,
+)
+from cse4380.cli import COMMANDS, REPOSITORY
+
+
+# The scripts import their sibling modules by name, as they do when run directly, so their
+# directories have to be on the path before the scripts below can be imported
+sys.path.extend(str(REPOSITORY / directory) for directory, _, _ in COMMANDS.values())
+
+from bnet import BayesianNetwork, calculate_specified_probability  # noqa: E402, RUF100
+from compiled_query import calculate_compiled_probability  # noqa: E402, RUF100
+from compute_a_posteriori import calculate_posterior  # noqa: E402, RUF100
+from find_route import (  # noqa: E402, RUF100
+    informed_search,
+    parse_heuristic,
+    parse_road_system,
+    uninformed_search,
+)
+from red_blue_nim import GameState, minmax  # noqa: E402, RUF100
+
+
+__all__ = ["BENCHMARKS", "Benchmark", "Settings"]
+
+ROUTE_QUERIES: Final[int] = 5
+GRID_SIDE: Final[int] = 100
+GEOMETRIC_CITIES: Final[int] = 10_000
+NIM_POSITIONS: Final[int] = 20
+NIM_MAX_MARBLES: Final[int] = 10_000
+NIM_DEPTH: Final[int] = 8
+BNET_QUERIES: Final[int] = 10_000
+BNET_SHAPES: Final[int] = 20
+DAG_VARIABLES: Final[int] = 16
+DAG_MAX_PARENTS: Final[int] = 3
+OBSERVATIONS: Final[int] = 20_000
+
+_Graph = dict[str, dict[str, float]]
+
+
+@dataclass(frozen=True)
+class Settings:
+    """The settings every workload is generated with.
+
+    Attributes:
+        scale (float): The factor applied to the size of every workload.
+        seed (int): Seed for the workload generators.
+        directory (Path): Where the generated input and output files are written.
+    """
+
+    scale: float
+    seed: int
+    directory: Path
+
+    def size(self, base: int) -> int:
+        """Scales the size of a workload, keeping it at least 1."""
+        return max(1, round(base * self.scale))
+
+
+@dataclass(frozen=True)
+class Benchmark:
+    """A function under test and the workload it is timed on.
+
+    Attributes:
+        name (str): The name of the benchmark in the results.
+        unit (str): What the work returned by the timed run counts.
+        description (str): What is timed, on what workload.
+        prepare (Callable): Generates the workload and returns the timed run.
+    """
+
+    name: str
+    unit: str
+    description: str
+    prepare: Callable[[Settings], Callable[[], int]]
+
+
+@functools.cache
+def _road_inputs(
+    layout: str, settings: Settings
+) -> tuple[_Graph, list[tuple[str, str]], list[dict[str, float]]]:
+    """Generates a road system, writes it and a heuristic per destination, and parses them back.
+
+    Args:
+        layout (str): 'grid' or 'geometric'.
+        settings (Settings): The scale, seed, and directory of the workload.
+
+    Returns:
+        tuple: The graph, the (origin, destination) queries, and the heuristic of every query.
+    """
+    if layout == "grid":
+        side = max(2, round(GRID_SIDE * settings.scale**0.5))
+        road_system = grid_road_system(side, side, settings.seed)
+    else:
+        road_system = geometric_road_system(settings.size(GEOMETRIC_CITIES), settings.seed)
+    road_file = settings.directory / f"{layout}_roads.txt"
+    write_road_system(road_system, road_file)
+
+    queries = route_queries(road_system, ROUTE_QUERIES, settings.seed)
+    heuristics = []
+    for index, (_, destination) in enumerate(queries):
+        heuristic_file = settings.directory / f"{layout}_heuristic{index}.txt"
+        write_heuristic(road_system, destination, heuristic_file)
+        heuristics.append(parse_heuristic(heuristic_file))
+    return parse_road_system(road_file), queries, heuristics
+
+
+def _route(layout: str, informed: bool) -> Callable[[Settings], Callable[[], int]]:
+    """Prepares Uniform-Cost Search or A* Search over the queries of a generated road system."""
+
+    def prepare(settings: Settings) -> Callable[[], int]:
+        graph, queries, heuristics = _road_inputs(layout, settings)
+
+        def run() -> int:
+            expanded = 0
+            # The searches print their name, which is not part of what is measured
+            with contextlib.redirect_stdout(io.StringIO()):
+                for (origin, destination), heuristic in zip(queries, heuristics, strict=True):
+                    if informed:
+                        result = informed_search(graph, origin, destination, heuristic)
+                    else:
+                        result = uninformed_search(graph, origin, destination)
+                    expanded += result[1]
+            return expanded
+
+        return run
+
+    return prepare
+
+
+def _nim(settings: Settings) -> Callable[[], int]:
+    """Prepares a depth-limited minmax search from every generated position."""
+    positions = nim_positions(
+        settings.size(NIM_POSITIONS), NIM_MAX_MARBLES, settings.seed, min_marbles=3
+    )
+
+    def run() -> int:
+        for red, blue, version in positions:
+            minmax(GameState(red, blue, version), NIM_DEPTH, -sys.maxsize, sys.maxsize, True)
+        return len(positions)
+
+    return run
+
+
+def _bnet_exact(settings: Settings) -> Callable[[], int]:
+    """Prepares enumeration over random queries on the burglary network of bnet."""
+    network = BayesianNetwork()
+    queries = bnet_queries(list(network.variables), settings.size(BNET_QUERIES), settings.seed)
+
+    def run() -> int:
+        for c1, c2 in queries:
+            calculate_specified_probability(network, c1, c2)
+        return len(queries)
+
+    return run
+
+
+def _bnet_compiled(settings: Settings) -> Callable[[], int]:
+    """Prepares random queries of a few shapes on a random DAG, compiled during the warm-up."""
+    network = BayesianNetwork()
+    network.parents, network.cpt = random_dag(DAG_VARIABLES, DAG_MAX_PARENTS, settings.seed)
+    queries = bnet_queries(
+        list(network.variables), settings.size(BNET_QUERIES), settings.seed, shapes=BNET_SHAPES
+    )
+
+    def run() -> int:
+        for c1, c2 in queries:
+            calculate_compiled_probability(network, c1, c2)
+        return len(queries)
+
+    return run
+
+
+def _posterior(log_space: bool, vectorized: bool) -> Callable[[Settings], Callable[[], int]]:
+    """Prepares calculate_posterior over a long generated observation sequence."""
+
+    def prepare(settings: Settings) -> Callable[[], int]:
+        observations = candy_observations(settings.size(OBSERVATIONS), settings.seed)
+        output = settings.directory / "result.txt"
+
+        def run() -> int:
+            # calculate_posterior updates the priors in place, so every run starts from a copy
+            hypotheses = {
+                f"h{index}": {"prior": prior, "cherry": cherry, "lime": 1 - cherry}
+                for index, (prior, cherry) in enumerate(CANDY_BAGS, start=1)
+            }
+            calculate_posterior(hypotheses, observations, log_space, vectorized, output)
+            return len(observations)
+
+        return run
+
+    return prepare
+
+
+BENCHMARKS: Final[dict[str, Benchmark]] = {
+    benchmark.name: benchmark
+    for benchmark in (
+        Benchmark(
+            "route-ucs-grid",
+            "nodes expanded",
+            "uninformed_search between random cities of a jittered grid road system",
+            _route("grid", informed=False),
+        ),
+        Benchmark(
+            "route-astar-grid",
+            "nodes expanded",
+            "informed_search with straight-line heuristics on the same grid road system",
+            _route("grid", informed=True),
+        ),
+        Benchmark(
+            "route-ucs-geometric",
+            "nodes expanded",
+            "uninformed_search between random cities of a random geometric road system",
+            _route("geometric", informed=False),
+        ),
+        Benchmark(
+            "route-astar-geometric",
+            "nodes expanded",
+            "informed_search with straight-line heuristics on the same geometric road system",
+            _route("geometric", informed=True),
+        ),
+        Benchmark(
+            "nim-minmax",
+            "positions",
+            f"minmax to depth {NIM_DEPTH} from random positions of up to {NIM_MAX_MARBLES} marbles",
+            _nim,
+        ),
+        Benchmark(
+            "bnet-exact",
+            "queries",
+            "calculate_specified_probability for random queries on the burglary network",
+            _bnet_exact,
+        ),
+        Benchmark(
+            "bnet-compiled-dag",
+            "queries",
+            f"calculate_compiled_probability for random queries on a {DAG_VARIABLES}-variable DAG",
+            _bnet_compiled,
+        ),
+        Benchmark(
+            "posterior",
+            "observations",
+            "calculate_posterior over a long observation sequence, writing result.txt",
+            _posterior(log_space=False, vectorized=False),
+        ),
+        Benchmark(
+            "posterior-log-space",
+            "observations",
+            "calculate_posterior in log space over the same sequence",
+            _posterior(log_space=True, vectorized=False),
+        ),
+        Benchmark(
+            "posterior-vectorized",
+            "observations",
+            "calculate_posterior with the NumPy trajectory over the same sequence",
+            _posterior(log_space=False, vectorized=True),
+        ),
+    )
+}
@@ -0,0 +1,5 @@
+"""Command line entry point, logging core, and log-space helpers shared by the CSE-4380 assignments.
+
+Run ``python -m cse4380 <command>`` from the root of the repository, where the command is one of
+route, nim, posterior, or bnet. Only the modules of the chosen command are imported.
+"""
@@ -0,0 +1,7 @@
+"""Runs the command line interface with ``python -m cse4380``."""
+
+from cse4380.cli import main
+
+
+if __name__ == "__main__":
+    main()
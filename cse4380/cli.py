@@ -0,0 +1,91 @@
+"""Single entry point for the scripts of every assignment.
+
+The command table only names the script of each command, so starting the interface imports
+argparse and nothing else; the script of the chosen command (and NumPy, if it needs it) is only
+imported once the command is known. Everything after the command is passed to the script as is.
+
+Functions:
+    - main
+"""
+
+import argparse
+import importlib
+import logging
+import sys
+
+from pathlib import Path
+from typing import Final
+
+from cse4380.log import setup_logging
+
+
+__all__ = ["COMMANDS", "main"]
+
+REPOSITORY: Final[Path] = Path(__file__).resolve().parents[1]
+
+# Command: (directory of the script, module of the script, description)
+COMMANDS: Final[dict[str, tuple[str, str, str]]] = {
+    "route": (
+        "A1_Uninformed_and_Informed_Search",
+        "find_route",
+        "Find a route between two cities with Uniform-Cost or A* Search",
+    ),
+    "nim": ("A2_Game_Playing_Problems", "red_blue_nim", "Play Red-Blue Nim against the computer"),
+    "posterior": (
+        "A3_Probabilities_and_Bayesian_Networks/task1",
+        "compute_a_posteriori",
+        "Compute the posterior probabilities of the candy bags",
+    ),
+    "bnet": (
+        "A3_Probabilities_and_Bayesian_Networks/task2",
+        "bnet",
+        "Compute a probability in the burglary Bayesian Network",
+    ),
+}
+
+
+def _parse_args(argv: list[str] | None) -> argparse.Namespace:
+    """Parses the options of the interface, leaving the arguments of the command untouched.
+
+    Args:
+        argv (list[str] | None): The command line arguments, or None for sys.argv.
+
+    Returns:
+        argparse.Namespace: The command, its arguments, and the logging options.
+    """
+    parser = argparse.ArgumentParser(
+        prog="cse4380",
+        description="Run the scripts of the CSE-4380 assignments.",
+        epilog="commands:\n"
+        + "".join(f"  {command:<10}{info[2]}\n" for command, info in COMMANDS.items())
+        + "\nRun 'cse4380 <command> --help' for the arguments of a command.",
+        formatter_class=argparse.RawDescriptionHelpFormatter,
+    )
+    parser.add_argument(
+        "--log-level",
+        type=str.upper,
+        choices=["DEBUG", "INFO", "WARNING", "ERROR", "CRITICAL"],
+        help="Level of the shared logger (default: DEBUG)",
+    )
+    parser.add_argument("--log-file", type=Path, help="Also write the log records to this file")
+    parser.add_argument("command", choices=COMMANDS, metavar="command", help="Command to run")
+    parser.add_argument("args", nargs=argparse.REMAINDER, help="Arguments of the command")
+    return parser.parse_args(argv)
+
+
+def main(argv: list[str] | None = None) -> None:
+    """Runs the script of the command given on the command line.
+
+    Args:
+        argv (list[str] | None): The command line arguments, or None for sys.argv.
+    """
+    args = _parse_args(argv)
+    if args.log_level is not None or args.log_file is not None:
+        setup_logging(args.log_level or logging.DEBUG, args.log_file)
+
+    directory, module_name, _ = COMMANDS[args.command]
+    # The scripts import their sibling modules by name, as they do when run directly
+    sys.path.insert(0, str(REPOSITORY / directory))
+    module = importlib.import_module(module_name)
+    sys.argv = [f"cse4380 {args.command}", *args.args]
+    module.main(args.args)
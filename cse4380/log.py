@@ -0,0 +1,177 @@
+"""Logging shared by the scripts of every assignment.
+
+Records are put on a queue by the root logger and written to the terminal (and optionally a file)
+by a background thread, so logging never waits on I/O in the middle of a search or an inference.
+The queue and the thread are only started by the first record, so a run that logs nothing does not
+pay for them. The first call to setup_logging configures the process; later calls, such as the one
+made by a script after the command line interface has already set up logging, keep that
+configuration.
+
+Classes:
+    - ArgparseLogger
+    - ColorLogFormatter
+
+Functions:
+    - setup_logging
+"""
+
+import argparse
+import atexit
+import logging
+import sys
+import threading
+
+from typing import TYPE_CHECKING, Any, ClassVar, Final, NoReturn
+
+
+if TYPE_CHECKING:
+    from logging.handlers import QueueHandler
+    from pathlib import Path
+    from types import TracebackType
+
+
+__all__ = ["LOG_FORMAT", "ArgparseLogger", "ColorLogFormatter", "setup_logging"]
+
+LOG_FORMAT: Final[str] = "%(asctime)s - %(levelname)s - %(message)s"
+
+# The handler installed by setup_logging, once logging has been set up
+_handlers: list["_DeferredQueueHandler"] = []
+
+
+class ArgparseLogger(argparse.ArgumentParser):
+    """Subclass of argparse.ArgumentParser that logs errors using a custom logger."""
+
+    def __init__(self, logger: logging.Logger, *args: Any, **kwargs: Any) -> None:  # noqa: ANN401
+        """Initialize the ArgparseLogger class.
+
+        Args:
+            logger: The custom logger to be used.
+            *args: Additional positional arguments.
+            **kwargs: Additional keyword arguments.
+        """
+        super().__init__(*args, **kwargs)
+        self.logger = logger
+
+    def error(self, message: str) -> NoReturn:
+        """Overrides the default error method to log parsing errors using the custom logger."""
+        full_message = f"{self.prog}: error: {message}"
+        self.logger.error(full_message)  # Log the actual argparse error message
+        self.print_help(sys.stderr)
+        self.exit(2, full_message + "\n")
+
+
+class ColorLogFormatter(logging.Formatter):
+    """A custom log formatter that adds color to log levels.
+
+    Attributes:
+        fmt (str): The format string used to format the log message.
+        COLORS (dict): A dictionary mapping log levels to their respective ANSI color codes.
+    """
+
+    COLORS: ClassVar[dict[int, str]] = {
+        logging.DEBUG: "\033[0;36m",  # Cyan for DEBUG
+        logging.INFO: "\033[0;32m",  # Green for INFO
+        logging.WARNING: "\033[0;33m",  # Yellow for WARNING
+        logging.ERROR: "\033[0;31m",  # Red for ERROR
+        logging.CRITICAL: "\033[1;31m",  # Bold Red for CRITICAL
+    }
+
+    def format(self, record: logging.LogRecord) -> str:
+        """Format the specified record with color.
+
+        Args:
+            record (logging.LogRecord): The log record to be formatted.
+
+        Returns:
+            str: A formatted string with color based on the log level.
+        """
+        colored_record = logging.Formatter.format(self, record)
+        levelno = record.levelno
+        return f"{self.COLORS.get(levelno, '')}{colored_record}\033[0m"  # Reset to default
+
+
+class _DeferredQueueHandler(logging.Handler):
+    """Puts records on a queue written by a background thread, started by the first record."""
+
+    def __init__(self, handlers: list[logging.Handler]) -> None:
+        """Initialize the handler without starting the thread.
+
+        Args:
+            handlers (list[logging.Handler]): The handlers the background thread writes to.
+        """
+        super().__init__()
+        self.handlers = handlers
+        self._queue_handler: QueueHandler | None = None
+        self._start_lock = threading.Lock()
+
+    def emit(self, record: logging.LogRecord) -> None:
+        """Put the record on the queue, starting the background thread the first time.
+
+        Args:
+            record (logging.LogRecord): The log record to be written.
+        """
+        if self._queue_handler is None:
+            # Threads logging their first records at the same time must not each start a thread
+            with self._start_lock:
+                if self._queue_handler is None:
+                    self._queue_handler = self._start()
+        self._queue_handler.emit(record)
+
+    def _start(self) -> "QueueHandler":
+        """Starts the background thread and returns the handler that feeds its queue."""
+        # logging.handlers pulls in socket and pickle, so it is only imported once it is needed
+        import queue  # noqa: PLC0415
+
+        from logging.handlers import QueueHandler, QueueListener  # noqa: PLC0415
+
+        records: queue.SimpleQueue[logging.LogRecord] = queue.SimpleQueue()
+        listener = QueueListener(records, *self.handlers, respect_handler_level=True)
+        listener.start()
+        # Stopping the listener writes out the records still on the queue before the process exits
+        atexit.register(listener.stop)
+        return QueueHandler(records)
+
+
+def _handle_exception(
+    exc_type: type[BaseException], exc_value: BaseException, exc_traceback: "TracebackType | None"
+) -> None:
+    """Logs uncaught exceptions as critical, except for KeyboardInterrupt."""
+    if issubclass(exc_type, KeyboardInterrupt):
+        sys.__excepthook__(exc_type, exc_value, exc_traceback)
+        return
+    logging.getLogger().critical(f"{exc_type}", exc_info=(exc_type, exc_value, exc_traceback))
+
+
+def setup_logging(
+    level: int | str = logging.DEBUG, log_file: "Path | None" = None
+) -> logging.Logger:
+    """Sets up the root logger with a queue, a colored terminal handler, and an exception hook.
+
+    The queue and its background thread are started when the first record is logged.
+
+    Args:
+        level (int | str): The level of the root logger, as a number or a name like 'INFO'.
+        log_file (Path | None): A file the records are also written to, without colors.
+
+    Returns:
+        logging.Logger: The root logger.
+    """
+    logger = logging.getLogger()
+    if _handlers:
+        return logger
+
+    handler = logging.StreamHandler()
+    handler.setFormatter(ColorLogFormatter(LOG_FORMAT))
+    handlers: list[logging.Handler] = [handler]
+    if log_file is not None:
+        file_handler = logging.FileHandler(log_file)
+        file_handler.setFormatter(logging.Formatter(LOG_FORMAT))
+        handlers.append(file_handler)
+
+    deferred = _DeferredQueueHandler(handlers)
+    logger.setLevel(level)
+    logger.addHandler(deferred)
+    _handlers.append(deferred)
+
+    sys.excepthook = _handle_exception
+    return logger
@@ -0,0 +1,44 @@
+"""Arithmetic on probabilities kept as natural logarithms, shared by the assignments.
+
+Products of many small probabilities underflow a float, while the sums of their logarithms do not.
+A probability of 0 is represented by -inf, and sums are computed with log-sum-exp.
+
+Functions:
+    - log_probability
+    - logsumexp
+"""
+
+import math
+
+from collections.abc import Iterable
+
+
+__all__ = ["log_probability", "logsumexp"]
+
+
+def log_probability(probability: float) -> float:
+    """Natural logarithm that maps a probability of 0 to -inf instead of raising.
+
+    Args:
+        probability (float): The probability.
+
+    Returns:
+        float: The logarithm of the probability.
+    """
+    return math.log(probability) if probability > 0 else -math.inf
+
+
+def logsumexp(log_values: Iterable[float]) -> float:
+    """Computes log(sum(exp(log_values))) without leaving log space.
+
+    Args:
+        log_values (Iterable[float]): The logarithms of the values to add up.
+
+    Returns:
+        float: The logarithm of the sum, or -inf if there is nothing to add up.
+    """
+    log_values = list(log_values)
+    peak = max(log_values, default=-math.inf)
+    if peak == -math.inf:
+        return -math.inf
+    return peak + math.log(math.fsum(math.exp(value - peak) for value in log_values))
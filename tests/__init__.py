@@ -0,0 +1,5 @@
+"""Behavioural tests of the assignments, run with ``python -m pytest`` from the repository root.
+
+The scripts are imported by module name, as they import each other when run directly, through the
+pythonpath set in the pytest section of pyproject.toml.
+"""
@@ -0,0 +1,27 @@
+"""The candy bags of compute_a_posteriori and helpers to compare its outputs"""
+
+import re
+
+
+_NUMBER = re.compile(r"(?<=[=:] )[-+0-9.e]+(?=\n)")
+
+
+def candy_bags() -> dict[str, dict[str, float]]:
+    """A fresh copy of the five candy bags main starts from, which the updates change in place."""
+    return {
+        "h1": {"prior": 0.10, "cherry": 1.00, "lime": 0.00},
+        "h2": {"prior": 0.20, "cherry": 0.75, "lime": 0.25},
+        "h3": {"prior": 0.40, "cherry": 0.50, "lime": 0.50},
+        "h4": {"prior": 0.20, "cherry": 0.25, "lime": 0.75},
+        "h5": {"prior": 0.10, "cherry": 0.00, "lime": 1.00},
+    }
+
+
+def split_numbers(text: str) -> tuple[str, list[float]]:
+    """Splits a text result into its layout and its probabilities, so rounding can be tolerated.
+
+    Returns:
+        tuple[str, list[float]]: The text with every probability replaced by '#', and the
+        probabilities in order
+    """
+    return _NUMBER.sub("#", text), [float(number) for number in _NUMBER.findall(text)]
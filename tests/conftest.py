@@ -0,0 +1,12 @@
+"""Fixtures shared by the tests"""
+
+import logging
+
+import compute_a_posteriori
+import pytest
+
+
+@pytest.fixture()
+def _unconfigured_logging(monkeypatch: pytest.MonkeyPatch) -> None:
+    """Keeps main from setting up the process-wide logging, whose thread forked workers inherit."""
+    monkeypatch.setattr(compute_a_posteriori, "setup_logging", logging.getLogger)
@@ -0,0 +1,64 @@
+"""Random road systems and route checks shared by the route search tests"""
+
+import math
+import random
+
+from collections.abc import Iterator
+
+from benchmarks.generators import RoadSystem, geometric_road_system, route_queries
+
+
+_Graph = dict[str, dict[str, float]]
+_Route = list[tuple[str, str, float]]
+
+
+def road_graph(road_system: RoadSystem) -> _Graph:
+    """Builds the graph parse_road_system would read from the written road system."""
+    graph: _Graph = {}
+    for city1, city2, distance in road_system.roads:
+        graph.setdefault(city1, {})[city2] = distance
+        graph.setdefault(city2, {})[city1] = distance
+    return graph
+
+
+def straight_line_heuristic(road_system: RoadSystem, destination: str) -> dict[str, float]:
+    """Builds the heuristic parse_heuristic would read from write_heuristic."""
+    target = road_system.positions[destination]
+    return {
+        city: math.floor(math.dist(position, target) * 10) / 10
+        for city, position in road_system.positions.items()
+    }
+
+
+def random_road_length(
+    road_system: RoadSystem, city1: str, city2: str, rng: random.Random
+) -> float:
+    """A road length between two cities that keeps the straight-line heuristic consistent."""
+    straight = math.dist(road_system.positions[city1], road_system.positions[city2])
+    return math.ceil((straight * rng.uniform(1.0, 2.0) + 1.0) * 10) / 10
+
+
+def random_queries(
+    seeds: range, cities: int, queries: int = 4
+) -> Iterator[tuple[_Graph, str, str, dict[str, float]]]:
+    """Yields (graph, origin, destination, heuristic) on a random geometric road system per seed."""
+    for seed in seeds:
+        road_system = geometric_road_system(cities, seed)
+        graph = road_graph(road_system)
+        for origin, destination in route_queries(road_system, queries, seed):
+            yield graph, origin, destination, straight_line_heuristic(road_system, destination)
+
+
+def route_length(graph: _Graph, origin: str, destination: str, route: _Route) -> float:
+    """Checks that the route follows roads of the graph from origin to destination.
+
+    Returns:
+        float: The sum of the roads of the route
+    """
+    city = origin
+    for city1, city2, distance in route:
+        assert city1 == city
+        assert graph[city1][city2] == distance
+        city = city2
+    assert city == destination
+    return sum(distance for _, _, distance in route)
@@ -0,0 +1,33 @@
+"""Checks the routes of anytime_search against Uniform-Cost Search"""
+
+import pytest
+
+from anytime_route import anytime_search
+from find_route import uninformed_search
+
+from tests.roads import random_queries, route_length
+
+
+@pytest.mark.parametrize("seed", range(16, 24))
+def test_every_route_matches_its_distance(seed: int) -> None:
+    """At every weight the reported distance is the sum of the roads of the reported route."""
+    for graph, origin, destination, heuristic in random_queries(range(seed, seed + 1), 300):
+        optimal = uninformed_search(graph, origin, destination)[3]
+        solutions = list(anytime_search(graph, origin, destination, heuristic, 4.0, 0.5))
+        for solution in solutions:
+            *_, distance, route = solution.result
+            assert route is not None
+            assert distance == pytest.approx(route_length(graph, origin, destination, route))
+            assert distance <= optimal * solution.bound + 1e-9
+        distances = [solution.result[3] for solution in solutions]
+        assert distances == sorted(set(distances), reverse=True)
+        assert distances[-1] == pytest.approx(optimal)
+
+
+def test_unreachable_destination() -> None:
+    """A destination without a route yields a single solution without a route."""
+    graph = {"A": {"B": 1.0}, "B": {"A": 1.0}, "C": {}}
+    solutions = list(anytime_search(graph, "A", "C", {"A": 0, "B": 0, "C": 0}))
+    assert len(solutions) == 1
+    assert solutions[0].result[3] == float("inf")
+    assert solutions[0].result[4] is None
@@ -0,0 +1,71 @@
+"""Checks the samplers of approximate_inference against exact enumeration in bnet"""
+
+import pytest
+
+from approximate_inference import SAMPLERS, gibbs_sampling, likelihood_weighting
+from bnet import BayesianNetwork, _parse_options, calculate_specified_probability  # noqa: PLC2701
+
+
+QUERIES = [
+    ({"B": True}, {}),
+    ({"A": True}, {"J": True}),
+    ({"B": True}, {"J": True, "M": True}),
+    ({"J": True, "M": False}, {"E": False}),
+    ({"A": False, "B": True}, {"M": True}),
+]
+
+
+@pytest.mark.parametrize("method", list(SAMPLERS))
+@pytest.mark.parametrize(("c1", "c2"), QUERIES)
+def test_estimate_covers_exact_probability(
+    method: str, c1: dict[str, bool], c2: dict[str, bool]
+) -> None:
+    """The exact probability lies within the 99.9% confidence interval of every sampler."""
+    network = BayesianNetwork()
+    exact = calculate_specified_probability(network, c1, c2)
+    result = SAMPLERS[method](network, c1, c2, samples=200_000, confidence=0.999, seed=7)
+    # Clamping every event of c1 without c2 is exact, so its interval has no width to spare
+    assert result.lower - 1e-12 <= exact <= result.upper + 1e-12
+    assert result.samples >= 1
+
+
+def test_seed_makes_estimates_reproducible() -> None:
+    """The same seed draws the same samples."""
+    network = BayesianNetwork()
+    first = likelihood_weighting(network, {"B": True}, {"J": True}, samples=10_000, seed=3)
+    second = likelihood_weighting(network, {"B": True}, {"J": True}, samples=10_000, seed=3)
+    assert first.probability == second.probability
+
+
+@pytest.mark.parametrize("method", list(SAMPLERS))
+def test_empty_sample_budget_is_rejected(method: str) -> None:
+    """A sample budget of 0 raises instead of dividing by zero."""
+    with pytest.raises(ValueError, match="sample budget"):
+        SAMPLERS[method](BayesianNetwork(), {"B": True}, {}, samples=0)
+
+
+def test_gibbs_keeps_a_sweep_under_a_small_budget() -> None:
+    """A budget smaller than the number of chains still averages over one full sweep."""
+    result = gibbs_sampling(BayesianNetwork(), {"A": True}, {"J": True}, samples=5, seed=1)
+    assert result.samples == 5
+    assert 0 <= result.probability <= 1
+
+
+@pytest.mark.parametrize(("samples", "chains"), [(25, 10), (7, 3), (10, 10)])
+def test_gibbs_stops_at_the_sample_budget(samples: int, chains: int) -> None:
+    """The last sweep only advances the chains the budget has samples left for."""
+    result = gibbs_sampling(
+        BayesianNetwork(), {"A": True}, {"J": True}, samples=samples, chains=chains, seed=2
+    )
+    assert result.samples == samples
+    assert 0 <= result.probability <= 1
+
+
+@pytest.mark.parametrize("confidence", ["0", "1", "1.5", "-0.2"])
+def test_confidence_outside_0_and_1_is_rejected(
+    confidence: str, capsys: pytest.CaptureFixture[str]
+) -> None:
+    """A confidence level without a confidence interval is a command line error."""
+    with pytest.raises(SystemExit, match="2"):
+        _parse_options(["Bt", "--method", "gibbs", "--confidence", confidence])
+    assert "--confidence must be between 0 and 1" in capsys.readouterr().err
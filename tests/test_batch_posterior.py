@@ -0,0 +1,92 @@
+"""Checks the batch posteriors against updating each sequence one observation at a time"""
+
+from pathlib import Path
+
+import numpy as np
+import pytest
+
+from compute_a_posteriori import CANDY_TYPES, main, next_candy_probability, update_posterior
+from hypothesis_set import HypothesisSet, batch_posterior
+
+from benchmarks.generators import candy_observations
+from tests.candies import candy_bags
+
+
+CANDY_BAGS_FILE = (
+    Path(__file__).resolve().parents[1]
+    / "A3_Probabilities_and_Bayesian_Networks/task1/inputs/candy_bags.txt"
+)
+
+
+def _final(observations: str) -> list[float]:
+    """The posteriors and next candy probabilities after updating on every observation"""
+    hypotheses = candy_bags()
+    for observation in observations:
+        update_posterior(hypotheses, observation)  # type: ignore[arg-type]
+    return [
+        *(hypothesis["prior"] for hypothesis in hypotheses.values()),
+        next_candy_probability(hypotheses, "cherry"),
+        next_candy_probability(hypotheses, "lime"),
+    ]
+
+
+@pytest.mark.parametrize(("workers", "chunk_size"), [(1, 1024), (1, 3), (2, 4)])
+def test_batch_matches_the_updates(workers: int, chunk_size: int) -> None:
+    """Every sequence gets the final posteriors of the observation-by-observation updates."""
+    sequences = ["", "C", "L", *(candy_observations(length, length) for length in range(2, 40))]
+    hypothesis_set = HypothesisSet.from_dict(candy_bags(), CANDY_TYPES)
+    posteriors, next_candy = batch_posterior(hypothesis_set, sequences, workers, chunk_size)
+    expected = np.array([_final(sequence) for sequence in sequences])
+    np.testing.assert_allclose(posteriors, expected[:, :5], rtol=1e-9, atol=1e-12)
+    np.testing.assert_allclose(next_candy, expected[:, 5:], rtol=1e-9, atol=1e-12)
+
+
+def test_hypothesis_file_matches_the_candy_bags() -> None:
+    """The bundled hypothesis file holds the five candy bags main starts from."""
+    from_file = HypothesisSet.from_file(CANDY_BAGS_FILE)
+    from_dict = HypothesisSet.from_dict(candy_bags(), CANDY_TYPES)
+    assert from_file.names == from_dict.names
+    assert from_file.codes == from_dict.codes
+    np.testing.assert_allclose(from_file.priors, from_dict.priors)
+    np.testing.assert_allclose(from_file.likelihoods, from_dict.likelihoods)
+
+
+def test_impossible_sequences_are_rejected() -> None:
+    """A sequence that rules out every hypothesis raises instead of dividing by 0."""
+    hypothesis_set = HypothesisSet.from_dict(
+        {"h1": candy_bags()["h1"] | {"prior": 1.0}}, CANDY_TYPES
+    )
+    with pytest.raises(ValueError, match="impossible"):
+        batch_posterior(hypothesis_set, ["CCL"])
+
+
+@pytest.mark.usefixtures("_unconfigured_logging")
+def test_batch_file_skips_blank_lines(tmp_path: Path) -> None:
+    """Blank lines of a --batch file neither get a result nor shift the sequence numbers."""
+    sequences = ["CLLC", "LLLLL", "C"]
+    batch = tmp_path / "batch.txt"
+    batch.write_text(f"\n{sequences[0]}\n\n  {sequences[1]}  \r\n\n{sequences[2]}\n\n")
+    output = tmp_path / "batch.csv"
+    main(["--batch", str(batch), "--format", "csv", "--output", str(output)])
+
+    rows = [row.split(",") for row in output.read_text().splitlines()[1:]]
+    assert [(row[0], row[1]) for row in rows] == [("1", "4"), ("2", "5"), ("3", "1")]
+    values = np.array([[float(value) for value in row[2:]] for row in rows])
+    np.testing.assert_allclose(
+        values, [_final(sequence) for sequence in sequences], rtol=1e-9, atol=1e-12
+    )
+
+
+@pytest.mark.usefixtures("_unconfigured_logging")
+@pytest.mark.parametrize("output_format", ["text", "binary"])
+def test_output_to_stdout_matches_the_output_file(
+    tmp_path: Path, output_format: str, capsysbinary: pytest.CaptureFixture[bytes]
+) -> None:
+    """Writing the batch results to stdout gives the same bytes as writing them to a file."""
+    batch = tmp_path / "batch.txt"
+    batch.write_text("CLLC\nLLLLL\nC\n")
+    options = ["--batch", str(batch), "--format", output_format]
+    main([*options, "--output", str(tmp_path / "result")])
+    capsysbinary.readouterr()
+    main([*options, "--output", "-"])
+    assert capsysbinary.readouterr().out == (tmp_path / "result").read_bytes()
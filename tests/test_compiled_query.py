@@ -0,0 +1,197 @@
+"""Checks the compiled evaluators of compiled_query against enumeration and their disk cache"""
+
+import json
+import re
+import weakref
+
+from itertools import product
+from typing import TYPE_CHECKING, Any
+
+import compiled_query
+import pytest
+
+from bnet import BayesianNetwork, calculate_specified_probability
+from compiled_query import calculate_compiled_probability, compile_query
+
+from benchmarks.generators import random_dag
+
+
+if TYPE_CHECKING:
+    from pathlib import Path
+
+
+def _queries(variables: tuple[str, ...]) -> list[tuple[dict[str, bool], dict[str, bool]]]:
+    """Every query over distinct variables with one or two events in c1 and up to two in c2"""
+    queries = []
+    for c1_size, c2_size in product(range(1, 3), range(3)):
+        for chosen in product(variables, repeat=c1_size + c2_size):
+            if len(set(chosen)) < len(chosen):
+                continue
+            for states in product([True, False], repeat=len(chosen)):
+                events = list(zip(chosen, states, strict=True))
+                queries.append((dict(events[:c1_size]), dict(events[c1_size:])))
+    return queries
+
+
+def _enumerate(network: BayesianNetwork, events: dict[str, bool]) -> float:
+    """P(events) by summing the joint distribution of a small network"""
+    total = 0.0
+    for states in product([True, False], repeat=len(network.variables)):
+        assignment = dict(zip(network.variables, states, strict=True))
+        if any(assignment[variable] != state for variable, state in events.items()):
+            continue
+        probability = 1.0
+        for variable, parents in network.parents.items():
+            p_true = network.cpt[variable][tuple(assignment[parent] for parent in parents)]
+            probability *= p_true if assignment[variable] else 1 - p_true
+        total += probability
+    return total
+
+
+def _random_network(seed: int, variables: int = 7) -> BayesianNetwork:
+    """A BayesianNetwork with the structure and the CPTs of a random DAG"""
+    network = BayesianNetwork()
+    network.parents, network.cpt = random_dag(variables, 3, seed)
+    return network
+
+
+def test_matches_enumeration_on_the_burglary_network() -> None:
+    """Every query gives the probability of calculate_specified_probability."""
+    network = BayesianNetwork()
+    for c1, c2 in _queries(network.variables):
+        expected = calculate_specified_probability(network, c1, c2)
+        assert calculate_compiled_probability(network, c1, c2) == pytest.approx(expected)
+
+
+@pytest.mark.parametrize("seed", range(3))
+def test_matches_enumeration_on_random_dags(seed: int) -> None:
+    """Queries on random DAGs give the ratio of the enumerated marginals."""
+    network = _random_network(seed)
+    for c1, c2 in _queries(network.variables)[::101]:
+        evidence = _enumerate(network, c2)
+        expected = _enumerate(network, {**c1, **c2}) / evidence if evidence else 0.0
+        assert calculate_compiled_probability(network, c1, c2) == pytest.approx(expected)
+
+
+@pytest.fixture()
+def memory_cache(monkeypatch: pytest.MonkeyPatch) -> "weakref.WeakKeyDictionary[Any, Any]":
+    """Starts from an empty memory cache, which the test can clear to act as a new process."""
+    cache: weakref.WeakKeyDictionary[Any, Any] = weakref.WeakKeyDictionary()
+    monkeypatch.setattr(compiled_query, "_compiled", cache)
+    return cache
+
+
+def _cache_file(cache_dir: "Path") -> "Path":
+    """The only circuit in the disk cache"""
+    (path,) = cache_dir.glob("*.json")
+    return path
+
+
+def test_disk_cache_holds_data_and_is_reused(
+    tmp_path: "Path", memory_cache: "weakref.WeakKeyDictionary[Any, Any]"
+) -> None:
+    """The disk cache holds the circuit as JSON, which a new process reads back."""
+    network = BayesianNetwork()
+    compiled = compile_query(network, ["B"], ["J", "M"], tmp_path)
+    path = _cache_file(tmp_path)
+    assert json.loads(path.read_text(encoding="utf-8"))["operations"]
+
+    memory_cache.clear()
+    modified = path.stat().st_mtime_ns
+    reloaded = compile_query(network, ["B"], ["J", "M"], tmp_path)
+    assert reloaded is not compiled
+    assert reloaded.source == compiled.source
+    assert path.stat().st_mtime_ns == modified
+
+
+def _tampered(circuit: dict[str, Any]) -> list[str]:
+    """Cache files that are corrupt, truncated, stale, or try to smuggle code into the evaluator"""
+    injected = json.loads(json.dumps(circuit))
+    injected["operations"][0][1][0] = "__import__('os').system('exit 1')"
+    forward = json.loads(json.dumps(circuit))
+    forward["operations"][0][1][0] = f"t{len(circuit['operations'])}"
+    unknown = json.loads(json.dumps(circuit))
+    unknown["operations"][0][0] = "pow"
+    return [
+        "",
+        json.dumps(circuit)[:40],
+        "[1, 2, 3]",
+        "def evaluate(*args):\n    return 0.5\n",
+        json.dumps({**circuit, "key": "0" * 64}),
+        json.dumps({**circuit, "version": 1}),
+        json.dumps({**circuit, "numerator": "print"}),
+        json.dumps({**circuit, "numerator": float("nan")}),
+        json.dumps({**circuit, "denominator": None}),
+        json.dumps({**circuit, "operations": [["mul", "t0"]]}),
+        json.dumps({**circuit, "operations": 7}),
+        json.dumps(injected),
+        json.dumps(forward),
+        json.dumps(unknown),
+    ]
+
+
+def test_invalid_cache_files_are_recompiled(
+    tmp_path: "Path", memory_cache: "weakref.WeakKeyDictionary[Any, Any]"
+) -> None:
+    """A cache file that is not a valid circuit is never run, but compiled again and replaced."""
+    network = _random_network(11)
+    c1, c2 = {"V5": True}, {"V0": False, "V2": True}
+    expected = calculate_compiled_probability(network, c1, c2, tmp_path)
+    path = _cache_file(tmp_path)
+    circuit = json.loads(path.read_text(encoding="utf-8"))
+
+    for contents in _tampered(circuit):
+        path.write_text(contents, encoding="utf-8")
+        memory_cache.clear()
+        assert calculate_compiled_probability(network, c1, c2, tmp_path) == expected
+        assert json.loads(path.read_text(encoding="utf-8")) == circuit
+
+
+def test_variables_must_be_identifiers() -> None:
+    """Variables that cannot name an argument of the evaluator are rejected."""
+    network = BayesianNetwork()
+    network.parents = {"B": (), "x)": ("B",)}
+    network.cpt = {"B": {(): 0.5}, "x)": {(True,): 0.9, (False,): 0.1}}
+    with pytest.raises(ValueError, match="identifiers"):
+        compile_query(network, ["B"])
+
+
+def test_memory_cache_is_bounded_and_follows_the_network(
+    monkeypatch: pytest.MonkeyPatch, memory_cache: "weakref.WeakKeyDictionary[Any, Any]"
+) -> None:
+    """Only the most recently used shapes are kept, and only while the network is alive."""
+    monkeypatch.setattr(compiled_query, "MAX_CACHED_SHAPES", 3)
+    network = _random_network(4)
+    first = compile_query(network, ["V1"])
+    for variable in ("V2", "V3"):
+        compile_query(network, [variable])
+    assert compile_query(network, ["V1"]) is first
+    compile_query(network, ["V4"])
+    assert list(memory_cache[network]) == [
+        (("V3",), ()),
+        (("V1",), ()),
+        (("V4",), ()),
+    ]
+
+    del network
+    assert not memory_cache
+
+
+def test_recompile_picks_up_changed_cpts(
+    memory_cache: "weakref.WeakKeyDictionary[Any, Any]",
+) -> None:
+    """A network whose CPTs change keeps its evaluators until the shape is compiled again."""
+    network = BayesianNetwork()
+    before = compile_query(network, ["B"]).probability({"B": True}, {})
+    network.cpt["B"] = {(): 0.5}
+    assert compile_query(network, ["B"]).probability({"B": True}, {}) == before
+    assert compile_query(network, ["B"], recompile=True).probability({"B": True}, {}) == 0.5
+    assert compile_query(network, ["B"]).probability({"B": True}, {}) == 0.5
+    assert len(memory_cache[network]) == 1
+
+
+def test_evaluator_reuses_the_names_of_dead_results() -> None:
+    """The evaluator keeps only the intermediate results that are still needed."""
+    compiled = compile_query(_random_network(3, 12), ["V11"], ["V0", "V5"])
+    results = set(re.findall(r"\br\d+\b", compiled.source))
+    assert len(results) * 4 < compiled.source.count("\n")
@@ -0,0 +1,84 @@
+"""Checks distance_matrix against Uniform-Cost Search between every source and target"""
+
+import math
+import random
+
+from typing import TYPE_CHECKING
+
+import numpy as np
+import pytest
+
+from distance_matrix import distance_matrix, route_from_predecessors
+from find_route import uninformed_search
+
+from benchmarks.generators import geometric_road_system
+from tests.roads import road_graph, route_length
+
+
+if TYPE_CHECKING:
+    from pathlib import Path
+
+
+def _query(seed: int) -> tuple[dict[str, dict[str, float]], list[str], list[str]]:
+    """A road system with an isolated city, and random sources and targets among its cities"""
+    graph = road_graph(geometric_road_system(150, seed))
+    graph["Island"] = {}
+    rng = random.Random(seed)
+    cities = sorted(graph)
+    sources = [*rng.sample(cities, 8), "Island", "Nowhere"]
+    targets = [*rng.sample(cities, 6), sources[0], "Island", "Nowhere"]
+    return graph, sources, targets
+
+
+def _expected(graph: dict[str, dict[str, float]], origin: str, destination: str) -> float:
+    """The distance Uniform-Cost Search finds, or infinity for a city not in the graph"""
+    if origin not in graph or destination not in graph:
+        return math.inf
+    return uninformed_search(graph, origin, destination)[3]
+
+
+@pytest.mark.parametrize("seed", range(3))
+def test_distances_and_routes_match_uniform_cost_search(seed: int) -> None:
+    """Every distance is the one UCS finds, and the predecessors give a route of that length."""
+    graph, sources, targets = _query(seed)
+    distances, parents, cities = distance_matrix(graph, sources, targets, predecessors=True)
+    assert parents is not None
+    assert distances.shape == (len(sources), len(targets))
+
+    for row, origin in enumerate(sources):
+        for column, destination in enumerate(targets):
+            expected = _expected(graph, origin, destination)
+            assert distances[row, column] == pytest.approx(expected)
+            route = route_from_predecessors(graph, cities, parents[row], origin, destination)
+            if math.isinf(expected):
+                assert route is None
+                continue
+            assert route is not None
+            assert route_length(graph, origin, destination, route) == pytest.approx(expected)
+
+
+def test_workers_and_output_files_give_the_same_matrix(tmp_path: "Path") -> None:
+    """Splitting the sources over processes and writing to .npy files changes nothing."""
+    graph, sources, targets = _query(5)
+    distances, parents, _ = distance_matrix(graph, sources, targets, predecessors=True)
+    assert parents is not None
+    output, predecessor_output = tmp_path / "distances.npy", tmp_path / "parents.npy"
+    written, written_parents, _ = distance_matrix(
+        graph, sources, targets, 2, output, predecessor_output, chunk_size=3
+    )
+    assert written_parents is not None
+    np.testing.assert_array_equal(written, distances)
+    np.testing.assert_array_equal(np.load(output), distances)
+    np.testing.assert_array_equal(written_parents, parents)
+    np.testing.assert_array_equal(np.load(predecessor_output), parents)
+
+
+def test_rows_only_hold_routes_to_the_targets() -> None:
+    """Any city left in a row is on the shortest route to a target, and no other city is."""
+    graph, sources, targets = _query(7)
+    _, parents, cities = distance_matrix(graph, sources, targets, predecessors=True)
+    assert parents is not None
+    for row, origin in enumerate(sources):
+        routes = [route_from_predecessors(graph, cities, parents[row], origin, t) for t in targets]
+        on_routes = {city for route in routes if route for _, city, _ in route}
+        assert {cities[city] for city in np.flatnonzero(parents[row] >= 0)} == on_routes
@@ -0,0 +1,95 @@
+"""Checks the routes DynamicRouter repairs after random road changes against Uniform-Cost Search"""
+
+import random
+
+from pathlib import Path
+
+import pytest
+
+from dynamic_route import DynamicRouter, main
+from find_route import uninformed_search
+
+from benchmarks.generators import geometric_road_system, route_queries
+from tests.roads import random_road_length, road_graph, route_length, straight_line_heuristic
+
+
+@pytest.mark.parametrize("informed", [False, True])
+@pytest.mark.parametrize("seed", range(4))
+def test_repaired_routes_are_optimal(seed: int, informed: bool) -> None:
+    """After every batch of opened, closed, and changed roads the route is a shortest one."""
+    road_system = geometric_road_system(150, seed)
+    graph = road_graph(road_system)
+    [(origin, destination)] = route_queries(road_system, 1, seed)
+    heuristic = straight_line_heuristic(road_system, destination) if informed else None
+    router = DynamicRouter(graph, origin, destination, heuristic)
+    cities = sorted(road_system.positions)
+    rng = random.Random(seed)
+
+    route = router.compute_route()[4]
+    for _ in range(40):
+        for _ in range(3):
+            # Changes on the current route are the ones that force a repair
+            if route and rng.random() < 0.5:
+                city1, city2, _ = rng.choice(route)
+            else:
+                city1 = rng.choice(cities)
+                city2 = rng.choice([*graph[city1], *rng.sample(cities, 2)])
+            if city1 == city2:
+                continue
+            if city2 in graph[city1] and rng.random() < 0.4:
+                router.remove_road(city1, city2)
+            else:
+                router.update_road(city1, city2, random_road_length(road_system, city1, city2, rng))
+
+        *_, distance, route = router.compute_route()
+        expected = uninformed_search(graph, origin, destination)[3]
+        assert distance == pytest.approx(expected)
+        if route is not None:
+            assert distance == pytest.approx(route_length(graph, origin, destination, route))
+
+
+def test_closing_the_only_road_and_reopening_it() -> None:
+    """A destination cut off by a closed road is unreachable until the road opens again."""
+    graph = {"A": {"B": 1.0}, "B": {"A": 1.0, "C": 2.0}, "C": {"B": 2.0}}
+    router = DynamicRouter(graph, "A", "C")
+    assert router.compute_route()[3:] == (3.0, [("A", "B", 1.0), ("B", "C", 2.0)])
+    router.remove_road("B", "C")
+    assert router.compute_route()[3:] == (float("inf"), None)
+    router.update_road("A", "C", 5.0)
+    assert router.compute_route()[3:] == (5.0, [("A", "C", 5.0)])
+
+
+def test_counts_superseded_entries_as_popped() -> None:
+    """Entries superseded by a later key are popped but not expanded."""
+    graph = {"A": {"B": 1.0, "C": 4.0}, "B": {"A": 1.0, "C": 1.0}, "C": {"A": 4.0, "B": 1.0}}
+    router = DynamicRouter(graph, "A", "C")
+    popped, expanded, *_, route = router.compute_route()
+    assert route == [("A", "B", 1.0), ("B", "C", 1.0)]
+    assert popped > expanded
+
+
+def test_cities_missing_from_the_heuristic_are_estimated_at_infinity() -> None:
+    """A city without a heuristic value is only expanded once nothing better is left."""
+    graph = {"A": {"B": 1.0, "C": 1.0}, "B": {"A": 1.0, "D": 1.0}, "C": {"A": 1.0, "D": 1.0}}
+    graph["D"] = {"B": 1.0, "C": 1.0}
+    router = DynamicRouter(graph, "A", "D", {"A": 2.0, "B": 1.0, "D": 0.0})
+    _, expanded, _, distance, route = router.compute_route()
+    assert (distance, route) == (2.0, [("A", "B", 1.0), ("B", "D", 1.0)])
+    assert expanded == 3
+
+
+def test_main_takes_the_arguments(tmp_path: Path, capsys: pytest.CaptureFixture[str]) -> None:
+    """The arguments can be passed instead of read from sys.argv."""
+    roads, events = tmp_path / "roads.txt", tmp_path / "events.txt"
+    roads.write_text("A B 1\nB C 2\nEND OF INPUT\n", encoding="locale")
+    events.write_text("B C inf\nEND OF INPUT\n", encoding="locale")
+    main([str(roads), "A", "C", str(events)])
+    output = capsys.readouterr().out
+    assert output.startswith("Initial Route\n")
+    assert "Distance: 3.0 km" in output
+    assert output.endswith(
+        "\nClosed B to C\nNodes Popped: 1\nNodes Expanded: 1\n"
+        "Nodes Generated: 0\nDistance: Infinity\nRoute:\nNone\n"
+    )
+    main([str(roads), "A"])
+    assert capsys.readouterr().out == "Invalid number of arguments.\n"
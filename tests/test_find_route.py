@@ -0,0 +1,28 @@
+"""Checks the distances of Weighted A* against Uniform-Cost Search"""
+
+import math
+
+import pytest
+
+from find_route import informed_search, uninformed_search
+
+from tests.roads import random_queries, route_length
+
+
+@pytest.mark.parametrize("weight", [1.0, 1.5, 3.0])
+def test_weighted_routes_stay_within_the_bound(weight: float) -> None:
+    """The route of Weighted A* is at most weight times as long as the shortest route."""
+    for graph, origin, destination, heuristic in random_queries(range(4), 200):
+        optimal = uninformed_search(graph, origin, destination)[3]
+        *_, distance, route = informed_search(graph, origin, destination, heuristic, weight)
+        assert route is not None
+        assert distance == pytest.approx(route_length(graph, origin, destination, route))
+        assert optimal <= distance <= weight * optimal + 1e-9
+
+
+@pytest.mark.parametrize("weight", [0.0, 0.5, -1.0, math.nan])
+def test_weights_below_1_are_rejected(weight: float) -> None:
+    """A weight below 1 loses the bound, and a weight of 0 turns a missing heuristic into nan."""
+    graph = {"A": {"B": 1.0}, "B": {"A": 1.0}}
+    with pytest.raises(ValueError, match="at least 1"):
+        informed_search(graph, "A", "B", {"B": 0.0}, weight)
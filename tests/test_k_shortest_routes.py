@@ -0,0 +1,88 @@
+"""Checks the routes of k_shortest_routes against every loopless route of small road systems"""
+
+import random
+
+import pytest
+
+from k_shortest_routes import k_shortest_routes
+
+from tests.roads import route_length
+
+
+def _random_graph(seed: int, cities: int = 9) -> dict[str, dict[str, float]]:
+    """A road system with a road between each pair of cities with probability 0.4"""
+    rng = random.Random(seed)
+    graph: dict[str, dict[str, float]] = {f"C{index}": {} for index in range(cities)}
+    for index1 in range(cities):
+        for index2 in range(index1 + 1, cities):
+            if rng.random() < 0.4:
+                distance = float(rng.randint(1, 20))
+                graph[f"C{index1}"][f"C{index2}"] = distance
+                graph[f"C{index2}"][f"C{index1}"] = distance
+    return graph
+
+
+def _loopless_routes(
+    graph: dict[str, dict[str, float]], origin: str, destination: str
+) -> list[float]:
+    """The distance of every loopless route from origin to destination, shortest first"""
+    distances = []
+    stack: list[tuple[str, tuple[str, ...], float]] = [(origin, (origin,), 0.0)]
+    while stack:
+        city, visited, distance = stack.pop()
+        if city == destination:
+            distances.append(distance)
+            continue
+        for neighbor, road in graph[city].items():
+            if neighbor not in visited:
+                stack.append((neighbor, (*visited, neighbor), distance + road))
+    return sorted(distances)
+
+
+@pytest.mark.parametrize("seed", range(12))
+def test_routes_are_the_k_shortest_loopless_routes(seed: int) -> None:
+    """The routes are distinct and loopless, and their distances are the k smallest."""
+    graph = _random_graph(seed)
+    origin, destination = "C0", f"C{len(graph) - 1}"
+    expected = _loopless_routes(graph, origin, destination)
+    for k in (1, 5, 40, len(expected) + 5):
+        results = k_shortest_routes(graph, origin, destination, k)
+        if not expected:
+            assert [result[3:] for result in results] == [(float("inf"), None)]
+            continue
+
+        routes = []
+        for *_, distance, route in results:
+            assert route is not None
+            assert distance == pytest.approx(route_length(graph, origin, destination, route))
+            cities = [origin, *(city2 for _, city2, _ in route)]
+            assert len(set(cities)) == len(cities)
+            routes.append(tuple(cities))
+        assert len(set(routes)) == len(routes)
+        assert [result[3] for result in results] == pytest.approx(expected[:k])
+
+
+def test_unreachable_destination() -> None:
+    """A destination without a route gives a single result without a route."""
+    graph = {"A": {"B": 1.0}, "B": {"A": 1.0}, "C": {}}
+    assert [result[3:] for result in k_shortest_routes(graph, "A", "C", 3)] == [
+        (float("inf"), None)
+    ]
+
+
+def test_zero_length_roads() -> None:
+    """Ties through roads of length 0 still give the shortest routes instead of going in circles."""
+    graph = {
+        "A": {"B": 0.0, "C": 5.0},
+        "B": {"A": 0.0, "C": 5.0},
+        "C": {"A": 5.0, "B": 5.0},
+    }
+    results = k_shortest_routes(graph, "A", "C", 3)
+    assert [result[3] for result in results] == [5.0, 5.0]
+    assert all(result[4] is not None and len(result[4]) <= 2 for result in results)
+
+
+def test_rejects_less_than_one_route() -> None:
+    """Asking for no routes is an error rather than a missing route."""
+    with pytest.raises(ValueError, match="at least 1"):
+        k_shortest_routes({"A": {"B": 1.0}, "B": {"A": 1.0}}, "A", "B", 0)
@@ -0,0 +1,73 @@
+"""Checks that the shared logging only starts its background thread once a record is logged"""
+
+import logging
+import subprocess  # noqa: S404
+import sys
+import threading
+import time
+
+from pathlib import Path
+from typing import TYPE_CHECKING
+
+from cse4380.log import _DeferredQueueHandler  # noqa: PLC2701
+
+
+if TYPE_CHECKING:
+    import pytest
+
+
+REPOSITORY = Path(__file__).resolve().parents[1]
+
+# Run in a fresh interpreter, since pytest has already imported logging.handlers and set up logging
+CHECK = """
+import sys
+import threading
+
+from cse4380.log import setup_logging
+
+logger = setup_logging("INFO")
+assert "logging.handlers" not in sys.modules
+assert threading.active_count() == 1
+logger.debug("below the level")
+assert threading.active_count() == 1
+logger.info("first record")
+assert "logging.handlers" in sys.modules
+assert threading.active_count() == 2
+assert setup_logging() is logger
+logger.warning("second record")
+"""
+
+
+def test_thread_starts_with_the_first_record() -> None:
+    """Nothing is started before the first record, which is written out before the exit."""
+    result = subprocess.run(
+        [sys.executable, "-c", CHECK],  # noqa: S603
+        cwd=REPOSITORY,
+        capture_output=True,
+        text=True,
+        check=False,
+    )
+    assert result.returncode == 0, result.stderr
+    assert "below the level" not in result.stderr
+    assert "first record" in result.stderr
+    assert "second record" in result.stderr
+
+
+def test_threads_logging_at_once_start_one_listener(monkeypatch: "pytest.MonkeyPatch") -> None:
+    """Threads that emit their first records at the same time share a single listener."""
+    starts: list[logging.Handler] = []
+
+    def start(_handler: _DeferredQueueHandler) -> logging.Handler:
+        time.sleep(0.05)
+        starts.append(logging.NullHandler())
+        return starts[-1]
+
+    monkeypatch.setattr(_DeferredQueueHandler, "_start", start)
+    handler = _DeferredQueueHandler([])
+    record = logging.makeLogRecord({"msg": "first record"})
+    threads = [threading.Thread(target=handler.emit, args=(record,)) for _ in range(8)]
+    for thread in threads:
+        thread.start()
+    for thread in threads:
+        thread.join()
+    assert len(starts) == 1
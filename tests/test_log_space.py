@@ -0,0 +1,75 @@
+"""Checks the log-space updates and probabilities against the ones computed directly"""
+
+from itertools import product
+
+import pytest
+
+from bnet import BayesianNetwork, calculate_specified_probability
+from compute_a_posteriori import update_log_posterior, update_posterior
+
+from benchmarks.generators import candy_observations
+from tests.candies import candy_bags
+
+
+@pytest.mark.parametrize("seed", range(6))
+def test_log_posteriors_match_the_direct_updates(seed: int) -> None:
+    """After every observation the log-space posteriors are the directly updated ones."""
+    direct, log_space = candy_bags(), candy_bags()
+    log_posteriors = None
+    for observation in candy_observations(300, seed):
+        update_posterior(direct, observation)  # type: ignore[arg-type]
+        log_posteriors = update_log_posterior(
+            log_space, observation, log_posteriors  # type: ignore[arg-type]
+        )
+        for name, hypothesis in direct.items():
+            assert log_space[name].keys() == hypothesis.keys()
+            assert log_space[name]["prior"] == pytest.approx(hypothesis["prior"], abs=1e-12)
+
+
+def test_log_posteriors_survive_sequences_that_underflow() -> None:
+    """A sequence whose likelihoods underflow a float still has well defined posteriors."""
+    hypotheses = candy_bags()
+    log_posteriors = None
+    for observation in "CL" * 1000 + "C" * 10:
+        log_posteriors = update_log_posterior(
+            hypotheses, observation, log_posteriors  # type: ignore[arg-type]
+        )
+    assert sum(hypothesis["prior"] for hypothesis in hypotheses.values()) == pytest.approx(1)
+    assert hypotheses["h3"]["prior"] > 0.99
+
+
+def test_direct_updates_continue_from_log_space_updates() -> None:
+    """The hypotheses hold no log-space state, so direct updates can take over at any point."""
+    mixed, direct = candy_bags(), candy_bags()
+    log_posteriors = update_log_posterior(mixed, "C")
+    update_log_posterior(mixed, "L", log_posteriors)
+    for observation in "LL":
+        update_posterior(mixed, observation)  # type: ignore[arg-type]
+    for observation in "CLLL":
+        update_posterior(direct, observation)  # type: ignore[arg-type]
+    for name, hypothesis in direct.items():
+        assert mixed[name].keys() == hypothesis.keys()
+        assert mixed[name]["prior"] == pytest.approx(hypothesis["prior"], abs=1e-12)
+
+
+def test_impossible_observations_are_rejected() -> None:
+    """An observation that every remaining hypothesis rules out raises instead of dividing by 0."""
+    hypotheses = {"h1": candy_bags()["h1"] | {"prior": 1.0}}
+    with pytest.raises(ValueError, match="impossible"):
+        update_log_posterior(hypotheses, "L")
+
+
+def test_log_space_probabilities_match_enumeration() -> None:
+    """Every query on the burglary network has the same probability in log space."""
+    network = BayesianNetwork()
+    for c1_size, c2_size in product(range(1, 3), range(3)):
+        for chosen in product(network.variables, repeat=c1_size + c2_size):
+            if len(set(chosen)) < len(chosen):
+                continue
+            for states in product([True, False], repeat=len(chosen)):
+                events = list(zip(chosen, states, strict=True))
+                c1, c2 = dict(events[:c1_size]), dict(events[c1_size:])
+                expected = calculate_specified_probability(network, c1, c2)
+                assert calculate_specified_probability(
+                    network, c1, c2, log_space=True
+                ) == pytest.approx(expected, rel=1e-9, abs=1e-300)
@@ -0,0 +1,89 @@
+"""Checks MctsPlayer against an exact solution of small Red-Blue Nim positions"""
+
+from functools import cache
+from typing import TypedDict
+
+import pytest
+
+from mcts import MctsPlayer
+from red_blue_nim import GameState, valid_moves
+
+
+VERSIONS = ["standard", "misere"]
+
+
+class _Budgets(TypedDict, total=False):
+    """The budget arguments of MctsPlayer"""
+
+    time_budget: float | None
+    iterations: int | None
+    max_nodes: int | None
+
+
+@cache
+def _to_move_wins(red: int, blue: int, version: str) -> bool:
+    """Whether the player to move wins the position with best play"""
+    state = GameState(red, blue, version)
+    if state.is_game_over():
+        # The player who emptied a pile wins the standard version and loses the misere version
+        return version != "standard"
+    return not all(
+        _to_move_wins(*_after(red, blue, version, move)) for move in valid_moves(state, version)
+    )
+
+
+def _after(red: int, blue: int, version: str, move: tuple[str, int]) -> tuple[int, int, str]:
+    """The position reached by a move"""
+    state = GameState(red, blue, version)
+    state.execute_move(move)
+    return state.red_marbles, state.blue_marbles, version
+
+
+def _won_positions(version: str, size: int) -> list[tuple[int, int]]:
+    """The positions of up to size marbles per pile that the player to move wins"""
+    return [
+        (red, blue)
+        for red in range(1, size + 1)
+        for blue in range(1, size + 1)
+        if _to_move_wins(red, blue, version)
+    ]
+
+
+@pytest.mark.parametrize("version", VERSIONS)
+def test_finds_forced_wins(version: str) -> None:
+    """Every position the player to move wins is answered with a winning move."""
+    positions = _won_positions(version, 9)
+    assert positions
+    player = MctsPlayer(version, time_budget=None, iterations=2000, seed=0)
+    for red, blue in positions:
+        move = player.choose_move(GameState(red, blue, version))
+        assert not _to_move_wins(*_after(red, blue, version, move)), (red, blue, move)
+
+
+@pytest.mark.parametrize("version", VERSIONS)
+def test_keeps_at_most_max_nodes(version: str) -> None:
+    """The search graph never holds more nodes than the limit over a whole game."""
+    player = MctsPlayer(version, time_budget=None, max_nodes=50, seed=1)
+    state = GameState(40, 40, version)
+    sizes = []
+    search = player._search  # noqa: SLF001
+    assert search is not None
+    while not state.is_game_over():
+        state.execute_move(player.choose_move(state))
+        sizes.append(len(search.nodes))
+    assert max(sizes) <= 50
+    assert max(sizes) == 50
+
+
+@pytest.mark.parametrize(
+    ("budgets", "message"),
+    [
+        ({"time_budget": None}, "required"),
+        ({"iterations": 0}, "iteration budget"),
+        ({"max_nodes": 1}, "node limit"),
+    ],
+)
+def test_rejects_invalid_budgets(budgets: _Budgets, message: str) -> None:
+    """Missing or empty budgets are rejected."""
+    with pytest.raises(ValueError, match=message):
+        MctsPlayer("standard", **budgets)
@@ -0,0 +1,52 @@
+"""Checks the routes of IDA* and SMA* against Uniform-Cost Search"""
+
+import pytest
+
+from find_route import informed_search, uninformed_search
+from memory_bounded_route import ida_star_search, sma_star_search
+
+from tests.roads import random_queries, route_length
+
+
+@pytest.mark.parametrize(("growth", "cache_size"), [(0.0, 1 << 20), (0.05, 1 << 20), (0.05, 16)])
+@pytest.mark.parametrize("seed", range(3))
+def test_ida_star_routes_are_optimal(seed: int, growth: float, cache_size: int) -> None:
+    """IDA* finds a shortest route, however much the threshold grows or the cache holds."""
+    for graph, origin, destination, heuristic in random_queries(range(seed, seed + 1), 80):
+        expected = uninformed_search(graph, origin, destination)[3]
+        *_, distance, route = ida_star_search(
+            graph, origin, destination, heuristic, cache_size, growth
+        )
+        assert route is not None
+        assert distance == pytest.approx(expected)
+        assert distance == pytest.approx(route_length(graph, origin, destination, route))
+
+
+@pytest.mark.parametrize("seed", range(3))
+def test_sma_star_routes_are_optimal_with_enough_memory(seed: int) -> None:
+    """SMA* finds a shortest route when its memory holds the whole road system."""
+    for graph, origin, destination, heuristic in random_queries(range(seed, seed + 1), 300):
+        expected = uninformed_search(graph, origin, destination)[3]
+        *_, distance, route = sma_star_search(graph, origin, destination, heuristic, 1 << 12)
+        assert route is not None
+        assert distance == pytest.approx(expected)
+        assert distance == pytest.approx(route_length(graph, origin, destination, route))
+
+
+@pytest.mark.parametrize("seed", range(4))
+def test_sma_star_routes_are_optimal_with_the_memory_a_star_expands(seed: int) -> None:
+    """SMA* still finds a shortest route when it has to drop nodes that A* would keep."""
+    for graph, origin, destination, heuristic in random_queries(range(seed, seed + 1), 300):
+        nodes_expanded, _, expected = informed_search(graph, origin, destination, heuristic)[1:4]
+        *_, distance, route = sma_star_search(graph, origin, destination, heuristic, nodes_expanded)
+        assert route is not None
+        assert distance == pytest.approx(expected)
+        assert distance == pytest.approx(route_length(graph, origin, destination, route))
+
+
+def test_unreachable_destination() -> None:
+    """Both searches give up on a destination without a route."""
+    graph = {"A": {"B": 1.0}, "B": {"A": 1.0, "C": 1.0}, "C": {"B": 1.0}, "D": {}}
+    heuristic = dict.fromkeys(graph, 0.0)
+    assert ida_star_search(graph, "A", "D", heuristic)[3:] == (float("inf"), None)
+    assert sma_star_search(graph, "A", "D", heuristic, 8)[3:] == (float("inf"), None)
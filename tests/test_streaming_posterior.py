@@ -0,0 +1,148 @@
+"""Checks the streamed posteriors against the ones computed in memory"""
+
+import io
+import sys
+
+from typing import TYPE_CHECKING
+
+import numpy as np
+import pytest
+
+from compute_a_posteriori import calculate_posterior, main, posterior_trajectory, stream_posterior
+from posterior_io import BinarySink, CsvSink, TextSink, read_observation_chunks
+
+from benchmarks.generators import candy_observations
+from tests.candies import candy_bags, split_numbers
+
+
+if TYPE_CHECKING:
+    from pathlib import Path
+
+    from _typeshed import WriteableBuffer
+
+
+def _chunks(observations: str, size: int) -> list[str]:
+    """The observations split into chunks of the given size"""
+    return [
+        observations[start : start + size]  # noqa: E203, RUF100
+        for start in range(0, len(observations), size)
+    ]
+
+
+class _Pipe(io.RawIOBase):
+    """A pipe that hands out the pieces written to it one read at a time"""
+
+    def __init__(self, pieces: list[bytes]) -> None:
+        self.pieces = pieces
+
+    def readable(self) -> bool:  # noqa: PLR6301
+        return True
+
+    def readinto(self, buffer: "WriteableBuffer") -> int:
+        piece = self.pieces.pop(0) if self.pieces else b""
+        memoryview(buffer)[: len(piece)] = piece
+        return len(piece)
+
+
+@pytest.mark.parametrize("chunk_size", [1, 7, 64, 1000])
+def test_streamed_text_matches_the_in_memory_result(tmp_path: "Path", chunk_size: int) -> None:
+    """However the sequence is split, the text sink writes the result of calculate_posterior."""
+    observations = candy_observations(300, 3)
+    calculate_posterior(candy_bags(), observations, output=tmp_path / "memory.txt")
+
+    hypotheses = candy_bags()
+    with TextSink(tmp_path / "streamed.txt", list(hypotheses), "CL") as sink:
+        sink.write_header(observations, "argv")
+        length = stream_posterior(hypotheses, _chunks(observations, chunk_size), sink)
+        sink.write_footer(length)
+    assert length == len(observations)
+
+    layout, numbers = split_numbers((tmp_path / "memory.txt").read_text())
+    streamed_layout, streamed_numbers = split_numbers((tmp_path / "streamed.txt").read_text())
+    assert streamed_layout == layout
+    assert streamed_numbers == pytest.approx(numbers, rel=1e-4, abs=1e-9)
+
+
+@pytest.mark.parametrize(("chunk_size", "every"), [(1, 3), (10, 4), (64, 64), (50, 1000)])
+def test_streamed_records_match_the_trajectory(
+    tmp_path: "Path", chunk_size: int, every: int
+) -> None:
+    """The binary and CSV sinks hold every Nth row of the in-memory trajectory."""
+    observations = candy_observations(500, 8)
+    posteriors, next_candy = posterior_trajectory(candy_bags(), observations)
+    steps = np.arange(every, len(observations) + 1, every)
+    expected = np.column_stack((steps, posteriors[steps - 1], next_candy[steps - 1]))
+
+    for sink_type, filename in ((BinarySink, "records.bin"), (CsvSink, "records.csv")):
+        hypotheses = candy_bags()
+        with sink_type(tmp_path / filename, list(hypotheses), "CL") as sink:
+            sink.write_header(None, "test")
+            stream_posterior(hypotheses, _chunks(observations, chunk_size), sink, every)
+            sink.write_footer(len(observations))
+        for hypothesis, posterior in zip(hypotheses.values(), posteriors[-1], strict=True):
+            assert hypothesis["prior"] == pytest.approx(posterior, abs=1e-12)
+
+    records = np.fromfile(tmp_path / "records.bin", "<f8").reshape(-1, 8)
+    np.testing.assert_allclose(records, expected, rtol=1e-9, atol=1e-12)
+    rows = (tmp_path / "records.csv").read_text().splitlines()[1:]
+    assert [row.split(",")[1] for row in rows] == [observations[step - 1] for step in steps]
+    csv_values = np.array([[float(value) for value in row.split(",")[2:]] for row in rows])
+    np.testing.assert_allclose(csv_values.reshape(-1, 7), expected[:, 1:], rtol=1e-9, atol=1e-12)
+
+
+@pytest.mark.parametrize("memory_map", [False, True])
+@pytest.mark.parametrize("chunk_size", [1, 5, 4096])
+def test_chunks_of_a_file_rebuild_the_sequence(
+    tmp_path: "Path", chunk_size: int, memory_map: bool
+) -> None:
+    """Reading a file with line breaks in chunks gives back the sequence without whitespace."""
+    observations = candy_observations(1000, 2)
+    path = tmp_path / "observations.txt"
+    path.write_text("\n".join(_chunks(observations, 37)) + "\r\n")
+    chunks = list(read_observation_chunks(path, chunk_size, memory_map))
+    assert all(chunks)
+    assert "".join(chunks) == observations
+
+
+@pytest.mark.usefixtures("_unconfigured_logging")
+def test_output_to_stdout_matches_the_output_file(
+    tmp_path: "Path", capsys: pytest.CaptureFixture[str]
+) -> None:
+    """Writing the streamed result to stdout gives the same text as writing it to a file."""
+    path = tmp_path / "observations.txt"
+    path.write_text(candy_observations(200, 5))
+    main(["--input", str(path), "--chunk-size", "16", "--output", str(tmp_path / "result.txt")])
+    capsys.readouterr()
+    main(["--input", str(path), "--chunk-size", "16", "--output", "-"])
+    assert capsys.readouterr().out == (tmp_path / "result.txt").read_text()
+
+
+def test_stdin_chunks_do_not_wait_for_a_full_chunk(monkeypatch: pytest.MonkeyPatch) -> None:
+    """A chunk from stdin is whatever the pipe holds, not chunk_size bytes."""
+    pipe = _Pipe([b"CCL\n", b"LC"])
+    monkeypatch.setattr(sys, "stdin", io.TextIOWrapper(io.BufferedReader(pipe), "latin-1"))
+    chunks = read_observation_chunks(None, 1 << 20)
+    assert next(chunks) == "CCL"
+    assert pipe.pieces == [b"LC"]
+    assert list(chunks) == ["LC"]
+
+
+@pytest.mark.usefixtures("_unconfigured_logging")
+@pytest.mark.parametrize(
+    ("options", "message"),
+    [
+        (["CLC", "--log-space", "--every", "2"], "do not apply to streaming"),
+        (["--input", "observations.txt", "--vectorized"], "do not apply to streaming"),
+        (["--batch", "sequences.txt", "--log-space"], "do not apply to --batch"),
+        (["CLC", "--mmap"], "--mmap only applies"),
+        (["--input", "-", "--mmap"], "--mmap only applies"),
+        (["--batch", "sequences.txt", "--mmap"], "--mmap only applies"),
+    ],
+)
+def test_rejects_options_the_mode_ignores(
+    options: list[str], message: str, capsys: pytest.CaptureFixture[str]
+) -> None:
+    """Options that would be silently ignored by the chosen mode are errors."""
+    with pytest.raises(SystemExit, match="2"):
+        main(options)
+    assert message in capsys.readouterr().err
@@ -0,0 +1,58 @@
+"""Checks the vectorized posteriors against the observation-by-observation updates"""
+
+from typing import TYPE_CHECKING
+
+import numpy as np
+import pytest
+
+from compute_a_posteriori import (
+    calculate_posterior,
+    next_candy_probability,
+    posterior_trajectory,
+    update_posterior,
+)
+
+from benchmarks.generators import candy_observations
+from tests.candies import candy_bags, split_numbers
+
+
+if TYPE_CHECKING:
+    from pathlib import Path
+
+
+@pytest.mark.parametrize("seed", range(6))
+def test_trajectory_matches_the_updates(seed: int) -> None:
+    """Every row of the trajectory holds the posteriors and next candy after that observation."""
+    observations = candy_observations(500, seed)
+    posteriors, next_candy = posterior_trajectory(candy_bags(), observations)
+    assert posteriors.shape == (len(observations), 5)
+    assert next_candy.shape == (len(observations), 2)
+
+    hypotheses = candy_bags()
+    for index, observation in enumerate(observations):
+        update_posterior(hypotheses, observation)  # type: ignore[arg-type]
+        expected = [hypothesis["prior"] for hypothesis in hypotheses.values()]
+        np.testing.assert_allclose(posteriors[index], expected, rtol=1e-9, atol=1e-12)
+        np.testing.assert_allclose(
+            next_candy[index],
+            [
+                next_candy_probability(hypotheses, "cherry"),
+                next_candy_probability(hypotheses, "lime"),
+            ],
+            rtol=1e-9,
+        )
+
+
+@pytest.mark.parametrize("observations", ["", "C", "LLLL", "CLLCLCCLCL"])
+def test_vectorized_output_matches_the_loop(tmp_path: "Path", observations: str) -> None:
+    """The vectorized result file and final posteriors are the ones of the loop."""
+    loop, vectorized = candy_bags(), candy_bags()
+    calculate_posterior(loop, observations, output=tmp_path / "loop.txt")
+    calculate_posterior(vectorized, observations, vectorized=True, output=tmp_path / "fast.txt")
+
+    loop_layout, loop_numbers = split_numbers((tmp_path / "loop.txt").read_text())
+    layout, numbers = split_numbers((tmp_path / "fast.txt").read_text())
+    assert layout == loop_layout
+    assert numbers == pytest.approx(loop_numbers, rel=1e-4, abs=1e-9)
+    for name, hypothesis in loop.items():
+        assert vectorized[name]["prior"] == pytest.approx(hypothesis["prior"], abs=1e-12)